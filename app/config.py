@@ -19,6 +19,59 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     
+    # Item storage engine: "memory" (default), "columnar" (compact, for large
+    # stores) or "sqlite" (durable database file)
+    storage_engine: str = "memory"
+    sqlite_path: str = "items.db"
+    sqlite_readers: int = 4
+    # Sorted indexes for filtered and sorted listing (~510 B/item); when
+    # disabled, filters use a linear scan and sorts sort a snapshot
+    secondary_indexes: bool = True
+    # Inverted index for GET /items/search (~660 B/item); when disabled the
+    # endpoint returns 503
+    search_index: bool = True
+    
+    # Bulk endpoints
+    max_batch_size: int = 10000
+    export_chunk_size: int = 1000
+    import_batch_size: int = 1000
+    import_max_line_bytes: int = 65536
+    
+    # Encoded item JSON kept for item responses (0 disables the cache). Unset:
+    # 100000, or 0 with the columnar engine, whose point is not to hold dicts
+    response_cache_size: int | None = None
+    
+    # Warm restarts: snapshot + write-ahead log in this directory (disabled when unset)
+    persistence_dir: str | None = None
+    snapshot_interval: int = 300
+    persistence_fsync: bool = False
+    
+    # Per-route latency histograms served at GET /debug/perf
+    perf_histograms: bool = True
+    
+    # Sampling profiler at GET /debug/profile, and per-request profiles for
+    # requests sent with an X-Profile header (off by default)
+    profiling_enabled: bool = False
+    profiling_max_seconds: float = 60.0
+    profiling_interval_ms: float = 10.0
+    profiling_request_interval_ms: float = 1.0
+    
+    # Event loop lag monitor: lag is measured every LOOP_LAG_INTERVAL_MS, and
+    # the loop thread's stack is captured when it is blocked for longer than
+    # LOOP_LAG_THRESHOLD_MS (served at GET /debug/loop)
+    loop_lag_monitor: bool = True
+    loop_lag_interval_ms: float = 100.0
+    loop_lag_threshold_ms: float = 100.0
+    
+    # tracemalloc control and snapshots under /debug/memory (off by default;
+    # the RSS and GC gauges are always exported)
+    memory_debug: bool = False
+    
+    # Shared secret for the /debug endpoints and X-Profile requests, sent in an
+    # X-Debug-Token header (unset: no check, so set it wherever clients can
+    # reach the service)
+    debug_token: str | None = None
+    
     # Azure Container Apps injects these automatically
     container_app_name: str | None = None
     container_app_revision: str | None = None
@@ -27,6 +80,40 @@ class Settings(BaseSettings):
     # Application Insights (optional)
     applicationinsights_connection_string: str | None = None
     
+    # Trace sampling: fraction of new traces exported; requests continuing a
+    # trace follow the caller's decision. Per-route ratios are keyed by route
+    # template, e.g. TRACE_SAMPLE_ROUTES='{"/items/{item_id}": 0.01}'
+    trace_sample_ratio: float = 1.0
+    trace_sample_routes: dict[str, float] = {}
+    # Also export failed (5xx) requests that fall outside the sample
+    trace_sample_errors: bool = True
+    # Tail sampling: buffer each trace and export it only if it is slow,
+    # failed or in a small random baseline
+    trace_tail_sampling: bool = False
+    trace_tail_latency_ms: float = 500.0
+    trace_tail_baseline_ratio: float = 0.01
+    
+    # Telemetry export pipeline (same names as the OpenTelemetry SDK variables).
+    # Spans wait in a bounded queue exported by a background thread; when the
+    # exporter stalls, the oldest spans are dropped instead of slowing requests
+    otel_bsp_max_queue_size: int = 2048
+    otel_bsp_max_export_batch_size: int = 512
+    otel_bsp_schedule_delay: int = 5000  # ms
+    otel_bsp_export_timeout: int = 30000  # ms
+    otel_metric_export_interval: int = 60000  # ms
+    otel_metric_export_timeout: int = 30000  # ms
+    
+    # Custom metric attributes: distinct values kept per metric and attribute
+    # (later values are recorded as "_other"), and optional per-attribute
+    # allow-lists, e.g. METRICS_ALLOWED_ATTRIBUTE_VALUES='{"operation": ["batch", "import"]}'
+    metrics_max_attribute_values: int = 100
+    metrics_allowed_attribute_values: dict[str, list[str]] = {}
+    
+    # Prometheus text exposition at GET /metrics (custom and HTTP server
+    # metrics); scrapes within the cache interval reuse the last rendering
+    prometheus_metrics: bool = False
+    prometheus_cache_seconds: float = 5.0
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,748 @@
+"""
+Secondary structures maintained alongside an ItemStore.
+
+An ``ItemIndex`` is attached to a store with ``ItemStore.add_index`` and is
+told about every item that is added or removed, whichever endpoint did the
+write. Indexes live in process memory and can be rebuilt from a store
+snapshot with ``ItemStore.rebuild_indexes``.
+"""
+import hashlib
+import heapq
+import itertools
+import math
+import operator
+import re
+import secrets
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+
+from sortedcontainers import SortedList
+
+
+class ItemIndex(ABC):
+    """Structure kept in sync with the items of a store."""
+
+    @abstractmethod
+    def add(self, item: dict) -> None:
+        """Record an item that was added to the store."""
+
+    @abstractmethod
+    def remove(self, item: dict) -> None:
+        """Forget an item that was removed from (or replaced in) the store."""
+
+    def add_many(self, items: list[dict]) -> None:
+        """Record several added items (indexes may override with a bulk path)."""
+        for item in items:
+            self.add(item)
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every item."""
+
+
+class ItemFilterIndex(ItemIndex):
+    """
+    Sorted secondary indexes for filtered and sorted listing.
+
+    Keeps (key, id) pairs sorted by case-folded name, price, quantity and
+    total value, so a query seeks to the matching range of the most
+    selective index in O(log n) and only walks the k entries inside it.
+    Remaining predicates are checked against a small per-item attribute
+    tuple, never the store. Sorted pages seek the same way, so they never
+    sort the whole store.
+
+    ID-ordered pages come from a sorted list of IDs: broad filters walk it
+    from the cursor until the page is full, and selective ones keep their
+    matches in ID order (cached until the next write) so later pages only
+    bisect into them.
+    """
+
+    SORT_FIELDS = ("name", "price", "total_value")
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self._by_name: SortedList = SortedList()
+        self._by_price: SortedList = SortedList()
+        self._by_quantity: SortedList = SortedList()
+        self._by_total_value: SortedList = SortedList()
+        self._attrs: dict[int, tuple[str, float, int]] = {}
+        self._ids: SortedList = SortedList()
+        # filters -> ID-ordered matches, valid while _writes is unchanged
+        self._matches: OrderedDict[tuple, tuple[int, list[int]]] = OrderedDict()
+        self._writes = 0
+
+    def add(self, item: dict) -> None:
+        item_id = item["id"]
+        name, price, quantity = item["name"].casefold(), item["price"], item["quantity"]
+        self._writes += 1
+        self._attrs[item_id] = (name, price, quantity)
+        self._ids.add(item_id)
+        self._by_name.add((name, item_id))
+        self._by_price.add((price, item_id))
+        self._by_quantity.add((quantity, item_id))
+        self._by_total_value.add((price * quantity, item_id))
+
+    def add_many(self, items: list[dict]) -> None:
+        # SortedList.update re-sorts once for large batches (e.g. a restore)
+        rows = [(item["id"], item["name"].casefold(), item["price"], item["quantity"]) for item in items]
+        self._writes += 1
+        self._ids.update([item_id for item_id, _, _, _ in rows])
+        self._attrs.update((item_id, (name, price, quantity)) for item_id, name, price, quantity in rows)
+        self._by_name.update([(name, item_id) for item_id, name, _, _ in rows])
+        self._by_price.update([(price, item_id) for item_id, _, price, _ in rows])
+        self._by_quantity.update([(quantity, item_id) for item_id, _, _, quantity in rows])
+        self._by_total_value.update([(price * quantity, item_id) for item_id, _, price, quantity in rows])
+
+    def remove(self, item: dict) -> None:
+        item_id = item["id"]
+        name, price, quantity = self._attrs.pop(item_id)
+        self._writes += 1
+        self._ids.remove(item_id)
+        self._by_name.remove((name, item_id))
+        self._by_price.remove((price, item_id))
+        self._by_quantity.remove((quantity, item_id))
+        self._by_total_value.remove((price * quantity, item_id))
+
+    @staticmethod
+    def sort_key(item: dict, field: str) -> str | float:
+        """Return the value an item is ordered by for a sort field."""
+        return _sort_value((item["name"].casefold(), item["price"], item["quantity"]), field)
+
+    def sorted_page(
+        self,
+        field: str,
+        descending: bool = False,
+        after: tuple | None = None,
+        skip: int = 0,
+        limit: int = 10,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_quantity: int | None = None,
+    ) -> list[int]:
+        """
+        Return one page of item IDs ordered by ``field`` (ties by ID).
+
+        Filtered pages seek into the index for ``field`` (narrowed to the
+        filter's range when it filters that field) and check the other
+        predicates while walking, until ``skip + limit`` items match. Only
+        selective filters are collected and sorted, which costs O(k log k)
+        for the k items in their narrowest range.
+
+        Args:
+            field: One of ``SORT_FIELDS``
+            descending: Reverse the order
+            after: (key, id) of the last item on the previous page (keyset cursor)
+            skip: Items to skip after the cursor position
+            limit: Page size
+            name_prefix, min_price, max_price, min_quantity: Filters, as for ``query``
+        """
+        prefix = None if name_prefix is None else name_prefix.casefold()
+        ranges = self._ranges(prefix, min_price, max_price, min_quantity)
+        narrowest = min(ranges.values(), key=lambda r: r[2] - r[1]) if ranges else None
+        filters = (prefix, min_price, max_price, min_quantity)
+        attrs = self._attrs
+
+        if narrowest is not None and not self._broad(narrowest[1], narrowest[2]):
+            candidates, start, stop = narrowest
+            index = SortedList(
+                (_sort_value(attrs[item_id], field), item_id)
+                for _, item_id in candidates.islice(start, stop)
+                if _matches(attrs[item_id], *filters)
+            )
+            low, high, filtered = 0, len(index), False
+        else:
+            index = {
+                "name": self._by_name,
+                "price": self._by_price,
+                "total_value": self._by_total_value,
+            }[field]
+            _, low, high = ranges.get(field, (index, 0, len(index)))
+            # A range on the sort field alone needs no per-item checks
+            filtered = bool(ranges.keys() - {field})
+
+        if descending:
+            stop = high if after is None else min(high, index.bisect_left(after))
+            if not filtered:
+                stop -= skip
+                page = index.islice(max(low, stop - limit), max(stop, low), reverse=True)
+                return [item_id for _, item_id in page]
+            entries = index.islice(low, max(stop, low), reverse=True)
+        else:
+            start = low if after is None else max(low, index.bisect_right(after))
+            if not filtered:
+                start += skip
+                page = index.islice(start, min(start + limit, high))
+                return [item_id for _, item_id in page]
+            entries = index.islice(start, high)
+        walk = (item_id for _, item_id in entries if _matches(attrs[item_id], *filters))
+        return list(itertools.islice(walk, skip, skip + limit))
+
+    @staticmethod
+    def matches(
+        item: dict,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_quantity: int | None = None,
+    ) -> bool:
+        """Check one item against the filters (used for linear scans)."""
+        return _matches(
+            (item["name"].casefold(), item["price"], item["quantity"]),
+            None if name_prefix is None else name_prefix.casefold(),
+            min_price,
+            max_price,
+            min_quantity,
+        )
+
+    def _ranges(
+        self,
+        prefix: str | None,
+        min_price: float | None,
+        max_price: float | None,
+        min_quantity: int | None,
+    ) -> dict[str, tuple[SortedList, int, int]]:
+        """Return {field: (index, start, stop)} for every filtered field."""
+        ranges = {}
+        if prefix is not None:
+            ranges["name"] = (
+                self._by_name,
+                self._by_name.bisect_left((prefix,)),
+                self._by_name.bisect_left((prefix + "\U0010ffff",)),
+            )
+        if min_price is not None or max_price is not None:
+            ranges["price"] = (
+                self._by_price,
+                0 if min_price is None else self._by_price.bisect_left((min_price,)),
+                len(self._by_price) if max_price is None
+                else self._by_price.bisect_right((max_price, math.inf)),
+            )
+        if min_quantity is not None:
+            ranges["quantity"] = (
+                self._by_quantity,
+                self._by_quantity.bisect_left((min_quantity,)),
+                len(self._by_quantity),
+            )
+        return ranges
+
+    def _narrowest(
+        self,
+        prefix: str | None,
+        min_price: float | None,
+        max_price: float | None,
+        min_quantity: int | None,
+    ) -> tuple[SortedList, int, int] | None:
+        """Return (index, start, stop) of the smallest range covering the filters."""
+        ranges = self._ranges(prefix, min_price, max_price, min_quantity).values()
+        return min(ranges, key=lambda r: r[2] - r[1]) if ranges else None
+
+    def _broad(self, start: int, stop: int) -> bool:
+        """Whether a range is large enough that walking in order beats collecting it."""
+        return (stop - start) * _WALK_SHARE >= len(self._attrs)
+
+    def query(
+        self,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_quantity: int | None = None,
+    ) -> list[int]:
+        """
+        Return the IDs of all items matching every given filter, in ID order.
+
+        Cost is O(log n + k log k) where k is the size of the narrowest index
+        range; listing should use ``query_page``.
+        """
+        prefix = None if name_prefix is None else name_prefix.casefold()
+        narrowest = self._narrowest(prefix, min_price, max_price, min_quantity)
+        if narrowest is None:
+            return list(self._ids)
+        index, start, stop = narrowest
+        attrs = self._attrs
+        return sorted(
+            item_id
+            for _, item_id in index.islice(start, stop)
+            if _matches(attrs[item_id], prefix, min_price, max_price, min_quantity)
+        )
+
+    def query_page(
+        self,
+        name_prefix: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_quantity: int | None = None,
+        after_id: int | None = None,
+        skip: int = 0,
+        limit: int = 10,
+    ) -> list[int]:
+        """
+        Return one ID-ordered page of the items matching every given filter.
+
+        When the narrowest index range holds a large share of the store, the
+        ID list is walked from ``after_id`` until ``skip + limit`` items
+        match, which costs about (skip + limit) / selectivity. Otherwise the
+        matches are collected once in ID order and reused by later pages
+        until the next write, so a page costs O(log k + limit).
+        """
+        prefix = None if name_prefix is None else name_prefix.casefold()
+        narrowest = self._narrowest(prefix, min_price, max_price, min_quantity)
+        ids = self._ids
+        if narrowest is None or self._broad(narrowest[1], narrowest[2]):
+            start = 0 if after_id is None else ids.bisect_right(after_id)
+            if narrowest is None:
+                return list(ids.islice(start + skip, start + skip + limit))
+            attrs = self._attrs
+            walk = (
+                item_id for item_id in ids.islice(start)
+                if _matches(attrs[item_id], prefix, min_price, max_price, min_quantity)
+            )
+            return list(itertools.islice(walk, skip, skip + limit))
+
+        key = (prefix, min_price, max_price, min_quantity)
+        cached = self._matches.get(key)
+        if cached is not None and cached[0] == self._writes:
+            matches = cached[1]
+            self._matches.move_to_end(key)
+        else:
+            matches = self.query(name_prefix, min_price, max_price, min_quantity)
+            self._matches[key] = (self._writes, matches)
+            if len(self._matches) > _CACHED_QUERIES:
+                self._matches.popitem(last=False)
+        start = (0 if after_id is None else bisect_right(matches, after_id)) + skip
+        return matches[start : start + limit]
+
+
+# A filter whose narrowest range holds at least 1/_WALK_SHARE of the items
+# is answered by walking items in order and checking every predicate
+_WALK_SHARE = 8
+
+# Selective filters whose ID-ordered matches are kept between pages
+_CACHED_QUERIES = 8
+
+
+def _sort_value(attrs: tuple[str, float, int], field: str) -> str | float:
+    name, price, quantity = attrs
+    if field == "name":
+        return name
+    if field == "price":
+        return price
+    return price * quantity
+
+
+def _matches(
+    attrs: tuple[str, float, int],
+    prefix: str | None,
+    min_price: float | None,
+    max_price: float | None,
+    min_quantity: int | None,
+) -> bool:
+    name, price, quantity = attrs
+    return (
+        (prefix is None or name.startswith(prefix))
+        and (min_price is None or price >= min_price)
+        and (max_price is None or price <= max_price)
+        and (min_quantity is None or quantity >= min_quantity)
+    )
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Name matches count for more than description matches when ranking
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+# Every term costs an intersection and a scoring pass over the matches
+MAX_QUERY_TERMS = 16
+
+# Intersections up to this size are scored item by item; larger ones are
+# ranked by walking tier combinations
+_SCORED_MATCHES = 10_000
+
+# Tier combinations a ranking walk may visit before scoring item by item
+_WALKED_COMBINATIONS = 256
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Split text into case-folded word tokens."""
+    return _TOKEN_RE.findall(text.casefold()) if text else []
+
+
+class ItemSearchIndex(ItemIndex):
+    """
+    In-process inverted index over item names and descriptions.
+
+    Each term maps to impact tiers: {weight: set of item IDs}, where the
+    weight is the term frequency with name occurrences boosted. Weights are
+    small integers, so a term has only a handful of tiers. Queries use AND
+    semantics and TF-IDF scoring. The terms' ID sets are intersected rarest
+    first with C-level set operations, which gives the total. A small
+    intersection is scored item by item and the page taken with a bounded
+    heap (ties by ID); a large one is ranked by visiting tier combinations
+    best-first, where every item shares a score, until the page is full
+    (ties in unspecified but stable order). Both paths are bounded, so cost
+    grows linearly, not exponentially, with the number of terms.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self._postings: dict[str, dict[int, set[int]]] = {}
+        self._documents = 0
+
+    @staticmethod
+    def _weights(item: dict) -> dict[str, int]:
+        weights: dict[str, int] = {}
+        for token in tokenize(item["name"]):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(item["description"]):
+            weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+        return weights
+
+    def add(self, item: dict) -> None:
+        item_id = item["id"]
+        postings = self._postings
+        for token, weight in self._weights(item).items():
+            tiers = postings.get(token)
+            if tiers is None:
+                tiers = postings[token] = {}
+            ids = tiers.get(weight)
+            if ids is None:
+                tiers[weight] = {item_id}
+            else:
+                ids.add(item_id)
+        self._documents += 1
+
+    def remove(self, item: dict) -> None:
+        item_id = item["id"]
+        postings = self._postings
+        for token, weight in self._weights(item).items():
+            tiers = postings.get(token)
+            if tiers is None:
+                continue
+            ids = tiers.get(weight)
+            if ids is None:
+                continue
+            ids.discard(item_id)
+            if not ids:
+                del tiers[weight]
+                if not tiers:
+                    del postings[token]
+        self._documents -= 1
+
+    def search(self, query: str, limit: int = 10, skip: int = 0) -> tuple[int, list[tuple[int, float]]]:
+        """
+        Find items containing every query term.
+
+        Returns:
+            tuple: (total number of matches, [(item_id, score), ...] for the
+            requested page, best first, ties by ID)
+
+        Raises:
+            ValueError: If the query has more than ``MAX_QUERY_TERMS`` distinct terms
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if len(terms) > MAX_QUERY_TERMS:
+            raise ValueError(f"At most {MAX_QUERY_TERMS} distinct search terms are allowed")
+        tiered: list[dict[int, set[int]]] = []
+        for term in terms:
+            tiers = self._postings.get(term)
+            if tiers is None:
+                return 0, []
+            tiered.append(tiers)
+        if not tiered:
+            return 0, []
+
+        frequencies = [sum(len(ids) for ids in tiers.values()) for tiers in tiered]
+        idfs = [math.log(1 + self._documents / frequency) for frequency in frequencies]
+
+        if len(terms) == 1:
+            total = frequencies[0]
+        else:
+            # Intersect rarest term first; `&` iterates the smaller set, so a
+            # broad term costs no more than the candidates left
+            by_rarity = sorted(range(len(terms)), key=frequencies.__getitem__)
+            matches: set[int] = set().union(*tiered[by_rarity[0]].values())
+            for position in by_rarity[1:]:
+                if not matches:
+                    return 0, []
+                matches = set().union(*(matches & ids for ids in tiered[position].values()))
+            total = len(matches)
+            if total <= _SCORED_MATCHES:
+                return total, _score_matches(matches, tiered, idfs, skip + limit)[skip:]
+
+        hits = _walk_tiers(tiered, idfs, skip + limit)
+        if hits is None:
+            if len(terms) == 1:
+                matches = set().union(*tiered[0].values())
+            hits = _score_matches(matches, tiered, idfs, skip + limit)
+        return total, hits[skip:]
+
+    def memory_usage(self) -> dict:
+        """Report index size; walks every term, so keep it off hot paths."""
+        postings = self._postings
+        entries = 0
+        approx_bytes = sys.getsizeof(postings)
+        for term, tiers in postings.items():
+            approx_bytes += sys.getsizeof(term) + sys.getsizeof(tiers)
+            for ids in tiers.values():
+                entries += len(ids)
+                approx_bytes += sys.getsizeof(ids)
+        return {
+            "documents": self._documents,
+            "terms": len(postings),
+            "postings": entries,
+            "approx_bytes": approx_bytes,
+        }
+
+
+def _score_matches(
+    matches: set[int], tiered: list[dict[int, set[int]]], idfs: list[float], count: int
+) -> list[tuple[int, float]]:
+    """Score every match tier by tier and keep the best ``count``, ties by ID."""
+    scores = dict.fromkeys(matches, 0.0)
+    for idf, tiers in zip(idfs, tiered, strict=True):
+        for weight, ids in tiers.items():
+            score = idf * weight
+            for item_id in matches & ids:
+                scores[item_id] += score
+    return heapq.nlargest(count, scores.items(), key=lambda hit: (hit[1], -hit[0]))
+
+
+def _walk_tiers(
+    tiered: list[dict[int, set[int]]], idfs: list[float], count: int
+) -> list[tuple[int, float]] | None:
+    """
+    Collect the best ``count`` hits by visiting tier combinations best-first.
+
+    Every item in a combination of tiers has the same score, so broad terms
+    are ranked with a few C-level intersections instead of a Python loop
+    per match. Gives up (returns None) after ``_WALKED_COMBINATIONS``
+    combinations, which bounds the cost when most combinations are empty.
+    """
+    levels = [sorted(tiers.items(), reverse=True) for tiers in tiered]
+
+    def entry(positions: tuple[int, ...], lowest: int) -> tuple:
+        chosen = [level[position] for level, position in zip(levels, positions, strict=True)]
+        score = sum(idf * weight for idf, (weight, _) in zip(idfs, chosen, strict=True))
+        return -score, positions, lowest
+
+    # Each combination is reached once: successors only advance terms at or
+    # after the last term advanced. Weights fall along a level, so scores
+    # never rise from a combination to its successors.
+    frontier = [entry((0,) * len(levels), 0)]
+    hits: list[tuple[int, float]] = []
+    for _ in range(_WALKED_COMBINATIONS):
+        if not frontier:
+            return hits
+        negated, positions, lowest = heapq.heappop(frontier)
+        sets = sorted(
+            (level[position][1] for level, position in zip(levels, positions, strict=True)), key=len
+        )
+        ids = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        hits.extend((item_id, -negated) for item_id in itertools.islice(ids, count - len(hits)))
+        if len(hits) >= count:
+            return hits
+        for term in range(lowest, len(levels)):
+            if positions[term] + 1 < len(levels[term]):
+                advanced = positions[:term] + (positions[term] + 1,) + positions[term + 1:]
+                heapq.heappush(frontier, entry(advanced, term))
+    return None
+
+
+# Inclusive upper bounds of the quantity histogram buckets; a final
+# open-ended bucket catches everything above the last bound.
+QUANTITY_BUCKETS = (0, 1, 10, 100, 1000)
+
+
+class ItemStatsIndex(ItemIndex):
+    """
+    Incrementally maintained aggregates over all items.
+
+    Counts, sums and the quantity histogram are O(1) per write. Min/max
+    price come from a sorted multiset of prices (O(log n) per write, O(1)
+    to read) because deletes can remove the current extreme.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.count = 0
+        self.total_value = 0.0
+        self.total_quantity = 0
+        self.price_sum = 0.0
+        self.quantity_histogram = [0] * (len(QUANTITY_BUCKETS) + 1)
+        self._prices: SortedList = SortedList()
+
+    def add(self, item: dict) -> None:
+        price, quantity = item["price"], item["quantity"]
+        self.count += 1
+        self.total_value += price * quantity
+        self.total_quantity += quantity
+        self.price_sum += price
+        self.quantity_histogram[bisect_left(QUANTITY_BUCKETS, quantity)] += 1
+        self._prices.add(price)
+
+    def add_many(self, items: list[dict]) -> None:
+        prices = [item["price"] for item in items]
+        quantities = [item["quantity"] for item in items]
+        self.count += len(items)
+        self.total_value += sum(map(operator.mul, prices, quantities))
+        self.total_quantity += sum(quantities)
+        self.price_sum += sum(prices)
+        histogram = self.quantity_histogram
+        for quantity in quantities:
+            histogram[bisect_left(QUANTITY_BUCKETS, quantity)] += 1
+        self._prices.update(prices)
+
+    def remove(self, item: dict) -> None:
+        price, quantity = item["price"], item["quantity"]
+        self.count -= 1
+        self.total_quantity -= quantity
+        self.quantity_histogram[bisect_left(QUANTITY_BUCKETS, quantity)] -= 1
+        self._prices.remove(price)
+        if self.count:
+            self.total_value -= price * quantity
+            self.price_sum -= price
+        else:
+            # Reset running float sums so rounding error does not accumulate
+            self.total_value = 0.0
+            self.price_sum = 0.0
+
+    def summary(self) -> dict:
+        """Return the current aggregates in the shape of ItemStatsResponse."""
+        return _summary(
+            count=self.count,
+            total_value=self.total_value,
+            total_quantity=self.total_quantity,
+            price_sum=self.price_sum,
+            min_price=self._prices[0] if self.count else None,
+            max_price=self._prices[-1] if self.count else None,
+            histogram=self.quantity_histogram,
+        )
+
+    @staticmethod
+    async def recompute(chunks: AsyncIterator[list[dict]]) -> dict:
+        """
+        Compute the same aggregates from scratch over a store snapshot.
+
+        Each chunk is packed into typed arrays and reduced with C-level
+        builtins (``math.fsum``, ``min``, ``max``). Sums are correctly
+        rounded, so this also verifies the running totals for drift.
+        """
+        count = 0
+        total_quantity = 0
+        value_sums: list[float] = []
+        price_sums: list[float] = []
+        min_price: float | None = None
+        max_price: float | None = None
+        histogram = [0] * (len(QUANTITY_BUCKETS) + 1)
+
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            prices = array("d", (item["price"] for item in chunk))
+            quantities = array("q", (item["quantity"] for item in chunk))
+            count += len(prices)
+            total_quantity += sum(quantities)
+            value_sums.append(math.fsum(map(float.__mul__, prices, map(float, quantities))))
+            price_sums.append(math.fsum(prices))
+            chunk_min, chunk_max = min(prices), max(prices)
+            min_price = chunk_min if min_price is None else min(min_price, chunk_min)
+            max_price = chunk_max if max_price is None else max(max_price, chunk_max)
+            for quantity in quantities:
+                histogram[bisect_left(QUANTITY_BUCKETS, quantity)] += 1
+
+        return _summary(
+            count=count,
+            total_value=math.fsum(value_sums),
+            total_quantity=total_quantity,
+            price_sum=math.fsum(price_sums),
+            min_price=min_price,
+            max_price=max_price,
+            histogram=histogram,
+        )
+
+
+def _summary(
+    count: int,
+    total_value: float,
+    total_quantity: int,
+    price_sum: float,
+    min_price: float | None,
+    max_price: float | None,
+    histogram: list[int],
+) -> dict:
+    bounds: list[int | None] = [*QUANTITY_BUCKETS, None]
+    return {
+        "count": count,
+        "total_value": total_value,
+        "total_quantity": total_quantity,
+        "min_price": min_price,
+        "max_price": max_price,
+        "avg_price": price_sum / count if count else None,
+        "quantity_histogram": [
+            {"le": bound, "count": bucket_count}
+            for bound, bucket_count in zip(bounds, histogram, strict=True)
+        ],
+    }
+
+
+class ItemVersionIndex(ItemIndex):
+    """
+    Version counters for conditional GETs (ETags).
+
+    The store-wide version advances on every write; each item remembers the
+    version at which it was last written. ETags are prefixed with a random
+    per-process epoch, so versions reused after a restart never collide with
+    ETags issued by an earlier process.
+    """
+
+    def __init__(self) -> None:
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        self._versions: dict[int, int] = {}
+
+    def add(self, item: dict) -> None:
+        self.version += 1
+        self._versions[item["id"]] = self.version
+
+    def add_many(self, items: list[dict]) -> None:
+        first = self.version + 1
+        self.version += len(items)
+        self._versions.update(
+            zip([item["id"] for item in items], range(first, self.version + 1), strict=True)
+        )
+
+    def remove(self, item: dict) -> None:
+        self.version += 1
+        self._versions.pop(item["id"], None)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._versions.clear()
+
+    def item_etag(self, item_id: int) -> str | None:
+        """Strong ETag for one item, or None if the item does not exist."""
+        version = self._versions.get(item_id)
+        if version is None:
+            return None
+        return f'"{self.epoch}-{item_id}-{version}"'
+
+    def store_etag(self, variant: str = "") -> str:
+        """
+        Strong ETag for a response derived from the whole store.
+
+        Args:
+            variant: Distinguishes responses over the same store state
+                (e.g. the normalized query string of a listing)
+        """
+        digest = hashlib.blake2b(variant.encode(), digest_size=6).hexdigest()
+        return f'"{self.epoch}-v{self.version}-{digest}"'
@@ -0,0 +1,151 @@
+"""
+Event loop lag monitor with blocking-call detection.
+
+Every handler runs on the single event loop thread, so one blocking call
+(file I/O, a big sort, a synchronous exporter) delays every request on the
+replica. ``LoopLagMonitor`` measures this from two sides:
+
+- A task sleeps ``interval`` seconds in a loop and records how late it woke
+  up in the ``app.eventloop.lag`` histogram (and a local histogram for
+  ``GET /debug/loop``).
+- A watchdog thread checks the task's heartbeat. When the loop is overdue by
+  more than ``threshold``, the blocking code is still running, so the loop
+  thread's stack (``sys._current_frames``) shows what it is. The stack is
+  logged, counted in ``app.eventloop.stalls`` and kept for ``/debug/loop``.
+"""
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import UTC, datetime
+from typing import Optional
+
+from opentelemetry import metrics
+
+from app.perf import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag and captures the loop thread's stack on stalls.
+
+    ``start()`` must be called from the loop to monitor; the latest ``keep``
+    stalls are kept.
+    """
+
+    def __init__(
+        self,
+        meter: metrics.Meter,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        keep: int = 20,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = LatencyHistogram()
+        self.stalls: deque[dict] = deque(maxlen=keep)
+        self.lag = meter.create_histogram(
+            name="app.eventloop.lag",
+            description="How late event loop timer callbacks run",
+            unit="ms",
+        )
+        self.stall_count = meter.create_counter(
+            name="app.eventloop.stalls",
+            description="Times the event loop was blocked longer than the threshold",
+            unit="1",
+        )
+        self._heartbeat = time.monotonic()
+        # Stall captured by the watchdog and not yet resolved by the loop
+        self._stall: Optional[dict] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self.record(max(0.0, now - expected))
+
+    def record(self, lag: float) -> None:
+        """Record one lag measurement (seconds)."""
+        self.histogram.record(int(lag * 1_000_000))
+        self.lag.record(lag * 1000)
+        stall, self._stall = self._stall, None
+        if stall is not None:
+            stall["lag_ms"] = round(lag * 1000, 3)
+
+    def _watch(self) -> None:
+        captured = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked > self.threshold and heartbeat != captured:
+                captured = heartbeat
+                self.capture(blocked)
+
+    def capture(self, blocked: float) -> None:
+        """Record the loop thread's current stack as a stall."""
+        thread = self._loop_thread
+        frame = sys._current_frames().get(thread) if thread is not None else None
+        stack = [
+            f"{entry.filename}:{entry.lineno} in {entry.name}"
+            for entry in traceback.extract_stack(frame)
+        ] if frame is not None else []
+        stall = {
+            "time": datetime.now(UTC),
+            "blocked_ms": round(blocked * 1000, 3),
+            "lag_ms": None,
+            "stack": stack,
+        }
+        self.stalls.append(stall)
+        self._stall = stall
+        self.stall_count.add(1)
+        logger.warning(
+            "Event loop blocked for over %.0f ms in:\n  %s",
+            blocked * 1000,
+            "\n  ".join(stack),
+        )
+
+    def report(self) -> dict:
+        """Summarize lag since start and the latest stalls, newest first."""
+        histogram = self.histogram
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag": {
+                "count": histogram.count,
+                "p50_ms": histogram.percentile(0.50) / 1000,
+                "p99_ms": histogram.percentile(0.99) / 1000,
+                "max_ms": histogram.max_us / 1000,
+            },
+            "stalls": list(reversed(self.stalls)),
+        }
@@ -9,33 +9,126 @@ A professional but simple FastAPI application demonstrating:
 - OpenAPI documentation
 - OpenTelemetry observability (traces, metrics, logs)
 """
+import asyncio
+import csv
+import io
+import json
+import secrets
 import signal
 import socket
 import sys
 from contextlib import asynccontextmanager
+from collections.abc import AsyncIterator
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Any, Literal
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, Path, Query, HTTPException, status
+import orjson
+from fastapi import Depends, FastAPI, Header, Path, Query, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from opentelemetry import trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from pydantic import ValidationError
 
 from app.config import get_settings
+from app.indexes import ItemFilterIndex, ItemSearchIndex, ItemStatsIndex, ItemVersionIndex
 from app.models import (
     HealthResponse,
     InfoResponse,
     WelcomeResponse,
     ItemCreate,
     ItemResponse,
+    BatchItemResult,
+    BatchCreateResponse,
+    ItemIdsRequest,
+    BulkItemsResponse,
+    BulkDeleteResponse,
+    ImportLineError,
+    ImportSummary,
+    ItemStatsResponse,
+    PerfResponse,
+    LoopLagResponse,
+    MemoryStatsResponse,
+    MemoryStatus,
+    SearchResponse,
+    SearchIndexStats,
     ErrorResponse,
 )
+from app.looplag import LoopLagMonitor
+from app.memory import GroupBy, MemoryProfiler, register_memory_metrics
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.perf import RouteLatencyMiddleware, RouteLatencyRecorder
+from app.persistence import ItemPersistence
+from app.profiling import Profiler, RequestProfileMiddleware
+from app.probes import health_responder, install_probe_fast_path, probe_excluded_urls, static_responder
+from app.prometheus import CONTENT_TYPE as PROMETHEUS_CONTENT_TYPE, PrometheusMetricReader
+from app.serialization import ItemJSONCache, encode_item, json_response
+from app.store import ItemStore, create_item_store
 from app.telemetry import configure_telemetry, create_custom_metrics
 
 
-# In-memory storage for demo purposes
-items_db: dict[int, dict] = {}
-item_id_counter = 0
+# Item storage (see app/store.py for engines)
+items_db: ItemStore = create_item_store(
+    get_settings().storage_engine,
+    **(
+        {"path": get_settings().sqlite_path, "readers": get_settings().sqlite_readers}
+        if get_settings().storage_engine == "sqlite"
+        else {}
+    ),
+)
+
+# Aggregates kept up to date by every store write (see app/indexes.py)
+item_stats = ItemStatsIndex()
+items_db.add_index(item_stats)
+item_versions = ItemVersionIndex()
+items_db.add_index(item_versions)
+item_filters: ItemFilterIndex | None = None
+if get_settings().secondary_indexes:
+    item_filters = ItemFilterIndex()
+    items_db.add_index(item_filters)
+item_search: ItemSearchIndex | None = None
+if get_settings().search_index:
+    item_search = ItemSearchIndex()
+    items_db.add_index(item_search)
+# Pre-encoded item JSON served by the item endpoints (see app/serialization.py).
+# Cache entries hold the item dicts the columnar engine avoids, so it gets none
+# unless asked for
+response_cache_size = get_settings().response_cache_size
+if response_cache_size is None:
+    response_cache_size = 0 if get_settings().storage_engine == "columnar" else 100_000
+item_json = ItemJSONCache(response_cache_size)
+items_db.add_index(item_json)
+
+# In-process latency histograms for GET /debug/perf (see app/perf.py)
+route_latency: RouteLatencyRecorder | None = None
+if get_settings().perf_histograms:
+    route_latency = RouteLatencyRecorder()
+
+# Sampling profiler for GET /debug/profile and X-Profile requests (see app/profiling.py)
+profiler: Profiler | None = None
+if get_settings().profiling_enabled:
+    profiler = Profiler(
+        interval=get_settings().profiling_interval_ms / 1000,
+        request_interval=get_settings().profiling_request_interval_ms / 1000,
+        max_seconds=get_settings().profiling_max_seconds,
+    )
+
+# tracemalloc control and snapshots for /debug/memory (see app/memory.py)
+memory_profiler: MemoryProfiler | None = None
+if get_settings().memory_debug:
+    memory_profiler = MemoryProfiler()
+
+# Pull-based metric reader behind GET /metrics (see app/prometheus.py)
+prometheus_reader: PrometheusMetricReader | None = None
+if get_settings().prometheus_metrics:
+    prometheus_reader = PrometheusMetricReader(cache_seconds=get_settings().prometheus_cache_seconds)
+
+# Snapshot + write-ahead log, when PERSISTENCE_DIR is set (see app/persistence.py)
+item_persistence: ItemPersistence | None = None
+
+# Event loop lag monitor, started in lifespan (see app/looplag.py)
+loop_monitor: LoopLagMonitor | None = None
 
 # Graceful shutdown flag
 shutdown_event = False
@@ -58,12 +151,25 @@ def handle_sigterm(signum, frame):
     sys.exit(0)
 
 
+async def _snapshot_periodically(persistence: ItemPersistence, interval: int) -> None:
+    """Snapshot the store every ``interval`` seconds if anything was written."""
+    while True:
+        await asyncio.sleep(interval)
+        if not persistence.pending:
+            continue
+        try:
+            await persistence.snapshot(items_db)
+        except OSError as e:
+            # The WAL still has every write; retry on the next interval
+            print(f"⚠️ Snapshot failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events.
     """
-    global tracer, meter, custom_metrics
+    global tracer, meter, custom_metrics, item_persistence, loop_monitor
     
     # Startup
     settings = get_settings()
@@ -75,12 +181,39 @@ async def lifespan(app: FastAPI):
         service_name=settings.app_name,
         service_version=settings.app_version,
         service_instance_id=socket.gethostname(),
+        sample_ratio=settings.trace_sample_ratio,
+        sample_routes=settings.trace_sample_routes,
+        sample_errors=settings.trace_sample_errors,
+        tail_sampling=settings.trace_tail_sampling,
+        tail_latency_ms=settings.trace_tail_latency_ms,
+        tail_baseline_ratio=settings.trace_tail_baseline_ratio,
+        span_queue_size=settings.otel_bsp_max_queue_size,
+        span_batch_size=settings.otel_bsp_max_export_batch_size,
+        span_schedule_delay_millis=settings.otel_bsp_schedule_delay,
+        span_export_timeout_millis=settings.otel_bsp_export_timeout,
+        metric_export_interval_millis=settings.otel_metric_export_interval,
+        metric_export_timeout_millis=settings.otel_metric_export_timeout,
+        metric_readers=[prometheus_reader] if prometheus_reader is not None else [],
     )
     
     # Create custom metrics
-    custom_metrics = create_custom_metrics(meter)
+    custom_metrics = create_custom_metrics(
+        meter,
+        max_attribute_values=settings.metrics_max_attribute_values,
+        allowed_attribute_values=settings.metrics_allowed_attribute_values,
+    )
+    register_memory_metrics(meter)
     print("📊 OpenTelemetry instrumentation configured")
     
+    # Watch for handlers blocking the event loop
+    if settings.loop_lag_monitor:
+        loop_monitor = LoopLagMonitor(
+            meter,
+            interval=settings.loop_lag_interval_ms / 1000,
+            threshold=settings.loop_lag_threshold_ms / 1000,
+        )
+        loop_monitor.start()
+    
     # Register SIGTERM handler for graceful shutdown
     # Note: signal.signal() only works in the main thread, so we catch
     # ValueError when running in test environments (TestClient uses threads)
@@ -90,10 +223,40 @@ async def lifespan(app: FastAPI):
         # Not in main thread (e.g., during testing) - skip signal handler
         pass
     
+    # Durable engines already hold items: load them into the in-memory indexes
+    if items_db.persistent:
+        await items_db.rebuild_indexes()
+    
+    # Warm restart: restore items (and the ID counter) before serving
+    snapshot_task = None
+    if settings.persistence_dir and items_db.persistent:
+        print("⚠️ PERSISTENCE_DIR ignored: the storage engine is already durable")
+    elif settings.persistence_dir:
+        item_persistence = ItemPersistence(settings.persistence_dir, fsync=settings.persistence_fsync)
+        restored = await item_persistence.restore(items_db, freeze=True)
+        items_db.add_index(item_persistence)
+        snapshot_task = asyncio.create_task(
+            _snapshot_periodically(item_persistence, settings.snapshot_interval)
+        )
+        print(f"💾 Restored {restored} items from {settings.persistence_dir}")
+    
     yield
     
     # Shutdown
     print("👋 Application shutting down gracefully...")
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+        loop_monitor = None
+    if item_persistence is not None:
+        if snapshot_task is not None:
+            snapshot_task.cancel()
+        # A final snapshot makes the next startup a pure snapshot load
+        await item_persistence.snapshot(items_db)
+        items_db.remove_index(item_persistence)
+        item_persistence.close()
+        item_persistence = None
+    # Release engine threads and connections (a no-op for in-process engines)
+    items_db.close()
 
 
 # Initialize FastAPI app
@@ -109,9 +272,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Paths answered by the probe fast path (see app/probes.py)
+PROBE_PATHS = ("/health", "/health/ready", "/health/live", "/info", "/")
+
 # Auto-instrument FastAPI with OpenTelemetry
-# This automatically creates spans for all HTTP requests
-FastAPIInstrumentor.instrument_app(app)
+# This automatically creates spans for all HTTP requests except probes and scrapes
+FastAPIInstrumentor.instrument_app(app, excluded_urls=probe_excluded_urls((*PROBE_PATHS, "/metrics")))
 
 # CORS middleware configuration
 app.add_middleware(
@@ -120,8 +286,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Missing-Ids", "ETag"],
 )
 
+# Per-route latency, recorded around everything but tracing and probes
+if route_latency is not None:
+    app.add_middleware(RouteLatencyMiddleware, recorder=route_latency)
+
+# Per-request profiles for requests sent with an X-Profile header
+if profiler is not None:
+    app.add_middleware(RequestProfileMiddleware, profiler=profiler, token=settings.debug_token)
+
 
 # =============================================================================
 # Health & Info Endpoints (Required for Azure Container Apps)
@@ -205,6 +380,11 @@ async def get_info() -> InfoResponse:
     - Reading environment variables at runtime (12-Factor)
     - Azure Container Apps metadata injection
     """
+    return _info_response()
+
+
+def _info_response() -> InfoResponse:
+    """Build the /info payload; it only depends on settings and the host."""
     config = get_settings()
     
     return InfoResponse(
@@ -233,6 +413,11 @@ async def root() -> WelcomeResponse:
     """
     Root endpoint with welcome message.
     """
+    return _welcome_response()
+
+
+def _welcome_response() -> WelcomeResponse:
+    """Build the welcome payload for the configured environment."""
     # Environment-specific welcome messages
     env = settings.environment.lower()
     if env == "dev":
@@ -248,10 +433,339 @@ async def root() -> WelcomeResponse:
     )
 
 
+def _shutting_down() -> str | None:
+    """Reason the readiness probe fails, if any."""
+    return "Application is shutting down" if shutdown_event else None
+
+
+# Probes and static payloads bypass CORS and routing (and are not traced); the
+# routes above keep documenting them in OpenAPI. Added after every other
+# middleware so it is the outermost one
+install_probe_fast_path(app, {
+    "/health": health_responder("healthy"),
+    "/health/ready": health_responder("ready", _shutting_down),
+    "/health/live": health_responder("alive"),
+    "/info": static_responder(_info_response().model_dump_json().encode()),
+    "/": static_responder(_welcome_response().model_dump_json().encode()),
+})
+
+
 # =============================================================================
 # Demo CRUD Endpoints (Items)
 # =============================================================================
 
+def _build_item(item_id: int, item: ItemCreate) -> dict:
+    """Build the stored representation of a validated item."""
+    return {
+        "id": item_id,
+        "name": item.name,
+        "description": item.description,
+        "price": item.price,
+        "quantity": item.quantity,
+    }
+
+
+def _item_response(item: dict) -> ItemResponse:
+    """Build the API response for a stored item (adds derived total_value)."""
+    return ItemResponse(**item, total_value=item["price"] * item["quantity"])
+
+
+def _check_batch_size(size: int) -> None:
+    """Reject bulk requests larger than the configured maximum."""
+    if size > settings.max_batch_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch size {size} exceeds maximum of {settings.max_batch_size}"
+        )
+
+
+def _unique_ids(item_ids: list[int]) -> list[int]:
+    """Drop duplicate IDs while keeping request order."""
+    return list(dict.fromkeys(item_ids))
+
+
+def _parse_ids(raw: str) -> list[int]:
+    """Parse a comma-separated ``ids`` query parameter."""
+    try:
+        item_ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        ) from e
+    if not item_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must contain at least one item ID"
+        )
+    return _unique_ids(item_ids)
+
+
+async def _fetch_items(item_ids: list[int]) -> tuple[list[dict], list[int]]:
+    """Resolve IDs in one store pass, returning (found items, missing IDs)."""
+    _check_batch_size(len(item_ids))
+    found = await items_db.get_many(item_ids)
+    
+    current_span = trace.get_current_span()
+    if current_span:
+        current_span.set_attribute("bulk.requested", len(item_ids))
+        current_span.set_attribute("bulk.found", len(found))
+    
+    items = [found[item_id] for item_id in item_ids if item_id in found]
+    missing = [item_id for item_id in item_ids if item_id not in found]
+    return items, missing
+
+
+EXPORT_FIELDS = ["id", "name", "description", "price", "quantity", "total_value"]
+
+
+async def _export_ndjson(chunks: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    """Serialize snapshot chunks as NDJSON, one encoded chunk at a time."""
+    async for chunk in chunks:
+        yield b"".join([encode_item(item) + b"\n" for item in chunk])
+
+
+async def _export_csv(chunks: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    """Serialize snapshot chunks as CSV with a header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue().encode()
+    
+    async for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (item["id"], item["name"], item["description"], item["price"],
+             item["quantity"], item["price"] * item["quantity"])
+            for item in chunk
+        )
+        yield buffer.getvalue().encode()
+
+
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes | None]:
+    """
+    Split a byte stream into lines, buffering at most one partial line.
+    
+    Yields None in place of any line longer than ``max_line_bytes``; the rest
+    of that line is discarded as it arrives.
+    """
+    pending = b""
+    discarding = False
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if discarding:
+                # Tail of an over-long line that was already reported
+                discarding = False
+                continue
+            yield line if len(line) <= max_line_bytes else None
+        if len(pending) > max_line_bytes:
+            if not discarding:
+                yield None
+            discarding = True
+            pending = b""
+    if pending and not discarding:
+        yield pending
+
+
+async def _import_batch(batch: list[tuple[int, object]]) -> tuple[int, list[ImportLineError]]:
+    """
+    Validate and store one batch of parsed NDJSON lines.
+    
+    Lines carrying an ``id`` (as exported by GET /items/export) keep it, so a
+    dump can be reloaded as-is; other lines get newly allocated IDs.
+    
+    Returns:
+        tuple: (number of items stored, rejected lines)
+    """
+    errors: list[ImportLineError] = []
+    keyed: list[tuple[int, ItemCreate]] = []
+    unkeyed: list[ItemCreate] = []
+    for line_no, entry in batch:
+        try:
+            item = ItemCreate.model_validate(entry)
+        except ValidationError as e:
+            errors.append(ImportLineError(line=line_no, error=_format_validation_error(e)))
+            continue
+        item_id = entry.get("id") if isinstance(entry, dict) else None
+        if item_id is None:
+            unkeyed.append(item)
+        elif isinstance(item_id, int) and not isinstance(item_id, bool) and item_id >= 1:
+            keyed.append((item_id, item))
+        else:
+            errors.append(ImportLineError(line=line_no, error="id: must be a positive integer"))
+    
+    # An ID repeated within the batch is stored once, last line wins (as put_many does)
+    keyed = list(dict(keyed).items())
+    # New IDs must not collide with the keyed lines of this same batch
+    if keyed:
+        items_db.advance_ids(max(item_id for item_id, _ in keyed))
+    new_ids = await items_db.reserve_ids(len(unkeyed))
+    records = [_build_item(item_id, item) for item_id, item in keyed]
+    records.extend(
+        _build_item(item_id, item) for item_id, item in zip(new_ids, unkeyed, strict=True)
+    )
+    
+    # Re-imported IDs replace existing items and must not inflate items_in_db
+    existing = await items_db.get_many([item_id for item_id, _ in keyed])
+    await items_db.put_many(records)
+    
+    if custom_metrics and records:
+        custom_metrics["items_created"].add(len(records), {"operation": "import"})
+        custom_metrics["items_in_db"].add(len(records) - len(existing))
+    
+    return len(records), errors
+
+
+async def _scan_filtered(
+    filters: dict,
+    skip: int,
+    limit: int,
+    after_id: int | None,
+) -> list[dict]:
+    """
+    Return one ID-ordered page of items matching ``filters``.
+    
+    Uses the secondary indexes when enabled (no full collect-and-sort of
+    the matches per page); otherwise falls back to a linear scan of a store
+    snapshot.
+    """
+    if item_filters is not None:
+        page_ids = item_filters.query_page(**filters, after_id=after_id, skip=skip, limit=limit)
+        found = await items_db.get_many(page_ids)
+        return [found[item_id] for item_id in page_ids if item_id in found]
+    
+    items: list[dict] = []
+    async for chunk in items_db.iter_snapshot(chunk_size=settings.export_chunk_size):
+        for item in chunk:
+            if after_id is not None and item["id"] <= after_id:
+                continue
+            if not ItemFilterIndex.matches(item, **filters):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            items.append(item)
+            if len(items) >= limit:
+                return items
+    return items
+
+
+def _require_search_index() -> ItemSearchIndex:
+    """Return the search index, or fail if it is disabled."""
+    if item_search is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search index is disabled (SEARCH_INDEX=false)"
+        )
+    return item_search
+
+
+SortOrder = Literal["name", "-name", "price", "-price", "total_value", "-total_value"]
+
+
+def _decode_list_cursor(cursor: str, sort: SortOrder | None) -> dict:
+    """
+    Decode a GET /items cursor, checking it was issued for the same ordering.
+    
+    Returns:
+        dict: ``{"id": int}`` for ID order, plus ``"key"`` when sorted
+    """
+    try:
+        position = decode_cursor(cursor)
+        item_id = int(position["id"])
+    except (InvalidCursorError, KeyError, TypeError, ValueError):
+        position, item_id = {}, None
+    
+    valid = item_id is not None and position.get("sort") == sort
+    if valid and sort is not None:
+        key = position.get("key")
+        if sort.lstrip("-") == "name":
+            valid = isinstance(key, str)
+        else:
+            valid = isinstance(key, (int, float)) and not isinstance(key, bool)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return {**position, "id": item_id}
+
+
+def _list_cursor(item: dict, sort: SortOrder | None) -> str:
+    """Encode the cursor pointing just past ``item`` for the given ordering."""
+    if sort is None:
+        return encode_cursor({"id": item["id"]})
+    key = ItemFilterIndex.sort_key(item, sort.lstrip("-"))
+    return encode_cursor({"sort": sort, "key": key, "id": item["id"]})
+
+
+async def _scan_sorted(
+    sort: SortOrder,
+    filters: dict,
+    skip: int,
+    limit: int,
+    after: tuple | None,
+) -> list[dict]:
+    """
+    Return one page of items in ``sort`` order, optionally filtered.
+    
+    Uses the sorted secondary indexes when enabled, so pages seek instead of
+    sorting the matches; otherwise falls back to sorting a store snapshot.
+    """
+    field, descending = sort.lstrip("-"), sort.startswith("-")
+    filtered = any(value is not None for value in filters.values())
+    
+    if item_filters is not None:
+        page_ids = item_filters.sorted_page(field, descending, after, skip, limit, **filters)
+        found = await items_db.get_many(page_ids)
+        return [found[item_id] for item_id in page_ids if item_id in found]
+    
+    keyed: list[tuple[tuple[str | float, int], dict]] = []
+    async for chunk in items_db.iter_snapshot(chunk_size=settings.export_chunk_size):
+        keyed.extend(
+            ((ItemFilterIndex.sort_key(item, field), item["id"]), item)
+            for item in chunk
+            if not filtered or ItemFilterIndex.matches(item, **filters)
+        )
+    keyed.sort(key=lambda pair: pair[0], reverse=descending)
+    if after is not None:
+        keyed = [
+            pair for pair in keyed
+            if (pair[0] < after if descending else pair[0] > after)
+        ]
+    return [item for _, item in keyed[skip : skip + limit]]
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)."""
+    if if_none_match is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _not_modified(etag: str) -> Response:
+    """Empty 304 response confirming the client's cached copy is current."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Flatten a Pydantic ValidationError into a single readable line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
 @app.post(
     "/items",
     response_model=ItemResponse,
@@ -264,7 +778,7 @@ async def root() -> WelcomeResponse:
         422: {"description": "Validation error", "model": ErrorResponse},
     },
 )
-async def create_item(item: ItemCreate) -> ItemResponse:
+async def create_item(item: ItemCreate) -> Response:
     """
     Create a new item.
     
@@ -274,17 +788,10 @@ async def create_item(item: ItemCreate) -> ItemResponse:
     - Auto-generated ID
     - Custom OpenTelemetry metrics
     """
-    global item_id_counter
-    item_id_counter += 1
+    item_id = await items_db.next_id()
     
-    item_data = {
-        "id": item_id_counter,
-        "name": item.name,
-        "description": item.description,
-        "price": item.price,
-        "quantity": item.quantity,
-    }
-    items_db[item_id_counter] = item_data
+    item_data = _build_item(item_id, item)
+    await items_db.put(item_data)
     
     # Custom metrics: Record item creation
     if custom_metrics:
@@ -295,39 +802,496 @@ async def create_item(item: ItemCreate) -> ItemResponse:
     # Custom span attributes
     current_span = trace.get_current_span()
     if current_span:
-        current_span.set_attribute("item.id", item_id_counter)
+        current_span.set_attribute("item.id", item_id)
         current_span.set_attribute("item.name", item.name)
         current_span.set_attribute("item.price", float(item.price))
     
-    return ItemResponse(
-        **item_data,
-        total_value=item.price * item.quantity
+    return json_response(item_json.encode(item_data), status_code=status.HTTP_201_CREATED)
+
+
+@app.post(
+    "/items/batch",
+    response_model=BatchCreateResponse,
+    tags=["Items"],
+    summary="Create items in bulk",
+    description=(
+        "Creates many items in one request. Accepts a JSON array of items or "
+        "NDJSON (Content-Type: application/x-ndjson, one item per line). "
+        "Invalid entries are reported per entry and do not fail the batch."
+    ),
+    responses={
+        200: {"description": "Batch processed; inspect per-entry results"},
+        400: {"description": "Malformed request body", "model": ErrorResponse},
+        413: {"description": "Batch exceeds the configured maximum size", "model": ErrorResponse},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/ItemCreate"}},
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        },
+    },
+)
+async def create_items_batch(request: Request) -> BatchCreateResponse:
+    """
+    Create many items at once.
+    
+    Demonstrates:
+    - Bulk ingestion: IDs allocated in one step, one store write per batch
+    - Partial failures reported per entry
+    - One span and one set of metric updates per batch
+    """
+    body = await request.body()
+    
+    entries: list = []
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError as e:
+                entries.append(e)
+    else:
+        try:
+            entries = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array of items"
+            ) from e
+        if not isinstance(entries, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Request body must be a JSON array of items"
+            )
+    
+    _check_batch_size(len(entries))
+    
+    # Validate every entry, keeping failures in place
+    results: list[BatchItemResult | None] = [None] * len(entries)
+    valid: list[tuple[int, ItemCreate]] = []
+    for index, entry in enumerate(entries):
+        if isinstance(entry, ValueError):
+            results[index] = BatchItemResult(index=index, status="error", error=f"Invalid JSON: {entry}")
+            continue
+        try:
+            valid.append((index, ItemCreate.model_validate(entry)))
+        except ValidationError as e:
+            results[index] = BatchItemResult(
+                index=index, status="error", error=_format_validation_error(e)
+            )
+    
+    # Allocate IDs and insert in one step each
+    item_ids = await items_db.reserve_ids(len(valid))
+    records = [
+        _build_item(item_id, item) for item_id, (_, item) in zip(item_ids, valid, strict=True)
+    ]
+    await items_db.put_many(records)
+    
+    for (index, _), record in zip(valid, records, strict=True):
+        results[index] = BatchItemResult(index=index, status="created", item=_item_response(record))
+    
+    # Custom metrics: one update per batch
+    if custom_metrics and records:
+        custom_metrics["items_created"].add(len(records), {"operation": "batch"})
+        custom_metrics["items_in_db"].add(len(records))
+        for record in records:
+            custom_metrics["item_name_length"].record(len(record["name"]))
+    
+    # Custom span attributes
+    current_span = trace.get_current_span()
+    if current_span:
+        current_span.set_attribute("batch.size", len(entries))
+        current_span.set_attribute("batch.created", len(records))
+        current_span.set_attribute("batch.failed", len(entries) - len(records))
+    
+    return BatchCreateResponse(
+        created=len(records),
+        failed=len(entries) - len(records),
+        results=results,
     )
 
 
+@app.post(
+    "/items/import",
+    response_model=ImportSummary,
+    tags=["Items"],
+    summary="Import items from NDJSON",
+    description=(
+        "Streams an NDJSON upload (one item per line) into the store in batches "
+        "without buffering the whole body. Accepts the output of GET /items/export "
+        "directly: lines with an id keep it, lines without one get a new ID."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        },
+    },
+)
+async def import_items(request: Request) -> ImportSummary:
+    """
+    Bulk import from a streamed NDJSON body.
+    
+    Demonstrates:
+    - Incremental request body consumption (bounded memory)
+    - Batched validation and store writes
+    - Summary reporting with capped per-line errors
+    """
+    lines = 0
+    imported = 0
+    failed = 0
+    errors: list[ImportLineError] = []
+    batch: list[tuple[int, object]] = []
+    
+    async def flush() -> None:
+        nonlocal imported, failed
+        stored, batch_errors = await _import_batch(batch)
+        imported += stored
+        failed += len(batch_errors)
+        errors.extend(batch_errors[: IMPORT_MAX_REPORTED_ERRORS - len(errors)])
+        batch.clear()
+    
+    line_no = 0
+    async for line in _iter_lines(request.stream(), settings.import_max_line_bytes):
+        line_no += 1
+        if line is None:
+            lines += 1
+            failed += 1
+            if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                errors.append(ImportLineError(
+                    line=line_no,
+                    error=f"Line exceeds {settings.import_max_line_bytes} bytes",
+                ))
+            continue
+        if not line.strip():
+            continue
+        lines += 1
+        try:
+            batch.append((line_no, json.loads(line)))
+        except ValueError as e:
+            failed += 1
+            if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+                errors.append(ImportLineError(line=line_no, error=f"Invalid JSON: {e}"))
+            continue
+        if len(batch) >= settings.import_batch_size:
+            await flush()
+    if batch:
+        await flush()
+    
+    # Custom span attributes
+    current_span = trace.get_current_span()
+    if current_span:
+        current_span.set_attribute("import.lines", lines)
+        current_span.set_attribute("import.imported", imported)
+        current_span.set_attribute("import.failed", failed)
+    
+    return ImportSummary(lines=lines, imported=imported, failed=failed, errors=errors)
+
+
 @app.get(
     "/items",
     response_model=list[ItemResponse],
     tags=["Items"],
     summary="List all items",
-    description="Returns a paginated list of all items.",
+    description=(
+        "Returns a paginated list of all items. When more items are available, "
+        "the X-Next-Cursor response header carries an opaque cursor for the next page. "
+        "Pass ids=1,2,3 to fetch specific items; IDs that do not exist are listed "
+        "in the X-Missing-Ids response header. name_prefix, min_price, max_price and "
+        "min_quantity filter the listing; sort orders it by name, price or total_value. "
+        "Responses carry an ETag; send it back in If-None-Match to get 304 while the store is unchanged."
+    ),
+    responses={
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid cursor or ids, or after_id with sort", "model": ErrorResponse},
+        413: {"description": "Too many ids", "model": ErrorResponse},
+    },
 )
 async def list_items(
+    request: Request,
     skip: Annotated[int, Query(ge=0, description="Number of items to skip")] = 0,
     limit: Annotated[int, Query(ge=1, le=100, description="Maximum number of items to return")] = 10,
-) -> list[ItemResponse]:
+    cursor: Annotated[str | None, Query(description="Opaque cursor from a previous X-Next-Cursor header")] = None,
+    after_id: Annotated[int | None, Query(ge=0, description="Return items with an ID greater than this (ID order only)")] = None,
+    ids: Annotated[str | None, Query(description="Comma-separated item IDs to fetch (e.g. 1,2,3)")] = None,
+    name_prefix: Annotated[str | None, Query(min_length=1, max_length=100, description="Case-insensitive name prefix")] = None,
+    min_price: Annotated[float | None, Query(ge=0, description="Minimum price (inclusive)")] = None,
+    max_price: Annotated[float | None, Query(ge=0, description="Maximum price (inclusive)")] = None,
+    min_quantity: Annotated[int | None, Query(ge=0, description="Minimum quantity (inclusive)")] = None,
+    sort: Annotated[
+        SortOrder | None,
+        Query(description="Sort by name, price or total_value; prefix with - for descending (default: ID order)"),
+    ] = None,
+    if_none_match: Annotated[str | None, Header(description="ETag from a previous response")] = None,
+) -> Response:
     """
     List all items with pagination.
     
     Demonstrates:
     - Query parameter validation
-    - Pagination pattern
+    - Keyset (cursor) pagination: O(limit) per page regardless of store size
+    - Offset pagination via skip, kept for compatibility
+    - Bulk fetch by ID list
+    - Filtering and sorting served from sorted secondary indexes
+    - Pre-encoded JSON response (no response_model revalidation)
+    - Conditional GET: 304 while the store version is unchanged
     """
-    items = list(items_db.values())[skip : skip + limit]
-    return [
-        ItemResponse(**item, total_value=item["price"] * item["quantity"])
-        for item in items
-    ]
+    # Any write bumps the store version, so the ETag is known before any work
+    etag = item_versions.store_etag(urlencode(sorted(request.query_params.multi_items())))
+    if _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    
+    headers = {"ETag": etag}
+    if ids is not None:
+        items, missing = await _fetch_items(_parse_ids(ids))
+        if missing:
+            headers["X-Missing-Ids"] = ",".join(str(item_id) for item_id in missing)
+        return json_response(item_json.encode_list(items), headers=headers)
+    
+    if sort is not None and after_id is not None:
+        # Sorted pages are not in ID order: an ID alone cannot resume them
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_id cannot be combined with sort; use the X-Next-Cursor cursor instead"
+        )
+    
+    after: tuple | None = None
+    if cursor is not None:
+        position = _decode_list_cursor(cursor, sort)
+        after_id = position["id"]
+        if sort is not None:
+            after = (position["key"], position["id"])
+    
+    filters = {
+        "name_prefix": name_prefix,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_quantity": min_quantity,
+    }
+    
+    # Fetch one extra item to know whether another page exists
+    if sort is not None:
+        items = await _scan_sorted(sort, filters, skip=skip, limit=limit + 1, after=after)
+    elif any(value is not None for value in filters.values()):
+        items = await _scan_filtered(filters, skip=skip, limit=limit + 1, after_id=after_id)
+    else:
+        items = await items_db.scan(skip=skip, limit=limit + 1, after_id=after_id)
+    if len(items) > limit:
+        items = items[:limit]
+        headers["X-Next-Cursor"] = _list_cursor(items[-1], sort)
+    
+    return json_response(item_json.encode_list(items), headers=headers)
+
+
+@app.get(
+    "/items/export",
+    tags=["Items"],
+    summary="Export all items",
+    description=(
+        "Streams every item as NDJSON (default, one ItemResponse per line) or CSV. "
+        "The export reflects a consistent snapshot taken when streaming starts."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Item export stream",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+    },
+)
+async def export_items(
+    export_format: Annotated[
+        Literal["ndjson", "csv"], Query(alias="format", description="Export format")
+    ] = "ndjson",
+) -> StreamingResponse:
+    """
+    Stream the whole item store.
+    
+    Demonstrates:
+    - StreamingResponse with an async generator
+    - Constant memory: items are serialized one chunk at a time
+    - Snapshot isolation from concurrent writes
+    """
+    chunks = items_db.iter_snapshot(chunk_size=settings.export_chunk_size)
+    if export_format == "csv":
+        body, media_type = _export_csv(chunks), "text/csv"
+    else:
+        body, media_type = _export_ndjson(chunks), "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="items.{export_format}"'},
+    )
+
+
+@app.get(
+    "/items/stats",
+    response_model=ItemStatsResponse,
+    tags=["Items"],
+    summary="Aggregate item statistics",
+    description=(
+        "Returns item count, total inventory value, price range and a quantity histogram. "
+        "Served from incrementally maintained aggregates; pass recompute=true to compute "
+        "them from a full scan instead (for verification)."
+    ),
+)
+async def get_item_stats(
+    recompute: Annotated[bool, Query(description="Recompute from a full store scan")] = False,
+) -> ItemStatsResponse:
+    """
+    Aggregate statistics over all items.
+    
+    Demonstrates:
+    - O(1) reads from aggregates maintained on write
+    - Optional full recompute to verify the running totals
+    """
+    if recompute:
+        stats = await ItemStatsIndex.recompute(
+            items_db.iter_snapshot(chunk_size=settings.export_chunk_size)
+        )
+        return ItemStatsResponse(**stats, source="recomputed")
+    return ItemStatsResponse(**item_stats.summary(), source="incremental")
+
+
+@app.get(
+    "/items/search",
+    response_model=SearchResponse,
+    tags=["Items"],
+    summary="Full-text search",
+    description=(
+        "Searches item names and descriptions. Every query word must match; results "
+        "are ranked by relevance (name matches weigh more) and paginated."
+    ),
+    responses={
+        400: {"description": "Too many search terms", "model": ErrorResponse},
+        503: {"description": "Search index disabled", "model": ErrorResponse},
+    },
+)
+async def search_items(
+    q: Annotated[str, Query(min_length=1, max_length=200, description="Search query")],
+    skip: Annotated[int, Query(ge=0, le=10000, description="Number of results to skip")] = 0,
+    limit: Annotated[int, Query(ge=1, le=100, description="Maximum number of results to return")] = 10,
+) -> Response:
+    """
+    Full-text search over items.
+    
+    Demonstrates:
+    - In-process inverted index maintained on every write
+    - Top-k ranking with a bounded heap
+    """
+    index = _require_search_index()
+    try:
+        total, hits = index.search(q, limit=limit, skip=skip)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        ) from e
+    found = await items_db.get_many([item_id for item_id, _ in hits])
+    
+    # Custom span attributes
+    current_span = trace.get_current_span()
+    if current_span:
+        current_span.set_attribute("search.total", total)
+    
+    results = b",".join([
+        b'{"item":' + item_json.encode(found[item_id]) + b',"score":' + orjson.dumps(score) + b"}"
+        for item_id, score in hits
+        if item_id in found
+    ])
+    return json_response(
+        b'{"query":' + orjson.dumps(q) + b',"total":' + orjson.dumps(total)
+        + b',"results":[' + results + b"]}"
+    )
+
+
+@app.get(
+    "/items/search/stats",
+    response_model=SearchIndexStats,
+    tags=["Items"],
+    summary="Search index size",
+    description="Reports the size and approximate memory usage of the full-text search index.",
+    responses={
+        503: {"description": "Search index disabled", "model": ErrorResponse},
+    },
+)
+async def get_search_index_stats() -> SearchIndexStats:
+    """
+    Search index size and memory usage.
+    """
+    return SearchIndexStats(**_require_search_index().memory_usage())
+
+
+@app.post(
+    "/items/lookup",
+    response_model=BulkItemsResponse,
+    tags=["Items"],
+    summary="Fetch items by ID list",
+    description="Returns the items for a list of IDs in one call. Unknown IDs are reported, not treated as errors.",
+    responses={
+        413: {"description": "Too many ids", "model": ErrorResponse},
+    },
+)
+async def lookup_items(request: ItemIdsRequest) -> Response:
+    """
+    Fetch many items by ID (POST variant of GET /items?ids=... for large sets).
+    
+    Demonstrates:
+    - Bulk reads resolved in one store pass
+    - Partial results with missing IDs reported
+    """
+    items, missing = await _fetch_items(_unique_ids(request.ids))
+    return json_response(
+        b'{"items":' + item_json.encode_list(items) + b',"missing":' + orjson.dumps(missing) + b"}"
+    )
+
+
+@app.delete(
+    "/items",
+    response_model=BulkDeleteResponse,
+    tags=["Items"],
+    summary="Delete items by ID list",
+    description="Deletes every item in the ID list in one call. Unknown IDs are reported, not treated as errors.",
+    responses={
+        413: {"description": "Too many ids", "model": ErrorResponse},
+    },
+)
+async def delete_items(request: ItemIdsRequest) -> BulkDeleteResponse:
+    """
+    Delete many items by ID.
+    
+    Demonstrates:
+    - Bulk deletes resolved in one store pass
+    - Aggregated custom metric updates
+    """
+    item_ids = _unique_ids(request.ids)
+    _check_batch_size(len(item_ids))
+    
+    deleted = await items_db.delete_many(item_ids)
+    deleted_ids = {item["id"] for item in deleted}
+    
+    # Custom metrics: one update per call
+    if custom_metrics and deleted:
+        custom_metrics["items_deleted"].add(len(deleted), {"operation": "batch"})
+        custom_metrics["items_in_db"].add(-len(deleted))
+    
+    # Custom span attributes
+    current_span = trace.get_current_span()
+    if current_span:
+        current_span.set_attribute("bulk.requested", len(item_ids))
+        current_span.set_attribute("bulk.deleted", len(deleted))
+    
+    return BulkDeleteResponse(
+        deleted=[item_id for item_id in item_ids if item_id in deleted_ids],
+        missing=[item_id for item_id in item_ids if item_id not in deleted_ids],
+    )
 
 
 @app.get(
@@ -335,33 +1299,42 @@ async def list_items(
     response_model=ItemResponse,
     tags=["Items"],
     summary="Get item by ID",
-    description="Returns a specific item by its ID.",
+    description=(
+        "Returns a specific item by its ID. Responses carry an ETag; send it back "
+        "in If-None-Match to get 304 while the item is unchanged."
+    ),
     responses={
         200: {"description": "Item found"},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         404: {"description": "Item not found", "model": ErrorResponse},
     },
 )
 async def get_item(
-    item_id: Annotated[int, Path(ge=1, description="The ID of the item to retrieve")]
-) -> ItemResponse:
+    item_id: Annotated[int, Path(ge=1, description="The ID of the item to retrieve")],
+    if_none_match: Annotated[str | None, Header(description="ETag from a previous response")] = None,
+) -> Response:
     """
     Get a specific item by ID.
     
     Demonstrates:
     - Path parameter validation
     - 404 error handling
+    - Conditional GET: 304 from the item's version, without reading or encoding it
     """
-    if item_id not in items_db:
+    # Taken before the read: a concurrent write can only make the ETag older
+    # than the body (forcing a refetch later), never newer
+    etag = item_versions.item_etag(item_id)
+    if etag is not None and _etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    
+    item = await items_db.get(item_id)
+    if item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item with ID {item_id} not found"
         )
     
-    item = items_db[item_id]
-    return ItemResponse(
-        **item,
-        total_value=item["price"] * item["quantity"]
-    )
+    return json_response(item_json.encode(item), headers={"ETag": etag} if etag else None)
 
 
 @app.delete(
@@ -386,16 +1359,15 @@ async def delete_item(
     - 204 No Content response
     - Custom OpenTelemetry metrics
     """
-    if item_id not in items_db:
+    item = await items_db.delete(item_id)
+    if item is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Item with ID {item_id} not found"
         )
     
-    # Get item name before deletion for metrics
-    item_name = items_db[item_id].get("name", "unknown")
-    
-    del items_db[item_id]
+    # Keep the item name for metrics
+    item_name = item.get("name", "unknown")
     
     # Custom metrics: Record item deletion
     if custom_metrics:
@@ -409,6 +1381,389 @@ async def delete_item(
         current_span.set_attribute("item.deleted", True)
 
 
+# =============================================================================
+# Metrics Endpoint
+# =============================================================================
+
+@app.get(
+    "/metrics",
+    tags=["Metrics"],
+    summary="Prometheus metrics",
+    description=(
+        "Custom item metrics and HTTP server metrics in the Prometheus text format. "
+        "The exposition is cached for PROMETHEUS_CACHE_SECONDS, so values may be "
+        "that much behind."
+    ),
+    response_class=Response,
+    responses={
+        200: {"content": {PROMETHEUS_CONTENT_TYPE: {}}},
+        503: {"description": "Prometheus exposition disabled", "model": ErrorResponse},
+    },
+)
+async def get_metrics() -> Response:
+    """
+    Scrape target for Prometheus.
+    
+    Demonstrates:
+    - Pull-based OpenTelemetry metric reader next to the Azure Monitor exporter
+    - Bounded scrape cost through a cached exposition
+    """
+    if prometheus_reader is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Prometheus metrics are disabled (PROMETHEUS_METRICS=false)"
+        )
+    return Response(prometheus_reader.exposition(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# =============================================================================
+# Debug Endpoints
+# =============================================================================
+
+def require_debug_token(
+    x_debug_token: Annotated[str | None, Header(description="Secret set with DEBUG_TOKEN")] = None,
+) -> None:
+    """Reject debug requests without the DEBUG_TOKEN secret, when one is set."""
+    expected = get_settings().debug_token
+    if expected is None:
+        return
+    if x_debug_token is None or not secrets.compare_digest(x_debug_token.encode("latin-1"), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing or invalid X-Debug-Token"
+        )
+
+
+_DEBUG_RESPONSES: dict[int | str, dict[str, Any]] = {
+    401: {"description": "Missing or invalid X-Debug-Token", "model": ErrorResponse},
+}
+
+
+@app.get(
+    "/debug/perf",
+    dependencies=[Depends(require_debug_token)],
+    response_model=PerfResponse,
+    tags=["Debug"],
+    summary="In-process latency statistics",
+    description=(
+        "Per-route, per-status latency percentiles and request rates over the last "
+        "60 s, 300 s and the process lifetime, recorded in this replica. Percentiles "
+        "are histogram bucket upper bounds (within ~12%)."
+    ),
+    responses={
+        **_DEBUG_RESPONSES,
+        503: {"description": "Latency histograms disabled", "model": ErrorResponse},
+    },
+)
+async def get_perf() -> PerfResponse:
+    """
+    Latency histograms recorded by RouteLatencyMiddleware.
+    
+    Demonstrates:
+    - Immediate latency data without Application Insights
+    - Fixed-bucket histograms with constant-cost recording
+    """
+    if route_latency is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Latency histograms are disabled (PERF_HISTOGRAMS=false)"
+        )
+    return PerfResponse(
+        uptime_s=round(route_latency.clock() - route_latency.started, 3),
+        routes=route_latency.report(),
+    )
+
+
+@app.get(
+    "/debug/loop",
+    dependencies=[Depends(require_debug_token)],
+    response_model=LoopLagResponse,
+    tags=["Debug"],
+    summary="Event loop lag and blocking calls",
+    description=(
+        "Event loop lag percentiles since startup, and the event loop thread's stack "
+        "for the latest periods the loop was blocked longer than LOOP_LAG_THRESHOLD_MS."
+    ),
+    responses={
+        **_DEBUG_RESPONSES,
+        503: {"description": "Loop lag monitor disabled", "model": ErrorResponse},
+    },
+)
+async def get_loop_lag() -> LoopLagResponse:
+    """
+    Lag and stalls recorded by LoopLagMonitor.
+    
+    Demonstrates:
+    - Finding blocking calls in async handlers
+    - Stack capture from a watchdog thread while the loop is blocked
+    """
+    if loop_monitor is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Loop lag monitor is disabled (LOOP_LAG_MONITOR=false)"
+        )
+    return LoopLagResponse(**loop_monitor.report())
+
+
+@app.get(
+    "/debug/profile",
+    dependencies=[Depends(require_debug_token)],
+    tags=["Debug"],
+    summary="Sampling CPU profile",
+    description=(
+        "Samples the stacks of all threads (including the event loop) for the given "
+        "number of seconds and returns them in collapsed format, one `stack count` "
+        "line per distinct stack, for flamegraph.pl, speedscope or inferno. Threads "
+        "waiting on locks, the selector or queues are left out unless `idle=true`."
+    ),
+    response_class=Response,
+    responses={
+        **_DEBUG_RESPONSES,
+        200: {"content": {"text/plain": {}}},
+        409: {"description": "Another profile is running", "model": ErrorResponse},
+        503: {"description": "Profiling disabled", "model": ErrorResponse},
+    },
+)
+async def get_profile(
+    seconds: Annotated[
+        float, Query(gt=0, le=settings.profiling_max_seconds, description="Profile duration in seconds")
+    ] = 10,
+    idle: Annotated[bool, Query(description="Include stacks of waiting threads")] = False,
+) -> Response:
+    """
+    Statistical profile of the whole process.
+    
+    Demonstrates:
+    - Production-safe profiling: sampling from a separate thread, no tracing hooks
+    - Bounded duration and one profile at a time
+    """
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Profiling is disabled (PROFILING_ENABLED=false)"
+        )
+    sampler = profiler.begin(idle=idle)
+    if sampler is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another profile is already running"
+        )
+    try:
+        # The loop keeps serving requests while the sampler thread runs
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.end(sampler)
+    return Response(
+        sampler.collapsed(),
+        media_type="text/plain",
+        headers={"X-Profile-Samples": str(sampler.samples)},
+    )
+
+
+@app.get(
+    "/debug/profile/requests/{profile_id}",
+    dependencies=[Depends(require_debug_token)],
+    tags=["Debug"],
+    summary="Profile of a single request",
+    description=(
+        "Collapsed event loop stacks sampled while the request that returned this "
+        "`X-Profile-Id` was handled (sent with an `X-Profile` header). The latest "
+        "16 request profiles are kept."
+    ),
+    response_class=Response,
+    responses={
+        **_DEBUG_RESPONSES,
+        200: {"content": {"text/plain": {}}},
+        404: {"description": "Unknown or expired profile", "model": ErrorResponse},
+        503: {"description": "Profiling disabled", "model": ErrorResponse},
+    },
+)
+async def get_request_profile(profile_id: str) -> Response:
+    """
+    Per-request profile recorded by RequestProfileMiddleware.
+    """
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Profiling is disabled (PROFILING_ENABLED=false)"
+        )
+    collapsed = profiler.request_profiles.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile {profile_id} not found"
+        )
+    return Response(collapsed, media_type="text/plain")
+
+
+def _memory_profiler() -> MemoryProfiler:
+    """Return the memory profiler, or raise 503 when MEMORY_DEBUG is off."""
+    if memory_profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Memory debugging is disabled (MEMORY_DEBUG=false)"
+        )
+    return memory_profiler
+
+
+_MEMORY_RESPONSES: dict[int | str, dict[str, Any]] = {
+    **_DEBUG_RESPONSES,
+    503: {"description": "Memory debugging disabled", "model": ErrorResponse},
+}
+
+
+@app.get(
+    "/debug/memory",
+    dependencies=[Depends(require_debug_token)],
+    response_model=MemoryStatus,
+    tags=["Debug"],
+    summary="Process memory and tracemalloc state",
+    description="Resident set size, garbage collector statistics, traced memory and kept snapshots.",
+    responses=_MEMORY_RESPONSES,
+)
+async def get_memory() -> MemoryStatus:
+    """
+    Memory overview for finding leaks without a restart.
+    
+    Demonstrates:
+    - Runtime tracemalloc control
+    - Snapshot diffs to find growing allocation sites
+    """
+    return MemoryStatus(**_memory_profiler().status())
+
+
+@app.post(
+    "/debug/memory/tracemalloc",
+    dependencies=[Depends(require_debug_token)],
+    response_model=MemoryStatus,
+    tags=["Debug"],
+    summary="Start tracemalloc",
+    description=(
+        "Start tracing allocations with `frames` frames per traceback (no-op if already "
+        "tracing). Tracing slows allocations down and stores a traceback per live block."
+    ),
+    responses=_MEMORY_RESPONSES,
+)
+async def start_tracemalloc(
+    frames: Annotated[int, Query(ge=1, le=64, description="Frames stored per allocation")] = 1,
+) -> MemoryStatus:
+    """Start tracemalloc."""
+    profiler = _memory_profiler()
+    profiler.start(frames)
+    return MemoryStatus(**profiler.status())
+
+
+@app.delete(
+    "/debug/memory/tracemalloc",
+    dependencies=[Depends(require_debug_token)],
+    response_model=MemoryStatus,
+    tags=["Debug"],
+    summary="Stop tracemalloc",
+    description="Stop tracing allocations and discard all snapshots.",
+    responses=_MEMORY_RESPONSES,
+)
+async def stop_tracemalloc() -> MemoryStatus:
+    """Stop tracemalloc and free its traces."""
+    profiler = _memory_profiler()
+    profiler.stop()
+    return MemoryStatus(**profiler.status())
+
+
+@app.post(
+    "/debug/memory/snapshots",
+    dependencies=[Depends(require_debug_token)],
+    response_model=MemoryStatsResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Debug"],
+    summary="Take a tracemalloc snapshot",
+    description=(
+        "Take a snapshot of traced allocations and return its largest allocation sites. "
+        "The latest 5 snapshots are kept for diffs."
+    ),
+    responses={
+        409: {"description": "tracemalloc is not tracing", "model": ErrorResponse},
+        **_MEMORY_RESPONSES,
+    },
+)
+async def take_memory_snapshot(
+    group_by: Annotated[GroupBy, Query(description="Group sites by line, file or full traceback")] = "lineno",
+    limit: Annotated[int, Query(ge=1, le=1000, description="Maximum number of sites to return")] = 20,
+) -> MemoryStatsResponse:
+    """Snapshot traced memory."""
+    profiler = _memory_profiler()
+    if not profiler.tracing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="tracemalloc is not tracing; POST /debug/memory/tracemalloc first"
+        )
+    # Snapshots walk every traced block: keep the loop free meanwhile
+    snapshot_id = await asyncio.to_thread(profiler.take_snapshot)
+    sites = profiler.top(snapshot_id, group_by, limit)
+    return MemoryStatsResponse(snapshot_id=snapshot_id, group_by=group_by, sites=sites)
+
+
+@app.get(
+    "/debug/memory/snapshots/{snapshot_id}",
+    dependencies=[Depends(require_debug_token)],
+    response_model=MemoryStatsResponse,
+    tags=["Debug"],
+    summary="Top allocation sites of a snapshot",
+    description="Largest allocation sites of a kept snapshot.",
+    responses={
+        404: {"description": "Unknown or discarded snapshot", "model": ErrorResponse},
+        **_MEMORY_RESPONSES,
+    },
+)
+async def get_memory_snapshot(
+    snapshot_id: Annotated[int, Path(ge=1, description="Snapshot ID")],
+    group_by: Annotated[GroupBy, Query(description="Group sites by line, file or full traceback")] = "lineno",
+    limit: Annotated[int, Query(ge=1, le=1000, description="Maximum number of sites to return")] = 20,
+) -> MemoryStatsResponse:
+    """Top allocation sites of one snapshot."""
+    profiler = _memory_profiler()
+    try:
+        sites = profiler.top(snapshot_id, group_by, limit)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Snapshot {snapshot_id} not found"
+        ) from e
+    return MemoryStatsResponse(snapshot_id=snapshot_id, group_by=group_by, sites=sites)
+
+
+@app.get(
+    "/debug/memory/snapshots/{snapshot_id}/diff",
+    dependencies=[Depends(require_debug_token)],
+    response_model=MemoryStatsResponse,
+    tags=["Debug"],
+    summary="Allocation growth between two snapshots",
+    description=(
+        "Allocation sites whose traced memory changed most between the `base` snapshot "
+        "and this one. Sites that keep growing across snapshots are leak candidates."
+    ),
+    responses={
+        404: {"description": "Unknown or discarded snapshot", "model": ErrorResponse},
+        **_MEMORY_RESPONSES,
+    },
+)
+async def diff_memory_snapshots(
+    snapshot_id: Annotated[int, Path(ge=1, description="Snapshot ID")],
+    base: Annotated[int, Query(ge=1, description="Snapshot ID to compare against")],
+    group_by: Annotated[GroupBy, Query(description="Group sites by line, file or full traceback")] = "lineno",
+    limit: Annotated[int, Query(ge=1, le=1000, description="Maximum number of sites to return")] = 20,
+) -> MemoryStatsResponse:
+    """Diff of two snapshots."""
+    profiler = _memory_profiler()
+    try:
+        sites = profiler.diff(snapshot_id, base, group_by, limit)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Snapshot {e.args[0]} not found"
+        ) from e
+    return MemoryStatsResponse(snapshot_id=snapshot_id, base_id=base, group_by=group_by, sites=sites)
+
+
 # =============================================================================
 # Main Entry Point
 # =============================================================================
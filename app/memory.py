@@ -0,0 +1,251 @@
+"""
+Memory diagnostics for ``/debug/memory``.
+
+``MemoryProfiler`` starts and stops ``tracemalloc`` at runtime, so a replica
+creeping toward its memory limit can be inspected without restarting it with
+``PYTHONTRACEMALLOC``. Snapshots are kept by ID (the latest ``keep``) and
+reported as top allocation sites, or as the growth between two snapshots,
+which is what points at a leak. Tracing makes allocations slower and stores
+a traceback per live block, so stop it when done.
+
+``register_memory_metrics`` adds process gauges to a meter: resident set
+size, garbage collections per generation and memory traced by tracemalloc.
+"""
+import gc
+import os
+import threading
+import tracemalloc
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Literal, Optional
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+GroupBy = Literal["lineno", "filename", "traceback"]
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# tracemalloc's own bookkeeping and import machinery are not leaks
+_IGNORED_FILES = frozenset({
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+})
+
+# Allocation site (frames as "file:line", outermost first) -> (bytes, blocks)
+Sites = dict[tuple[str, ...], tuple[int, int]]
+
+
+def rss_bytes() -> Optional[int]:
+    """Return the current resident set size, or None without /proc."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def gc_generations() -> list[dict]:
+    """Per-generation collector statistics."""
+    pending = gc.get_count()
+    return [
+        {
+            "generation": generation,
+            "collections": stats["collections"],
+            "collected": stats["collected"],
+            "uncollectable": stats["uncollectable"],
+            "pending": pending[generation],
+        }
+        for generation, stats in enumerate(gc.get_stats())
+    ]
+
+
+def _group(sites: Sites, group_by: GroupBy) -> Sites:
+    """Regroup per-traceback totals by allocating line or file."""
+    if group_by == "traceback":
+        return sites
+    grouped: Sites = {}
+    for frames, (size, count) in sites.items():
+        # The innermost frame is the allocating one
+        site = frames[-1] if group_by == "lineno" else frames[-1].rsplit(":", 1)[0]
+        total_size, total_count = grouped.get((site,), (0, 0))
+        grouped[(site,)] = (total_size + size, total_count + count)
+    return grouped
+
+
+class MemoryProfiler:
+    """
+    tracemalloc control plus numbered snapshots.
+
+    A snapshot is reduced to totals per traceback when it is taken, so kept
+    snapshots cost memory per allocation site rather than per traced block,
+    and top sites and diffs only regroup those totals. Taking a snapshot is
+    CPU-bound in proportion to the number of traced blocks; callers on the
+    event loop should run it in a thread.
+    """
+
+    def __init__(self, keep: int = 5) -> None:
+        self.keep = keep
+        # id -> (time taken, traced bytes, sites)
+        self.snapshots: OrderedDict[int, tuple[datetime, int, Sites]] = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """Start tracing with ``frames`` frames per traceback, unless already tracing."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """Stop tracing and drop all snapshots (their traces are no longer comparable)."""
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+
+    def take_snapshot(self) -> int:
+        """
+        Take and keep a snapshot.
+
+        Returns:
+            int: Snapshot ID
+
+        Raises:
+            RuntimeError: If tracemalloc is not tracing
+        """
+        snapshot = tracemalloc.take_snapshot()
+        traced = tracemalloc.get_traced_memory()[0]
+        sites: Sites = {}
+        for stat in snapshot.statistics("traceback"):
+            if stat.traceback[-1].filename in _IGNORED_FILES:
+                continue
+            frames = tuple(f"{frame.filename}:{frame.lineno}" for frame in stat.traceback)
+            sites[frames] = (stat.size, stat.count)
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self.snapshots[snapshot_id] = (datetime.now(UTC), traced, sites)
+            while len(self.snapshots) > self.keep:
+                self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def top(self, snapshot_id: int, group_by: GroupBy = "lineno", limit: int = 20) -> list[dict]:
+        """
+        Largest allocation sites of a snapshot.
+
+        Raises:
+            KeyError: If the snapshot is unknown or was discarded
+        """
+        grouped = _group(self.snapshots[snapshot_id][2], group_by)
+        largest = sorted(grouped.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return [
+            {"traceback": list(frames), "size_bytes": size, "count": count}
+            for frames, (size, count) in largest
+        ]
+
+    def diff(
+        self,
+        snapshot_id: int,
+        base_id: int,
+        group_by: GroupBy = "lineno",
+        limit: int = 20,
+    ) -> list[dict]:
+        """
+        Allocation sites that changed most between ``base_id`` and ``snapshot_id``.
+
+        Raises:
+            KeyError: If either snapshot is unknown or was discarded
+        """
+        current = _group(self.snapshots[snapshot_id][2], group_by)
+        base = _group(self.snapshots[base_id][2], group_by)
+        changes: list[dict] = []
+        for frames in current.keys() | base.keys():
+            size, count = current.get(frames, (0, 0))
+            base_size, base_count = base.get(frames, (0, 0))
+            if size != base_size or count != base_count:
+                changes.append({
+                    "traceback": list(frames),
+                    "size_bytes": size,
+                    "count": count,
+                    "size_diff_bytes": size - base_size,
+                    "count_diff": count - base_count,
+                })
+        # Largest change first, growth or shrinkage, like Snapshot.compare_to
+        changes.sort(key=lambda change: (abs(change["size_diff_bytes"]), change["size_bytes"]), reverse=True)
+        return changes[:limit]
+
+    def status(self) -> dict:
+        """Tracing state, process memory and the kept snapshots."""
+        traced, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            snapshots = [
+                {"id": snapshot_id, "time": taken, "traced_bytes": size}
+                for snapshot_id, (taken, size, _) in self.snapshots.items()
+            ]
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traceback_frames": tracemalloc.get_traceback_limit(),
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "rss_bytes": rss_bytes(),
+            "gc": gc_generations(),
+            "snapshots": snapshots,
+        }
+
+
+def _observe_rss(options: CallbackOptions) -> Iterable[Observation]:
+    rss = rss_bytes()
+    return [Observation(rss)] if rss is not None else []
+
+
+def _observe_gc_collections(options: CallbackOptions) -> Iterable[Observation]:
+    return [
+        Observation(stats["collections"], {"generation": generation})
+        for generation, stats in enumerate(gc.get_stats())
+    ]
+
+
+def _observe_gc_collected(options: CallbackOptions) -> Iterable[Observation]:
+    return [
+        Observation(stats["collected"], {"generation": generation})
+        for generation, stats in enumerate(gc.get_stats())
+    ]
+
+
+def _observe_traced(options: CallbackOptions) -> Iterable[Observation]:
+    # Only reported while tracemalloc is on
+    return [Observation(tracemalloc.get_traced_memory()[0])] if tracemalloc.is_tracing() else []
+
+
+def register_memory_metrics(meter: metrics.Meter) -> None:
+    """Add process memory and GC gauges to ``meter`` (observed at export time)."""
+    meter.create_observable_gauge(
+        name="app.process.memory.rss",
+        callbacks=[_observe_rss],
+        description="Resident set size of the process",
+        unit="By",
+    )
+    meter.create_observable_gauge(
+        name="app.process.memory.traced",
+        callbacks=[_observe_traced],
+        description="Memory traced by tracemalloc (only while tracing)",
+        unit="By",
+    )
+    meter.create_observable_counter(
+        name="app.process.gc.collections",
+        callbacks=[_observe_gc_collections],
+        description="Garbage collections, by generation",
+        unit="1",
+    )
+    meter.create_observable_counter(
+        name="app.process.gc.collected",
+        callbacks=[_observe_gc_collected],
+        description="Objects collected by the garbage collector, by generation",
+        unit="1",
+    )
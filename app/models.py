@@ -46,6 +46,183 @@ class ItemResponse(BaseModel):
     total_value: float = Field(description="Total value (price * quantity)")
 
 
+class BatchItemResult(BaseModel):
+    """Outcome for a single entry of a batch request."""
+    index: int = Field(description="Zero-based position of the entry in the request")
+    status: str = Field(description="Entry outcome (created/error)")
+    item: ItemResponse | None = Field(default=None, description="Created item, if successful")
+    error: str | None = Field(default=None, description="Validation error, if the entry failed")
+
+
+class BatchCreateResponse(BaseModel):
+    """Model for bulk item creation response."""
+    created: int = Field(description="Number of items created")
+    failed: int = Field(description="Number of entries rejected")
+    results: list[BatchItemResult] = Field(description="Per-entry results, in request order")
+
+
+class ImportLineError(BaseModel):
+    """A rejected line from an NDJSON import."""
+    line: int = Field(description="One-based line number in the upload")
+    error: str = Field(description="Why the line was rejected")
+
+
+class ImportSummary(BaseModel):
+    """Model for NDJSON import summary."""
+    lines: int = Field(description="Number of non-empty lines read")
+    imported: int = Field(description="Number of items stored")
+    failed: int = Field(description="Number of lines rejected")
+    errors: list[ImportLineError] = Field(description="First rejected lines (capped)")
+
+
+class ItemIdsRequest(BaseModel):
+    """Model for bulk operations addressed by item ID."""
+    ids: list[int] = Field(min_length=1, description="Item IDs to operate on")
+
+
+class BulkItemsResponse(BaseModel):
+    """Model for bulk fetch response."""
+    items: list[ItemResponse] = Field(description="Items found, in request order")
+    missing: list[int] = Field(description="Requested IDs that do not exist")
+
+
+class BulkDeleteResponse(BaseModel):
+    """Model for bulk delete response."""
+    deleted: list[int] = Field(description="IDs that were deleted")
+    missing: list[int] = Field(description="Requested IDs that do not exist")
+
+
+class HistogramBucket(BaseModel):
+    """A single histogram bucket."""
+    le: int | None = Field(description="Inclusive upper bound (null for the overflow bucket)")
+    count: int = Field(description="Number of items in the bucket")
+
+
+class ItemStatsResponse(BaseModel):
+    """Model for aggregate item statistics."""
+    count: int = Field(description="Number of items")
+    total_value: float = Field(description="Total inventory value (sum of price * quantity)")
+    total_quantity: int = Field(description="Sum of all item quantities")
+    min_price: float | None = Field(description="Lowest item price")
+    max_price: float | None = Field(description="Highest item price")
+    avg_price: float | None = Field(description="Mean item price")
+    quantity_histogram: list[HistogramBucket] = Field(description="Distribution of item quantities")
+    source: str = Field(description="How the stats were produced (incremental/recomputed)")
+
+
+class SearchHit(BaseModel):
+    """A single full-text search result."""
+    item: ItemResponse = Field(description="Matching item")
+    score: float = Field(description="Relevance score (higher is better)")
+
+
+class SearchResponse(BaseModel):
+    """Model for full-text search results."""
+    query: str = Field(description="The search query")
+    total: int = Field(description="Total number of matching items")
+    results: list[SearchHit] = Field(description="Requested page of results, best first")
+
+
+class SearchIndexStats(BaseModel):
+    """Model for search index size information."""
+    documents: int = Field(description="Number of indexed items")
+    terms: int = Field(description="Number of distinct terms")
+    postings: int = Field(description="Number of (term, item) entries")
+    approx_bytes: int = Field(description="Approximate memory used by the index")
+
+
+class LatencyWindow(BaseModel):
+    """Latency summary for one route over one time window."""
+    count: int = Field(description="Requests in the window")
+    rate_per_s: float = Field(description="Requests per second over the window")
+    p50_ms: float = Field(description="Median latency (bucket upper bound)")
+    p90_ms: float = Field(description="90th percentile latency (bucket upper bound)")
+    p99_ms: float = Field(description="99th percentile latency (bucket upper bound)")
+    max_ms: float = Field(description="Slowest request")
+
+
+class RouteLatency(BaseModel):
+    """Latency of one (method, route, status) combination."""
+    method: str = Field(description="HTTP method")
+    route: str = Field(description="Route template, or (unmatched)")
+    status: int = Field(description="Response status code")
+    windows: dict[str, LatencyWindow] = Field(description="Summaries keyed by window (e.g. 60s, 300s, lifetime)")
+
+
+class PerfResponse(BaseModel):
+    """Model for in-process latency statistics."""
+    uptime_s: float = Field(description="Seconds since recording started")
+    routes: list[RouteLatency] = Field(description="Per-route latency, highest lifetime p99 first")
+
+
+class LoopLag(BaseModel):
+    """Event loop lag summary since startup."""
+    count: int = Field(description="Lag measurements")
+    p50_ms: float = Field(description="Median lag (bucket upper bound)")
+    p99_ms: float = Field(description="99th percentile lag (bucket upper bound)")
+    max_ms: float = Field(description="Largest lag")
+
+
+class LoopStall(BaseModel):
+    """One period the event loop was blocked longer than the threshold."""
+    time: datetime = Field(description="When the stall was detected (UTC)")
+    blocked_ms: float = Field(description="How long the loop had been blocked when its stack was captured")
+    lag_ms: float | None = Field(description="Total lag once the loop resumed (null while still blocked)")
+    stack: list[str] = Field(description="Event loop thread stack at detection, outermost frame first")
+
+
+class LoopLagResponse(BaseModel):
+    """Model for event loop lag and detected blocking calls."""
+    interval_ms: float = Field(description="Interval between lag measurements")
+    threshold_ms: float = Field(description="Blocking time that triggers a stack capture")
+    lag: LoopLag
+    stalls: list[LoopStall] = Field(description="Latest stalls, newest first")
+
+
+class GCGeneration(BaseModel):
+    """Garbage collector statistics for one generation."""
+    generation: int = Field(description="Generation (0-2)")
+    collections: int = Field(description="Collections since startup")
+    collected: int = Field(description="Objects collected since startup")
+    uncollectable: int = Field(description="Objects found uncollectable since startup")
+    pending: int = Field(description="Allocations (generation 0) or collections counted toward the next collection")
+
+
+class MemorySnapshotInfo(BaseModel):
+    """A kept tracemalloc snapshot."""
+    id: int = Field(description="Snapshot ID")
+    time: datetime = Field(description="When the snapshot was taken (UTC)")
+    traced_bytes: int = Field(description="Memory traced in the snapshot")
+
+
+class MemoryStatus(BaseModel):
+    """Model for process memory and tracemalloc state."""
+    tracing: bool = Field(description="Whether tracemalloc is tracing allocations")
+    traceback_frames: int = Field(description="Frames stored per traced allocation")
+    traced_bytes: int = Field(description="Memory currently traced by tracemalloc")
+    traced_peak_bytes: int = Field(description="Peak traced memory since tracing started")
+    rss_bytes: int | None = Field(description="Resident set size (null where unavailable)")
+    gc: list[GCGeneration]
+    snapshots: list[MemorySnapshotInfo] = Field(description="Kept snapshots, oldest first")
+
+
+class AllocationSite(BaseModel):
+    """Memory allocated from one site (line, file or traceback)."""
+    traceback: list[str] = Field(description="Allocation site, outermost frame first")
+    size_bytes: int = Field(description="Memory allocated from this site")
+    count: int = Field(description="Live blocks allocated from this site")
+    size_diff_bytes: int | None = Field(default=None, description="Change since the base snapshot")
+    count_diff: int | None = Field(default=None, description="Change in blocks since the base snapshot")
+
+
+class MemoryStatsResponse(BaseModel):
+    """Model for top allocation sites of a snapshot, or of a snapshot diff."""
+    snapshot_id: int = Field(description="Snapshot ID")
+    base_id: int | None = Field(default=None, description="Snapshot compared against (diffs only)")
+    group_by: str = Field(description="Grouping: lineno, filename or traceback")
+    sites: list[AllocationSite] = Field(description="Largest sites (by absolute change for diffs)")
+
+
 class ErrorResponse(BaseModel):
     """Standard error response model."""
     error: str = Field(description="Error type")
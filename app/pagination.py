@@ -0,0 +1,44 @@
+"""
+Opaque cursor helpers for keyset pagination.
+
+A cursor is a URL-safe base64 encoding of a small JSON object describing the
+position of the last item on a page. Clients must treat it as opaque; the
+server decodes it to seek straight to the next page through an ordered index.
+"""
+import base64
+import json
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client supplies a cursor the server did not issue."""
+
+
+def encode_cursor(position: dict) -> str:
+    """
+    Encode a page position as an opaque cursor string.
+
+    Args:
+        position: JSON-serializable position (e.g. ``{"id": 42}``)
+
+    Returns:
+        str: URL-safe cursor without padding
+    """
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(position, dict):
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    return position
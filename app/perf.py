@@ -0,0 +1,213 @@
+"""
+In-process request latency histograms for ``GET /debug/perf``.
+
+Application Insights shows latency minutes late, and not at all without a
+connection string. ``RouteLatencyMiddleware`` records every request's
+latency under (method, route template, status) into log-linear histograms
+(HDR-style: 8 sub-buckets per power of two, so any reported percentile is
+within ~12% of the true value). Histograms are kept per time slot so
+percentiles and request rates can be reported over sliding windows.
+
+Recording is a few integer operations on plain lists; updates from the
+single event loop thread need no lock.
+"""
+import time
+from collections import deque
+from collections.abc import Callable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Latencies below 16 µs get exact buckets; above, each power of two is split
+# into 8 buckets
+_SUB_BITS = 3
+_SUB_BUCKETS = 1 << _SUB_BITS
+_EXACT = _SUB_BUCKETS * 2
+# Latencies are clamped to ~67 s (2**26 µs)
+_MAX_BITS = 26
+BUCKETS = _SUB_BUCKETS * (_MAX_BITS - _SUB_BITS + 1)
+
+# HTTP methods recorded under their own name (RFC 9110 plus PATCH); any
+# other method token is recorded as "OTHER"
+STANDARD_METHODS = frozenset({
+    "GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE", "PATCH",
+})
+
+
+def bucket_index(micros: int) -> int:
+    """Return the histogram bucket for a latency in microseconds."""
+    if micros < _EXACT:
+        return micros
+    shift = micros.bit_length() - _SUB_BITS - 1
+    return min((shift << _SUB_BITS) + (micros >> shift), BUCKETS - 1)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Return the largest latency (µs) counted in bucket ``index``."""
+    if index < _EXACT:
+        return index
+    shift = (index >> _SUB_BITS) - 1
+    mantissa = (index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with count and max."""
+
+    __slots__ = ("counts", "count", "max_us")
+
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.max_us = 0
+
+    def record(self, micros: int) -> None:
+        self.counts[bucket_index(micros)] += 1
+        self.count += 1
+        if micros > self.max_us:
+            self.max_us = micros
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.count += other.count
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, fraction: float) -> int:
+        """Return the upper bound (µs) of the bucket holding ``fraction`` of requests."""
+        if not self.count:
+            return 0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max_us)
+        return self.max_us
+
+
+# (method, route template, status)
+RouteKey = tuple[str, str, int]
+# One slot's histograms: key -> (histogram for the slot, lifetime histogram)
+SlotHistograms = dict[RouteKey, tuple[LatencyHistogram, LatencyHistogram]]
+
+
+class RouteLatencyRecorder:
+    """
+    Latency histograms per (method, route, status) over sliding windows.
+
+    Requests are recorded into the histogram of the current ``slot_seconds``
+    slot; slots older than the longest window are discarded, so memory is
+    bounded by methods x routes x statuses x slots (``RouteLatencyMiddleware``
+    folds unmatched paths and non-standard methods into one key each). A
+    lifetime histogram per key is kept as well.
+    """
+
+    def __init__(
+        self,
+        windows: tuple[int, ...] = (60, 300),
+        slot_seconds: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.windows = windows
+        self.slot_seconds = slot_seconds
+        self.clock = clock
+        self.started = clock()
+        self._max_slots = -(-max(windows) // slot_seconds)
+        # (slot number, histograms), oldest first
+        self._slots: deque[tuple[int, SlotHistograms]] = deque()
+        self._slot = -1
+        self._current: SlotHistograms = {}
+        self._lifetime: dict[RouteKey, LatencyHistogram] = {}
+
+    def record(self, method: str, route: str, status: int, micros: int) -> None:
+        slot = int(self.clock() // self.slot_seconds)
+        if slot != self._slot:
+            self._rotate(slot)
+        key = (method, route, status)
+        histograms = self._current.get(key)
+        if histograms is None:
+            lifetime = self._lifetime.get(key)
+            if lifetime is None:
+                lifetime = self._lifetime[key] = LatencyHistogram()
+            histograms = self._current[key] = (LatencyHistogram(), lifetime)
+        histograms[0].record(micros)
+        histograms[1].record(micros)
+
+    def _rotate(self, slot: int) -> None:
+        self._slot = slot
+        self._current = {}
+        self._slots.append((slot, self._current))
+        while self._slots[0][0] <= slot - self._max_slots:
+            self._slots.popleft()
+
+    def report(self) -> list[dict]:
+        """
+        Summarize every key over each window and over the process lifetime.
+
+        Returns:
+            list: One entry per (method, route, status), slowest p99 first
+        """
+        now = self.clock()
+        current = int(now // self.slot_seconds)
+        uptime = max(now - self.started, 1e-9)
+        entries: list[dict] = []
+        for key, lifetime in self._lifetime.items():
+            windows: dict[str, dict] = {}
+            for window in self.windows:
+                oldest = current - (-(-window // self.slot_seconds)) + 1
+                merged = LatencyHistogram()
+                for slot, histograms in self._slots:
+                    if slot >= oldest and key in histograms:
+                        merged.merge(histograms[key][0])
+                windows[f"{window}s"] = _summary(merged, min(window, uptime))
+            windows["lifetime"] = _summary(lifetime, uptime)
+            method, route, status = key
+            entries.append({"method": method, "route": route, "status": status, "windows": windows})
+        entries.sort(key=lambda entry: entry["windows"]["lifetime"]["p99_ms"], reverse=True)
+        return entries
+
+
+def _summary(histogram: LatencyHistogram, seconds: float) -> dict:
+    return {
+        "count": histogram.count,
+        "rate_per_s": round(histogram.count / seconds, 3),
+        "p50_ms": histogram.percentile(0.50) / 1000,
+        "p90_ms": histogram.percentile(0.90) / 1000,
+        "p99_ms": histogram.percentile(0.99) / 1000,
+        "max_ms": histogram.max_us / 1000,
+    }
+
+
+class RouteLatencyMiddleware:
+    """ASGI middleware feeding a ``RouteLatencyRecorder``."""
+
+    def __init__(self, app: ASGIApp, recorder: RouteLatencyRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter_ns()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            method = scope["method"]
+            self.recorder.record(
+                # Clients can send any method token; only standard ones get keys
+                method if method in STANDARD_METHODS else "OTHER",
+                # Unmatched paths share one key so 404 scans cannot add keys
+                getattr(route, "path", "(unmatched)"),
+                status,
+                (time.perf_counter_ns() - started) // 1000,
+            )
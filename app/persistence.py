@@ -0,0 +1,410 @@
+"""
+Optional persistence for in-process item stores: snapshot plus write-ahead log.
+
+Every store write is appended to a write-ahead log (WAL) segment. A periodic
+snapshot writes the whole store in a compact columnar file and starts a new
+log segment, after which older segments are deleted. On startup the latest
+snapshot is loaded through ``mmap`` and the log segments written after it are
+replayed, so restarts and revision rollouts keep their items and never reuse
+item IDs.
+
+Files in the persistence directory:
+- ``snapshot.bin``: typed columns (ids, prices, quantities, description
+  flags, string lengths) followed by one UTF-8 blob holding every name and
+  description, NUL-separated so it splits back in a single C call
+- ``wal-<seq>.log``: length-prefixed, CRC-checked records (put/delete/clear)
+"""
+import asyncio
+import gc
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import zlib
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate
+from pathlib import Path
+from typing import BinaryIO, Literal
+
+import orjson
+
+from app.indexes import ItemIndex
+from app.store import ItemStore
+
+SNAPSHOT_FILE = "snapshot.bin"
+SNAPSHOT_MAGIC = b"ITEMSNP1"
+# count, first WAL segment not covered by the snapshot, last allocated ID,
+# text bytes, whether the text is NUL-separated
+_SNAPSHOT_HEADER = struct.Struct("<8sQQQQ?")
+
+# crc32 of (op + payload), op, payload length
+_RECORD_HEADER = struct.Struct("<IBI")
+_ID = struct.Struct("<q")
+OP_PUT = 1
+OP_DELETE = 2
+OP_CLEAR = 3
+# Tells the WAL writer thread to close the segment and exit
+_CLOSE = object()
+# gc.freeze() is process-wide, so only the first startup restore uses it
+_gc_frozen = False
+
+logger = logging.getLogger(__name__)
+
+
+class ItemPersistence(ItemIndex):
+    """
+    Write-ahead log and snapshots for an ``ItemStore``.
+
+    Attach it to the store with ``add_index`` *after* ``restore`` so every
+    later write is logged. Records produced by one store operation are
+    buffered and handed on the next event loop iteration to a writer thread,
+    which writes everything queued meanwhile with a single ``write`` call
+    (group commit) and, with ``fsync``, syncs it to disk. The event loop
+    never waits on the disk, so records written just before a crash may be
+    lost even with ``fsync``.
+    """
+
+    def __init__(self, directory: str | os.PathLike, fsync: bool = False) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.pending = 0
+        self._buffer = bytearray()
+        self._flush_scheduled = False
+        self._wal_seq = 0
+        # Record batches, segment paths to switch to, or _CLOSE for the writer
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        # Serializes snapshot installs, which run in worker threads
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_seq = 0
+
+    # ItemIndex hooks: one WAL record per item written
+
+    def add(self, item: dict) -> None:
+        self._append(OP_PUT, orjson.dumps(item))
+
+    def remove(self, item: dict) -> None:
+        self._append(OP_DELETE, _ID.pack(item["id"]))
+
+    def clear(self) -> None:
+        self._append(OP_CLEAR, b"")
+
+    def _append(self, op: int, payload: bytes) -> None:
+        crc = zlib.crc32(payload, zlib.crc32(bytes((op,))))
+        self._buffer += _RECORD_HEADER.pack(crc, op, len(payload))
+        self._buffer += payload
+        self.pending += 1
+        if self._flush_scheduled:
+            return
+        try:
+            asyncio.get_running_loop().call_soon(self.flush)
+            self._flush_scheduled = True
+        except RuntimeError:
+            # No event loop (e.g. a synchronous clear()): write through
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand buffered records to the writer thread."""
+        self._flush_scheduled = False
+        if not self._buffer or self._writer is None:
+            return
+        self._queue.put(bytes(self._buffer))
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Flush, then wait until the writer thread has written and closed the WAL segment."""
+        self.flush()
+        if self._writer is not None:
+            self._queue.put(_CLOSE)
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self) -> None:
+        wal: BinaryIO | None = None
+        while True:
+            batch = [self._queue.get()]
+            # Group commit: whatever was queued meanwhile goes out together
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            records = bytearray()
+            for entry in batch:
+                if isinstance(entry, bytes):
+                    records += entry
+                    continue
+                # Segment switch or close: earlier records belong to the old segment
+                self._write(wal, records)
+                records.clear()
+                if wal is not None:
+                    wal.close()
+                if entry is _CLOSE:
+                    return
+                wal = open(entry, "ab", buffering=0)
+            self._write(wal, records)
+
+    def _write(self, wal: BinaryIO | None, records: bytearray) -> None:
+        if not records or wal is None:
+            return
+        try:
+            wal.write(records)
+            if self.fsync:
+                os.fsync(wal.fileno())
+        except OSError:
+            logger.exception("Failed to write %d bytes to the WAL", len(records))
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.directory / f"wal-{seq:08d}.log"
+
+    def _segments(self) -> list[int]:
+        return sorted(int(path.stem[4:]) for path in self.directory.glob("wal-*.log"))
+
+    def _open_segment(self, seq: int) -> None:
+        # Buffered records were written before the switch: they go to the old segment
+        self.flush()
+        self._wal_seq = seq
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="wal-writer", daemon=True)
+            self._writer.start()
+        self._queue.put(self._segment_path(seq))
+
+    # Startup
+
+    async def restore(self, store: ItemStore, freeze: bool = False) -> int:
+        """
+        Load the latest snapshot and replay newer WAL segments into ``store``.
+
+        The store is cleared first. Attached indexes are populated by the
+        store writes as usual. A torn record at the end of a segment (crash
+        mid-write) ends the replay of that segment.
+
+        Args:
+            store: Store to load the items into
+            freeze: Move the restored items out of future full GC passes with
+                ``gc.freeze()``; honoured once per process, for startup
+
+        Returns:
+            int: Number of items in the store after the restore
+        """
+        global _gc_frozen
+        store.clear()
+        self._buffer.clear()
+        first_seq, last_id = 0, 0
+
+        path = self.directory / SNAPSHOT_FILE
+        if path.exists():
+            # Millions of new dicts would trigger repeated full GC passes
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                items, first_seq, last_id = read_snapshot(path)
+                await store.put_many(items)
+                del items
+            finally:
+                if gc_enabled:
+                    gc.enable()
+            # Restored items live for the whole process: keep them out of
+            # future full collections instead of rescanning them each time
+            if freeze and not _gc_frozen:
+                gc.freeze()
+                _gc_frozen = True
+
+        segments = [seq for seq in self._segments() if seq >= first_seq]
+        for seq in segments:
+            last_id = max(last_id, await _replay(self._segment_path(seq), store))
+        store.advance_ids(last_id)
+
+        # Never append after a possibly torn tail: start a fresh segment
+        self._snapshot_seq = first_seq
+        self._open_segment(max([first_seq, *segments], default=0) + 1)
+        self.pending = 0
+        return await store.count()
+
+    # Snapshots
+
+    async def snapshot(self, store: ItemStore, chunk_size: int = 10000) -> int:
+        """
+        Write a snapshot of ``store`` and drop the WAL segments it covers.
+
+        The WAL is switched to a new segment at the same instant the store
+        snapshot is taken (no await in between), so every write lands either
+        in the snapshot or in a segment that is replayed after it.
+
+        Returns:
+            int: Number of items written
+        """
+        self._open_segment(self._wal_seq + 1)
+        covered_seq, last_id = self._wal_seq, store.last_id
+        self.pending = 0
+
+        columns = _SnapshotColumns()
+        async for chunk in store.iter_snapshot(chunk_size=chunk_size):
+            columns.extend(chunk)
+            # Let requests run between chunks of a large store
+            await asyncio.sleep(0)
+
+        await asyncio.to_thread(self._install, columns, covered_seq, last_id)
+        return len(columns.ids)
+
+    def _install(self, columns: "_SnapshotColumns", covered_seq: int, last_id: int) -> None:
+        # Runs in a worker thread that outlives a cancelled snapshot(), so an
+        # older snapshot must never replace a newer one
+        with self._snapshot_lock:
+            if covered_seq <= self._snapshot_seq:
+                return
+            columns.write(self.directory / SNAPSHOT_FILE, covered_seq, last_id)
+            self._snapshot_seq = covered_seq
+            for seq in self._segments():
+                if seq < covered_seq:
+                    self._segment_path(seq).unlink(missing_ok=True)
+
+
+class _SnapshotColumns:
+    """Column buffers accumulated while a snapshot is taken."""
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.prices = array("d")
+        self.quantities = array("q")
+        self.has_description = bytearray()
+        # Name and description per item, "" for a missing description
+        self.text: list[str] = []
+
+    def extend(self, items: list[dict]) -> None:
+        for item in items:
+            description = item["description"]
+            self.ids.append(item["id"])
+            self.prices.append(item["price"])
+            self.quantities.append(item["quantity"])
+            self.has_description.append(description is not None)
+            self.text.append(item["name"])
+            self.text.append(description or "")
+
+    def write(self, path: Path, wal_seq: int, last_id: int) -> None:
+        lengths = array("i", map(len, self.text))
+        text = "\0".join(self.text)
+        # Strings containing NUL themselves fall back to slicing by length
+        separated = text.count("\0") == max(len(self.text) - 1, 0)
+        if not separated:
+            text = "".join(self.text)
+        encoded = text.encode()
+
+        tmp = path.with_suffix(f".{wal_seq}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, len(self.ids), wal_seq, last_id, len(encoded), separated
+            ))
+            for column in (self.ids, self.prices, self.quantities, self.has_description, lengths):
+                f.write(column)
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def read_snapshot(path: Path) -> tuple[list[dict], int, int]:
+    """
+    Read a snapshot file through ``mmap``.
+
+    Returns:
+        tuple: (items in ID order, first WAL segment to replay, last allocated ID)
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, count, wal_seq, last_id, text_bytes, separated = _SNAPSHOT_HEADER.unpack_from(mm)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not an item snapshot: {path}")
+
+        view = memoryview(mm)
+        offset = _SNAPSHOT_HEADER.size
+
+        def column(fmt: Literal["q", "d", "B", "i"], length: int) -> list:
+            nonlocal offset
+            size = struct.calcsize(fmt) * length
+            values = view[offset : offset + size].cast(fmt).tolist()
+            offset += size
+            return values
+
+        try:
+            ids = column("q", count)
+            prices = column("d", count)
+            quantities = column("q", count)
+            has_description = column("B", count)
+            lengths = column("i", 2 * count)
+            text = str(view[offset : offset + text_bytes], "utf-8")
+        finally:
+            view.release()
+
+    if not count:
+        strings = []
+    elif separated:
+        strings = text.split("\0")
+    else:
+        ends = list(accumulate(lengths))
+        strings = list(map(text.__getitem__, map(slice, [0, *ends[:-1]], ends)))
+    descriptions: Sequence[str | None] = strings[1::2]
+    if not all(has_description):
+        descriptions = [
+            value if flag else None
+            for flag, value in zip(has_description, descriptions, strict=True)
+        ]
+    items = [
+        {"id": item_id, "name": name, "description": description, "price": price, "quantity": quantity}
+        for item_id, name, description, price, quantity
+        in zip(ids, strings[0::2], descriptions, prices, quantities, strict=True)
+    ]
+    return items, wal_seq, last_id
+
+
+async def _replay(path: Path, store: ItemStore) -> int:
+    """
+    Apply one WAL segment to ``store``, batching consecutive puts/deletes.
+
+    Returns:
+        int: Highest item ID seen in the segment (0 if none)
+    """
+    data = path.read_bytes()
+    puts: dict[int, dict] = {}
+    deletes: list[int] = []
+    last_id = 0
+
+    async def apply_puts() -> None:
+        if puts:
+            await store.put_many(list(puts.values()))
+            puts.clear()
+
+    async def apply_deletes() -> None:
+        if deletes:
+            await store.delete_many(deletes)
+            deletes.clear()
+
+    offset = 0
+    while offset + _RECORD_HEADER.size <= len(data):
+        crc, op, length = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        payload = data[start : start + length]
+        if len(payload) < length or zlib.crc32(payload, zlib.crc32(bytes((op,)))) != crc:
+            break
+        offset = start + length
+
+        if op == OP_PUT:
+            await apply_deletes()
+            item = orjson.loads(payload)
+            puts.pop(item["id"], None)
+            puts[item["id"]] = item
+            last_id = max(last_id, item["id"])
+        elif op == OP_DELETE:
+            item_id = _ID.unpack(payload)[0]
+            if item_id in puts:
+                await apply_puts()
+            deletes.append(item_id)
+            last_id = max(last_id, item_id)
+        elif op == OP_CLEAR:
+            puts.clear()
+            deletes.clear()
+            store.clear()
+
+    await apply_deletes()
+    await apply_puts()
+    return last_id
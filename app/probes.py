@@ -0,0 +1,91 @@
+"""
+Fast path for health probes and static endpoints.
+
+Container Apps liveness, readiness and startup probes (plus the Dockerfile
+HEALTHCHECK) hit the health endpoints every few seconds per replica. Through
+the regular stack each probe pays for OpenTelemetry span creation, CORS,
+routing, dependency solving and Pydantic validation of a two-field payload.
+
+``install_probe_fast_path`` adds an ASGI middleware outside all the others
+that answers plain GETs for these paths from precomputed bytes; only the
+health timestamp is formatted per request. Requests carrying
+an ``Origin`` header fall through to the regular routes so browsers still get
+CORS headers. The FastAPI routes stay registered and document the endpoints
+in OpenAPI.
+"""
+import re
+from collections.abc import Callable, Iterable
+from datetime import datetime
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# A responder returns (status code, JSON body) for one request
+Responder = Callable[[], tuple[int, bytes]]
+
+
+def static_responder(body: bytes, status_code: int = 200) -> Responder:
+    """Always answer with the same encoded body."""
+    response = (status_code, body)
+    return lambda: response
+
+
+def health_responder(status: str, unavailable: Callable[[], str | None] | None = None) -> Responder:
+    """
+    Answer in the ``HealthResponse`` shape with the current UTC timestamp.
+
+    Args:
+        status: Value of the ``status`` field
+        unavailable: Returns a reason while the probe should fail with 503
+    """
+    prefix = b'{"status":"' + status.encode() + b'","timestamp":"'
+
+    def respond() -> tuple[int, bytes]:
+        if unavailable is not None:
+            reason = unavailable()
+            if reason is not None:
+                return 503, b'{"detail":"' + reason.encode() + b'"}'
+        return 200, prefix + datetime.utcnow().isoformat().encode() + b'"}'
+
+    return respond
+
+
+def probe_excluded_urls(paths: Iterable[str]) -> str:
+    """Build an ``excluded_urls`` value that stops tracing of exactly ``paths``."""
+    return ",".join(f"^[^:]+://[^/]+{re.escape(path)}$" for path in paths)
+
+
+class ProbeFastPath:
+    """ASGI middleware answering GETs for known paths without calling ``app``."""
+
+    def __init__(self, app: ASGIApp, responders: dict[str, Responder]) -> None:
+        self.app = app
+        self.responders = responders
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "GET":
+            responder = self.responders.get(scope["path"])
+            if responder is not None and not any(name == b"origin" for name, _ in scope["headers"]):
+                status_code, body = responder()
+                await send({
+                    "type": "http.response.start",
+                    "status": status_code,
+                    "headers": [
+                        (b"content-length", str(len(body)).encode()),
+                        (b"content-type", b"application/json"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+        await self.app(scope, receive, send)
+
+
+def install_probe_fast_path(app: FastAPI, responders: dict[str, Responder]) -> None:
+    """
+    Serve ``responders`` in front of the app's other middleware.
+
+    Call after the other ``add_middleware`` calls so the fast path is the
+    outermost one. Only the tracing wrapper and Starlette's error handler sit
+    outside it; exclude the paths from tracing with ``probe_excluded_urls``.
+    """
+    app.add_middleware(ProbeFastPath, responders=responders)
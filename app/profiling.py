@@ -0,0 +1,218 @@
+"""
+On-demand statistical profiler for ``GET /debug/profile``.
+
+``StackSampler`` runs in its own thread and, every ``interval`` seconds,
+reads the current frame of every other thread (``sys._current_frames``),
+including the event loop thread. Stacks are kept as collapsed lines
+(``thread;outer (file);...;inner (file) count``), ready for flamegraph.pl,
+speedscope or inferno. Nothing is installed in the interpreter (no
+``sys.setprofile``), so unprofiled code runs at full speed and the cost while
+profiling is one stack walk per thread per interval.
+
+``RequestProfileMiddleware`` profiles a single request sent with an
+``X-Profile`` header: only the event loop thread is sampled, at a higher rate,
+until the response starts. The stacks are kept under the ``X-Profile-Id``
+returned with the response. With a ``token``, the request must also carry it
+in ``X-Debug-Token``, the guard of the ``/debug`` endpoints; other requests are
+served unprofiled. The loop thread also runs other requests meanwhile, so
+profile a replica with little other traffic for a clean result.
+"""
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from types import CodeType, FrameType
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Leaf frames of threads waiting rather than running: lock and condition
+# waits, the event loop's selector and idle thread pool workers
+IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+})
+
+# Longest sys.path entries first, so files are shown relative to the
+# innermost entry (site-packages rather than the interpreter prefix)
+_PATH_PREFIXES = sorted(
+    {os.path.join(os.path.abspath(path), "") for path in sys.path if path},
+    key=len,
+    reverse=True,
+)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+class StackSampler:
+    """
+    Collapsed stacks of running threads, sampled from a background thread.
+
+    ``thread_ids`` restricts sampling to those threads; idle stacks (see
+    ``IDLE_FRAMES``) are skipped unless ``idle`` is set.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        thread_ids: Optional[set[int]] = None,
+        idle: bool = False,
+    ) -> None:
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.idle = idle
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        skip = threading.get_ident()
+        deadline = time.monotonic()
+        while True:
+            # Fixed rate, without bursts to catch up after a slow sample
+            deadline = max(deadline + self.interval, time.monotonic())
+            if self._stop.wait(deadline - time.monotonic()):
+                return
+            self.sample(skip)
+
+    def sample(self, skip: Optional[int] = None) -> None:
+        """Record the current stack of every sampled thread except ``skip``."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip or (self.thread_ids is not None and ident not in self.thread_ids):
+                continue
+            if not self.idle:
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+            self.stacks[self._collapse(names.get(ident, str(ident)), frame)] += 1
+        self.samples += 1
+
+    def _collapse(self, thread_name: str, frame: Optional[FrameType]) -> str:
+        labels = self._labels
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{code.co_qualname} ({_short_path(code.co_filename)})".replace(";", ":")
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(thread_name.replace(";", ":"))
+        stack.reverse()
+        return ";".join(stack)
+
+    def collapsed(self) -> str:
+        """Return the stacks in collapsed format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """
+    Runs one profile at a time and keeps the latest per-request profiles.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        request_interval: float = 0.001,
+        max_seconds: float = 60,
+        keep: int = 16,
+    ) -> None:
+        self.interval = interval
+        self.request_interval = request_interval
+        self.max_seconds = max_seconds
+        self.keep = keep
+        self.active = False
+        self.request_profiles: OrderedDict[str, str] = OrderedDict()
+
+    def begin(self, thread_ids: Optional[set[int]] = None, idle: bool = False) -> Optional[StackSampler]:
+        """Start a sampler, or return None if a profile is already running."""
+        if self.active:
+            return None
+        self.active = True
+        sampler = StackSampler(
+            self.request_interval if thread_ids is not None else self.interval,
+            thread_ids=thread_ids,
+            idle=idle,
+        )
+        sampler.start()
+        return sampler
+
+    def end(self, sampler: StackSampler) -> None:
+        sampler.stop()
+        self.active = False
+
+    def keep_request_profile(self, sampler: StackSampler) -> str:
+        """Store a per-request profile and return its ID."""
+        profile_id = secrets.token_hex(8)
+        self.request_profiles[profile_id] = sampler.collapsed()
+        while len(self.request_profiles) > self.keep:
+            self.request_profiles.popitem(last=False)
+        return profile_id
+
+
+class RequestProfileMiddleware:
+    """ASGI middleware profiling requests sent with an ``X-Profile`` header."""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler, token: Optional[str] = None) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.token = token.encode() if token is not None else None
+
+    def _requested(self, headers: list[tuple[bytes, bytes]]) -> bool:
+        """True for requests with ``X-Profile`` and, if a token is set, a matching ``X-Debug-Token``."""
+        profile = authorized = False
+        for name, value in headers:
+            if name == b"x-profile":
+                profile = True
+            elif name == b"x-debug-token" and self.token is not None:
+                authorized = secrets.compare_digest(value, self.token)
+        return profile and (authorized or self.token is None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._requested(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = self.profiler.begin(thread_ids={threading.get_ident()})
+        if sampler is None:
+            # Another profile is running; serve the request unprofiled
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal sampler
+            if message["type"] == "http.response.start" and sampler is not None:
+                self.profiler.end(sampler)
+                profile_id = self.profiler.keep_request_profile(sampler)
+                sampler = None
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if sampler is not None:
+                self.profiler.end(sampler)
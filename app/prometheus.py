@@ -0,0 +1,174 @@
+"""
+Prometheus text exposition for ``GET /metrics``.
+
+``PrometheusMetricReader`` is a pull-based OpenTelemetry metric reader:
+nothing is collected until a scrape asks for it. The rendered text is kept
+for ``cache_seconds``, so however often the endpoint is scraped, collection
+(including observable callbacks) and rendering run at most once per
+interval and never on the request path of other endpoints.
+
+Names follow the OpenTelemetry-to-Prometheus conventions: dots become
+underscores, known units are appended (``http.server.duration`` in ms is
+``http_server_duration_milliseconds``) and monotonic sums get ``_total``.
+Only the 0.0.4 text format is produced, so prometheus_client is not needed.
+"""
+import math
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from opentelemetry.sdk.metrics.export import (
+    Gauge,
+    Histogram,
+    HistogramDataPoint,
+    MetricReader,
+    MetricsData,
+    Sum,
+)
+from opentelemetry.util.types import Attributes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_UNITS = {
+    "ms": "milliseconds",
+    "s": "seconds",
+    "us": "microseconds",
+    "By": "bytes",
+    "KiBy": "kibibytes",
+    "MiBy": "mebibytes",
+}
+_INVALID_NAME = re.compile(r"[^a-zA-Z0-9_:]")
+_INVALID_LABEL = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def metric_name(name: str, unit: str, monotonic_sum: bool = False) -> str:
+    """Return the Prometheus name for an OpenTelemetry instrument."""
+    name = _INVALID_NAME.sub("_", name)
+    if name[:1].isdigit():
+        name = f"_{name}"
+    suffix = _UNITS.get(unit)
+    if suffix and not name.endswith(f"_{suffix}"):
+        name = f"{name}_{suffix}"
+    if monotonic_sum and not name.endswith("_total"):
+        name = f"{name}_total"
+    return name
+
+
+def _label_value(value: object) -> str:
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    elif isinstance(value, (list, tuple)):
+        value = ",".join(map(str, value))
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(attributes: Attributes, extra: str = "") -> str:
+    pairs = [f'{_INVALID_LABEL.sub("_", key)}="{_label_value(value)}"' for key, value in (attributes or {}).items()]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def render(metrics_data: MetricsData | None) -> bytes:
+    """Render collected metrics in the Prometheus text format."""
+    # name -> (type, help, sample lines); instruments from different scopes
+    # with the same name share one family
+    families: dict[str, tuple[str, str, list[str]]] = {}
+    for resource_metrics in metrics_data.resource_metrics if metrics_data else ():
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                data = metric.data
+                unit = metric.unit or ""
+                if isinstance(data, Sum):
+                    name = metric_name(metric.name, unit, data.is_monotonic)
+                    kind = "counter" if data.is_monotonic else "gauge"
+                elif isinstance(data, Gauge):
+                    name = metric_name(metric.name, unit)
+                    kind = "gauge"
+                elif isinstance(data, Histogram):
+                    name = metric_name(metric.name, unit)
+                    kind = "histogram"
+                else:
+                    # Exponential histograms have no text-format equivalent
+                    continue
+                family = families.setdefault(name, (kind, metric.description or "", []))
+                if family[0] != kind:
+                    continue
+                lines = family[2]
+                for point in data.data_points:
+                    if not isinstance(point, HistogramDataPoint):
+                        lines.append(f"{name}{_labels(point.attributes)} {_number(point.value)}")
+                        continue
+                    cumulative = 0
+                    bounds = [*map(_number, point.explicit_bounds), "+Inf"]
+                    for bound, count in zip(bounds, point.bucket_counts, strict=True):
+                        cumulative += count
+                        le = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{_labels(point.attributes, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(point.attributes)} {_number(point.sum)}")
+                    lines.append(f"{name}_count{_labels(point.attributes)} {point.count}")
+
+    out = []
+    for name, (kind, description, lines) in families.items():
+        if description:
+            help_text = description.replace("\\", "\\\\").replace("\n", "\\n")
+            out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return ("\n".join(out) + "\n").encode() if out else b""
+
+
+class PrometheusMetricReader(MetricReader):
+    """
+    Pull-based metric reader serving the Prometheus text format.
+
+    ``exposition()`` collects and renders on the first call and then returns
+    the cached text until ``cache_seconds`` have passed.
+    """
+
+    def __init__(
+        self,
+        cache_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # Cumulative temporality (the reader default) is what Prometheus expects
+        super().__init__()
+        self.cache_seconds = cache_seconds
+        self.clock = clock
+        self.collections = 0
+        self._lock = threading.Lock()
+        self._rendered = b""
+        self._rendered_at: float | None = None
+
+    def exposition(self) -> bytes:
+        """Return the metrics text, collecting again only when the cache is stale."""
+        with self._lock:
+            now = self.clock()
+            if self._rendered_at is None or now - self._rendered_at >= self.cache_seconds:
+                self.collect()
+                self._rendered_at = now
+            return self._rendered
+
+    def _receive_metrics(
+        self,
+        metrics_data: MetricsData,
+        timeout_millis: float = 10_000,
+        **kwargs: Any,
+    ) -> None:
+        self.collections += 1
+        self._rendered = render(metrics_data)
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs: Any) -> None:
+        pass
@@ -0,0 +1,78 @@
+"""
+Pre-encoded JSON for item responses.
+
+FastAPI validates whatever a handler returns against its ``response_model``
+and then serializes the result, so building ``ItemResponse`` objects pays for
+Pydantic twice per item. Item endpoints instead return JSON bytes built with
+orjson directly; their ``response_model`` still documents the schema in
+OpenAPI. Encodings are cached per item and dropped when the store writes it.
+"""
+import orjson
+from fastapi.responses import Response
+
+from app.indexes import ItemIndex
+
+
+def encode_item(item: dict) -> bytes:
+    """Encode a stored item in the ``ItemResponse`` shape (adds total_value)."""
+    return orjson.dumps({
+        "id": item["id"],
+        "name": item["name"],
+        "description": item["description"],
+        "price": item["price"],
+        "quantity": item["quantity"],
+        "total_value": item["price"] * item["quantity"],
+    })
+
+
+def json_response(body: bytes, status_code: int = 200, headers: dict[str, str] | None = None) -> Response:
+    """Wrap already encoded JSON in a response, skipping response_model handling."""
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+class ItemJSONCache(ItemIndex):
+    """
+    Bounded cache of encoded items, invalidated by store writes.
+
+    Each entry keeps the item it was encoded from and is only served for an
+    equal item, so a handler that read an item just before a write can never
+    publish a stale encoding. When full, the oldest entry is evicted.
+    """
+
+    def __init__(self, max_items: int = 100_000) -> None:
+        self.max_items = max_items
+        self._entries: dict[int, tuple[dict, bytes]] = {}
+
+    def add(self, item: dict) -> None:
+        self._entries.pop(item["id"], None)
+
+    def add_many(self, items: list[dict]) -> None:
+        if self._entries:
+            for item in items:
+                self._entries.pop(item["id"], None)
+
+    def remove(self, item: dict) -> None:
+        self._entries.pop(item["id"], None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def encode(self, item: dict) -> bytes:
+        """Return the encoded item, from the cache when it is still current."""
+        entry = self._entries.get(item["id"])
+        if entry is not None and entry[0] == item:
+            return entry[1]
+
+        encoded = encode_item(item)
+        if self.max_items > 0:
+            if len(self._entries) >= self.max_items:
+                del self._entries[next(iter(self._entries))]
+            self._entries[item["id"]] = (item, encoded)
+        return encoded
+
+    def encode_list(self, items: list[dict]) -> bytes:
+        """Encode items as a JSON array."""
+        return b"[" + b",".join([self.encode(item) for item in items]) + b"]"
@@ -0,0 +1,901 @@
+"""
+Item storage engines.
+
+The CRUD handlers in ``app.main`` talk to an ``ItemStore`` instead of a bare
+module-level dict, so the default in-memory engine can be swapped for faster
+or durable engines without touching the endpoints.
+
+Items are plain dicts with the keys ``id``, ``name``, ``description``,
+``price`` and ``quantity`` (the same shape as ``ItemResponse`` minus the
+derived ``total_value``).
+
+Engines:
+- ``memory``: dicts plus a sorted ID index (default)
+- ``columnar``: typed arrays plus a UTF-8 string arena, for large stores
+- ``sqlite``: a SQLite database file, durable across restarts. One process
+  may use a database file at a time: IDs are allocated in process memory
+  and the in-memory indexes only see this process's writes, so replicas
+  sharing a file would hand out the same IDs and overwrite each other
+"""
+import asyncio
+import operator
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from sortedcontainers import SortedList
+
+from app.indexes import ItemIndex
+
+_T = TypeVar("_T")
+
+
+class ItemStore(ABC):
+    """
+    Abstract item storage engine.
+
+    Data methods are coroutines so engines backed by blocking I/O can run
+    their work off the event loop; in-memory engines simply never await.
+
+    Writes go through ``put_many``/``delete_many``/``clear``, which call the
+    engine primitives (``_put_many``/``_delete_many``/``_clear``) and then
+    keep any attached ``ItemIndex`` in sync.
+    """
+
+    # Whether items survive a restart (indexes must then be rebuilt on startup)
+    persistent = False
+
+    def __init__(self) -> None:
+        self._indexes: list[ItemIndex] = []
+
+    def add_index(self, index: ItemIndex) -> None:
+        """
+        Attach an index that is updated on every write.
+
+        The index is assumed to already reflect the store contents (e.g. both
+        empty); call ``rebuild_indexes`` after attaching to a populated store.
+        """
+        self._indexes.append(index)
+
+    def remove_index(self, index: ItemIndex) -> None:
+        """Detach an index; it no longer sees writes."""
+        self._indexes.remove(index)
+
+    async def rebuild_indexes(self) -> None:
+        """Repopulate every attached index from a snapshot of the store."""
+        for index in self._indexes:
+            index.clear()
+        async for chunk in self.iter_snapshot():
+            for index in self._indexes:
+                index.add_many(chunk)
+
+    async def put(self, item: dict) -> None:
+        """Insert or replace an item keyed by ``item["id"]``."""
+        await self.put_many([item])
+
+    async def put_many(self, items: list[dict]) -> None:
+        """Insert or replace several items in one store operation."""
+        if len({item["id"] for item in items}) != len(items):
+            # Last write wins for duplicate IDs, as with sequential puts
+            items = list({item["id"]: item for item in items}.values())
+        replaced = await self._put_many(items)
+        for index in self._indexes:
+            for item in replaced:
+                index.remove(item)
+            index.add_many(items)
+
+    async def delete(self, item_id: int) -> dict | None:
+        """Remove an item and return it, or None if it did not exist."""
+        deleted = await self.delete_many([item_id])
+        return deleted[0] if deleted else None
+
+    async def delete_many(self, item_ids: list[int]) -> list[dict]:
+        """Remove several items in one pass and return those that existed."""
+        deleted = await self._delete_many(item_ids)
+        for index in self._indexes:
+            for item in deleted:
+                index.remove(item)
+        return deleted
+
+    def clear(self) -> None:
+        """Remove all items (used by tests to isolate cases)."""
+        self._clear()
+        for index in self._indexes:
+            index.clear()
+
+    @abstractmethod
+    async def next_id(self) -> int:
+        """Allocate and return the next unused item ID."""
+
+    @abstractmethod
+    async def reserve_ids(self, count: int) -> range:
+        """Allocate ``count`` consecutive item IDs in one step."""
+
+    @property
+    @abstractmethod
+    def last_id(self) -> int:
+        """Highest item ID allocated so far (0 if none)."""
+
+    @abstractmethod
+    def advance_ids(self, last_id: int) -> None:
+        """Never allocate IDs up to ``last_id`` (used when restoring a store)."""
+
+    @abstractmethod
+    async def get(self, item_id: int) -> dict | None:
+        """Return the item with the given ID, or None if it does not exist."""
+
+    @abstractmethod
+    async def get_many(self, item_ids: list[int]) -> dict[int, dict]:
+        """Return the existing items among ``item_ids``, keyed by ID."""
+
+    @abstractmethod
+    async def _put_many(self, items: list[dict]) -> list[dict]:
+        """Store items with unique IDs; return the previous items they replaced."""
+
+    @abstractmethod
+    async def _delete_many(self, item_ids: list[int]) -> list[dict]:
+        """Remove items by ID; return those that existed."""
+
+    @abstractmethod
+    async def scan(
+        self,
+        skip: int = 0,
+        limit: int | None = None,
+        after_id: int | None = None,
+    ) -> list[dict]:
+        """
+        Return up to ``limit`` items in ascending ID order.
+
+        ``after_id`` seeks past every item with an ID <= after_id (keyset
+        pagination); ``skip`` is then applied from that position.
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Return the number of stored items."""
+
+    @abstractmethod
+    def iter_snapshot(self, chunk_size: int = 1000) -> AsyncIterator[list[dict]]:
+        """
+        Iterate a point-in-time snapshot of every item in ID order, in chunks.
+
+        Writes made while the iterator is being consumed are not visible to it.
+        """
+
+    @abstractmethod
+    def _clear(self) -> None:
+        """Remove all items without touching the ID counter."""
+
+    def close(self) -> None:
+        """Release engine resources (threads, connections); a no-op by default."""
+        return None
+
+
+class InMemoryItemStore(ItemStore):
+    """
+    Default in-memory engine.
+
+    Items live in a dict keyed by ID, alongside a sorted ID index so that
+    ``scan`` seeks to ``after_id``/``skip`` in O(log n) and only touches the
+    requested page instead of copying every item on each call.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._items: dict[int, dict] = {}
+        self._ids: SortedList = SortedList()
+        self._last_id = 0
+
+    async def next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    async def reserve_ids(self, count: int) -> range:
+        first = self._last_id + 1
+        self._last_id += count
+        return range(first, self._last_id + 1)
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def advance_ids(self, last_id: int) -> None:
+        self._last_id = max(self._last_id, last_id)
+
+    async def get(self, item_id: int) -> dict | None:
+        return self._items.get(item_id)
+
+    async def get_many(self, item_ids: list[int]) -> dict[int, dict]:
+        items = self._items
+        return {item_id: items[item_id] for item_id in item_ids if item_id in items}
+
+    async def _put_many(self, items: list[dict]) -> list[dict]:
+        stored = self._items
+        ids = [item["id"] for item in items]
+        replaced = [stored[item_id] for item_id in ids if item_id in stored]
+        self._ids.update([item_id for item_id in ids if item_id not in stored] if replaced else ids)
+        stored.update(zip(ids, items, strict=True))
+        if ids:
+            self._last_id = max(self._last_id, max(ids))
+        return replaced
+
+    async def _delete_many(self, item_ids: list[int]) -> list[dict]:
+        deleted = []
+        for item_id in item_ids:
+            item = self._items.pop(item_id, None)
+            if item is not None:
+                self._ids.remove(item_id)
+                deleted.append(item)
+        return deleted
+
+    async def scan(
+        self,
+        skip: int = 0,
+        limit: int | None = None,
+        after_id: int | None = None,
+    ) -> list[dict]:
+        start = skip if after_id is None else self._ids.bisect_right(after_id) + skip
+        stop = None if limit is None else start + limit
+        return [self._items[item_id] for item_id in self._ids.islice(start, stop)]
+
+    async def count(self) -> int:
+        return len(self._items)
+
+    async def iter_snapshot(self, chunk_size: int = 1000) -> AsyncIterator[list[dict]]:
+        # Stored items are never mutated in place, so a list of references is
+        # a consistent snapshot costing one pointer per item (no copies).
+        items = self._items
+        snapshot = [items[item_id] for item_id in self._ids]
+        for start in range(0, len(snapshot), chunk_size):
+            yield snapshot[start : start + chunk_size]
+
+    def _clear(self) -> None:
+        # The ID counter is intentionally kept so IDs are never reused
+        self._items.clear()
+        self._ids.clear()
+
+
+class _StringArena:
+    """
+    Append-only UTF-8 string pool.
+
+    Strings are stored back to back in one bytearray and addressed by index,
+    costing their encoded length plus an 8-byte offset and a 4-byte
+    reference count rather than a full ``str`` object each. Recently added
+    strings are interned, so repeated values (a shared description, say) are
+    stored once. Strings whose last reference is released are counted as
+    garbage; the owning store reclaims them by compacting into a new arena.
+    """
+
+    RECENT_LIMIT = 4096
+
+    def __init__(self) -> None:
+        self._blob = bytearray()
+        self._offsets = array("Q", [0])
+        self._refs = array("I")
+        self._recent: dict[str, int] = {}
+        self.garbage = 0
+
+    def add(self, value: str) -> int:
+        index = self._recent.get(value)
+        if index is not None:
+            if not self._refs[index]:
+                self.garbage -= self._size(index)
+            self._refs[index] += 1
+            return index
+        self._blob += value.encode()
+        self._offsets.append(len(self._blob))
+        self._refs.append(1)
+        index = len(self._offsets) - 2
+        if len(self._recent) >= self.RECENT_LIMIT:
+            self._recent.clear()
+        self._recent[value] = index
+        return index
+
+    def release(self, index: int) -> None:
+        """Drop one reference to the string at ``index``."""
+        self._refs[index] -= 1
+        if not self._refs[index]:
+            self.garbage += self._size(index)
+
+    def get(self, index: int) -> str:
+        return self._blob[self._offsets[index] : self._offsets[index + 1]].decode()
+
+    def _size(self, index: int) -> int:
+        return self._offsets[index + 1] - self._offsets[index]
+
+    def __len__(self) -> int:
+        return len(self._blob)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            len(self._blob)
+            + self._offsets.itemsize * len(self._offsets)
+            + self._refs.itemsize * len(self._refs)
+        )
+
+
+class _Columns:
+    """Parallel typed arrays holding one row per item, sorted by ID."""
+
+    __slots__ = ("ids", "prices", "quantities", "names", "descriptions", "alive", "arena")
+
+    def __init__(self, arena: _StringArena | None = None) -> None:
+        self.ids = array("q")
+        self.prices = array("d")
+        self.quantities = array("q")
+        self.names = array("i")
+        self.descriptions = array("i")  # -1 encodes None
+        self.alive = bytearray()
+        self.arena = arena or _StringArena()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "_Columns":
+        """Copy the row arrays; the arena only ever appends bytes, so it can be shared."""
+        clone = _Columns(self.arena)
+        clone.ids = self.ids[:]
+        clone.prices = self.prices[:]
+        clone.quantities = self.quantities[:]
+        clone.names = self.names[:]
+        clone.descriptions = self.descriptions[:]
+        clone.alive = self.alive[:]
+        return clone
+
+    def release(self, pos: int) -> None:
+        """Release the strings of the row at ``pos`` (on delete or overwrite)."""
+        self.arena.release(self.names[pos])
+        description = self.descriptions[pos]
+        if description >= 0:
+            self.arena.release(description)
+
+    def row(self, pos: int) -> dict:
+        """Materialize the item dict stored at ``pos``."""
+        description = self.descriptions[pos]
+        return {
+            "id": self.ids[pos],
+            "name": self.arena.get(self.names[pos]),
+            "description": None if description < 0 else self.arena.get(description),
+            "price": self.prices[pos],
+            "quantity": self.quantities[pos],
+        }
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.ids, self.prices, self.quantities, self.names, self.descriptions)
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.alive) + self.arena.nbytes
+
+
+class ColumnarItemStore(ItemStore):
+    """
+    Compact column-oriented engine.
+
+    Each item costs ~33 bytes of typed-array storage plus its UTF-8 text,
+    instead of a dict with five boxed values (several hundred bytes). Rows
+    are kept sorted by ID, so lookups are a binary search and ID-ordered
+    scans are sequential. Deletes leave tombstones, and replaced or deleted
+    strings stay in the arena as garbage; both are compacted away once they
+    make up a quarter of the rows or of the arena. Item dicts are only
+    materialized when read.
+    """
+
+    COMPACT_MIN_TOMBSTONES = 1024
+    COMPACT_MIN_GARBAGE = 1 << 16
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._cols = _Columns()
+        self._live = 0
+        self._tombstones = 0
+        self._last_id = 0
+
+    def _find(self, item_id: int) -> int:
+        """Return the row of a live item, or -1."""
+        cols = self._cols
+        pos = bisect_left(cols.ids, item_id)
+        if pos < len(cols) and cols.ids[pos] == item_id and cols.alive[pos]:
+            return pos
+        return -1
+
+    def _write(self, item: dict) -> dict | None:
+        """Store one item; return the live item it replaced, if any."""
+        cols = self._cols
+        item_id = item["id"]
+        name = cols.arena.add(item["name"])
+        description = -1 if item["description"] is None else cols.arena.add(item["description"])
+        row = (item_id, float(item["price"]), item["quantity"], name, description)
+        columns: tuple[array, ...] = (
+            cols.ids, cols.prices, cols.quantities, cols.names, cols.descriptions
+        )
+
+        replaced = None
+        pos = bisect_left(cols.ids, item_id)
+        if pos < len(cols) and cols.ids[pos] == item_id:
+            # Overwrite in place, reviving the row if it was a tombstone
+            # (whose strings were released when it was deleted)
+            if cols.alive[pos]:
+                replaced = cols.row(pos)
+                cols.release(pos)
+            else:
+                cols.alive[pos] = 1
+                self._tombstones -= 1
+                self._live += 1
+            for column, value in zip(columns, row, strict=True):
+                column[pos] = value
+        else:
+            if pos == len(cols):
+                for column, value in zip(columns, row, strict=True):
+                    column.append(value)
+                cols.alive.append(1)
+            else:
+                for column, value in zip(columns, row, strict=True):
+                    column.insert(pos, value)
+                cols.alive.insert(pos, 1)
+            self._live += 1
+        self._last_id = max(self._last_id, item_id)
+        return replaced
+
+    def _remove(self, item_id: int) -> dict | None:
+        pos = self._find(item_id)
+        if pos < 0:
+            return None
+        item = self._cols.row(pos)
+        self._cols.release(pos)
+        self._cols.alive[pos] = 0
+        self._live -= 1
+        self._tombstones += 1
+        return item
+
+    def _maybe_compact(self) -> None:
+        arena = self._cols.arena
+        if (
+            self._tombstones < max(self.COMPACT_MIN_TOMBSTONES, self._live // 4)
+            and arena.garbage < max(self.COMPACT_MIN_GARBAGE, len(arena) // 4)
+        ):
+            return
+        old = self._cols
+        new = _Columns()
+        for pos in range(len(old)):
+            if old.alive[pos]:
+                new.ids.append(old.ids[pos])
+                new.prices.append(old.prices[pos])
+                new.quantities.append(old.quantities[pos])
+                new.names.append(new.arena.add(old.arena.get(old.names[pos])))
+                description = old.descriptions[pos]
+                new.descriptions.append(
+                    -1 if description < 0 else new.arena.add(old.arena.get(description))
+                )
+        new.alive = bytearray(b"\x01") * len(new)
+        self._cols = new
+        self._tombstones = 0
+
+    async def next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    async def reserve_ids(self, count: int) -> range:
+        first = self._last_id + 1
+        self._last_id += count
+        return range(first, self._last_id + 1)
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def advance_ids(self, last_id: int) -> None:
+        self._last_id = max(self._last_id, last_id)
+
+    async def get(self, item_id: int) -> dict | None:
+        pos = self._find(item_id)
+        return None if pos < 0 else self._cols.row(pos)
+
+    async def get_many(self, item_ids: list[int]) -> dict[int, dict]:
+        found = {}
+        for item_id in item_ids:
+            pos = self._find(item_id)
+            if pos >= 0:
+                found[item_id] = self._cols.row(pos)
+        return found
+
+    async def _put_many(self, items: list[dict]) -> list[dict]:
+        cols = self._cols
+        ids = [item["id"] for item in items]
+        if ids and (not len(cols) or ids[0] > cols.ids[-1]) and all(map(operator.lt, ids, ids[1:])):
+            # Ascending IDs past the last row (batch create, restore): append
+            # whole columns instead of bisecting per item
+            add = cols.arena.add
+            cols.ids.extend(ids)
+            cols.prices.extend([float(item["price"]) for item in items])
+            cols.quantities.extend([item["quantity"] for item in items])
+            cols.names.extend([add(item["name"]) for item in items])
+            cols.descriptions.extend([
+                -1 if item["description"] is None else add(item["description"]) for item in items
+            ])
+            cols.alive += b"\x01" * len(ids)
+            self._live += len(ids)
+            self._last_id = max(self._last_id, ids[-1])
+            return []
+        replaced = [old for old in map(self._write, items) if old is not None]
+        if replaced:
+            self._maybe_compact()
+        return replaced
+
+    async def _delete_many(self, item_ids: list[int]) -> list[dict]:
+        deleted = [item for item in map(self._remove, item_ids) if item is not None]
+        self._maybe_compact()
+        return deleted
+
+    async def scan(
+        self,
+        skip: int = 0,
+        limit: int | None = None,
+        after_id: int | None = None,
+    ) -> list[dict]:
+        cols = self._cols
+        alive = cols.alive
+        size = len(cols)
+        pos = 0 if after_id is None else bisect_right(cols.ids, after_id)
+        if not self._tombstones:
+            pos += skip
+        else:
+            while skip and pos < size:
+                skip -= alive[pos]
+                pos += 1
+
+        rows: list[dict] = []
+        while pos < size and (limit is None or len(rows) < limit):
+            if alive[pos]:
+                rows.append(cols.row(pos))
+            pos += 1
+        return rows
+
+    async def count(self) -> int:
+        return self._live
+
+    async def iter_snapshot(self, chunk_size: int = 1000) -> AsyncIterator[list[dict]]:
+        # Copying the row arrays is ~33 bytes per item; item dicts are
+        # materialized one chunk at a time from the copy.
+        snapshot = self._cols.copy()
+        chunk = []
+        for pos in range(len(snapshot)):
+            if snapshot.alive[pos]:
+                chunk.append(snapshot.row(pos))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _clear(self) -> None:
+        self._cols = _Columns()
+        self._live = 0
+        self._tombstones = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columns and string arena."""
+        return self._cols.nbytes
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+_SQLITE_COLUMNS = "id, name, description, price, quantity"
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older SQLite builds
+_SQLITE_MAX_PARAMS = 500
+
+
+def _row_to_item(row: tuple) -> dict:
+    item_id, name, description, price, quantity = row
+    return {"id": item_id, "name": name, "description": description, "price": price, "quantity": quantity}
+
+
+class SQLiteItemStore(ItemStore):
+    """
+    Durable engine backed by a SQLite database in WAL mode.
+
+    Blocking SQLite calls never run on the event loop:
+    - One writer thread owns the only write connection. Writes submitted
+      while a transaction is committing are queued and then committed
+      together in the next transaction (group commit), so concurrent
+      requests share one transaction and WAL append instead of paying one
+      each. With ``synchronous = NORMAL`` commits are not fsynced (the WAL
+      is synced at checkpoints): a power loss can drop the latest commits
+      but never corrupts the database.
+    - A small pool of reader threads, each with its own connection, serves
+      reads concurrently with the writer (WAL readers never block it).
+
+    The ID counter is kept in memory and saved with every write transaction,
+    so the database must have a single writing process (one replica).
+    """
+
+    persistent = True
+
+    def __init__(self, path: str = "items.db", readers: int = 4) -> None:
+        super().__init__()
+        self.path = path
+        self._reader_count = readers
+        self._pending: list[tuple[str, object, asyncio.Future[list[dict]]]] = []
+        self._flusher: asyncio.Task | None = None
+        self._open()
+        self._last_id = self._writer.submit(self._load_last_id).result()
+
+    def _open(self) -> None:
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._readers = ThreadPoolExecutor(
+            max_workers=self._reader_count, thread_name_prefix="sqlite-reader"
+        )
+        self._local = threading.local()
+        self._reader_connections: list[sqlite3.Connection] = []
+        self._write_conn = self._writer.submit(self._open_writer).result()
+        self._closed = False
+
+    def _reopen(self) -> None:
+        # The store outlives the app lifespan that closes it (e.g. one test
+        # client per test), so the next use after close() reopens it
+        if self._closed:
+            self._open()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are managed explicitly
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    def _open_writer(self) -> sqlite3.Connection:
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode NORMAL is crash-safe; commits skip the per-transaction fsync
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.executescript(_SQLITE_SCHEMA)
+        return conn
+
+    def _load_last_id(self) -> int:
+        row: tuple[int] = self._write_conn.execute(
+            "SELECT max(coalesce((SELECT value FROM meta WHERE key = 'last_id'), 0),"
+            " coalesce((SELECT max(id) FROM items), 0))"
+        ).fetchone()
+        return row[0]
+
+    # Reads: thread-local connections in the reader pool
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._reader_connections.append(conn)
+        return conn
+
+    async def _read(self, func: Callable[..., _T], *args: Any) -> _T:
+        self._reopen()
+        return await asyncio.get_running_loop().run_in_executor(self._readers, func, *args)
+
+    def _select_many(self, item_ids: list[int]) -> dict[int, dict]:
+        conn = self._reader()
+        found: dict[int, dict] = {}
+        for start in range(0, len(item_ids), _SQLITE_MAX_PARAMS):
+            chunk = item_ids[start : start + _SQLITE_MAX_PARAMS]
+            rows = conn.execute(
+                f"SELECT {_SQLITE_COLUMNS} FROM items WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update((row[0], _row_to_item(row)) for row in rows)
+        return found
+
+    def _select_page(self, skip: int, limit: int | None, after_id: int | None) -> list[dict]:
+        rows = self._reader().execute(
+            f"SELECT {_SQLITE_COLUMNS} FROM items WHERE id > ? ORDER BY id LIMIT ? OFFSET ?",
+            (-1 if after_id is None else after_id, -1 if limit is None else limit, skip),
+        )
+        return [_row_to_item(row) for row in rows]
+
+    def _select_count(self) -> int:
+        row: tuple[int] = self._reader().execute("SELECT count(*) FROM items").fetchone()
+        return row[0]
+
+    # Writes: group commit on the writer thread
+
+    async def _write(self, op: str, arg: object) -> list[dict]:
+        self._reopen()
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[dict]] = loop.create_future()
+        self._pending.append((op, arg, future))
+        flusher = self._flusher
+        if flusher is None or flusher.done() or flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            batch, self._pending = self._pending, []
+            ops = [(op, arg) for op, arg, _ in batch]
+            results: list[list[dict] | Exception]
+            try:
+                results = await loop.run_in_executor(self._writer, self._commit, ops, self._last_id)
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, _, future), result in zip(batch, results, strict=True):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _commit(self, ops: list[tuple[str, object]], last_id: int) -> list[list[dict] | Exception]:
+        """Apply ops in one transaction; on failure retry them one by one."""
+        conn = self._write_conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            results: list[list[dict] | Exception] = [self._apply(conn, op, arg) for op, arg in ops]
+            self._save_last_id(conn, last_id)
+            conn.execute("COMMIT")
+            return results
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if len(ops) == 1:
+                raise
+
+        # Isolate the failing write so the others still commit
+        results = []
+        for op in ops:
+            try:
+                results.append(self._commit([op], last_id)[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, op: str, arg: Any) -> list[dict]:
+        if op == "clear":
+            conn.execute("DELETE FROM items")
+            return []
+        ids = [item["id"] for item in arg] if op == "put" else arg
+        existing: list[tuple] = []
+        for start in range(0, len(ids), _SQLITE_MAX_PARAMS):
+            chunk = ids[start : start + _SQLITE_MAX_PARAMS]
+            existing.extend(conn.execute(
+                f"SELECT {_SQLITE_COLUMNS} FROM items WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ))
+        if op == "put":
+            conn.executemany(
+                "INSERT OR REPLACE INTO items (id, name, description, price, quantity) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (item["id"], item["name"], item["description"], item["price"], item["quantity"])
+                    for item in arg
+                ],
+            )
+            return [_row_to_item(row) for row in existing]
+        conn.executemany("DELETE FROM items WHERE id = ?", [(item_id,) for item_id in ids])
+        # Report deletions in request order, like the other engines
+        by_id = {row[0]: row for row in existing}
+        return [_row_to_item(by_id[item_id]) for item_id in ids if item_id in by_id]
+
+    @staticmethod
+    def _save_last_id(conn: sqlite3.Connection, last_id: int) -> None:
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('last_id', ?)"
+            " ON CONFLICT (key) DO UPDATE SET value = max(value, excluded.value)",
+            (last_id,),
+        )
+
+    # ItemStore API
+
+    async def next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    async def reserve_ids(self, count: int) -> range:
+        first = self._last_id + 1
+        self._last_id += count
+        return range(first, self._last_id + 1)
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def advance_ids(self, last_id: int) -> None:
+        self._last_id = max(self._last_id, last_id)
+
+    async def get(self, item_id: int) -> dict | None:
+        return (await self._read(self._select_many, [item_id])).get(item_id)
+
+    async def get_many(self, item_ids: list[int]) -> dict[int, dict]:
+        return await self._read(self._select_many, list(item_ids))
+
+    async def _put_many(self, items: list[dict]) -> list[dict]:
+        if not items:
+            return []
+        self._last_id = max(self._last_id, max(item["id"] for item in items))
+        return await self._write("put", items)
+
+    async def _delete_many(self, item_ids: list[int]) -> list[dict]:
+        if not item_ids:
+            return []
+        return await self._write("delete", list(dict.fromkeys(item_ids)))
+
+    async def scan(
+        self,
+        skip: int = 0,
+        limit: int | None = None,
+        after_id: int | None = None,
+    ) -> list[dict]:
+        return await self._read(self._select_page, skip, limit, after_id)
+
+    async def count(self) -> int:
+        return await self._read(self._select_count)
+
+    async def iter_snapshot(self, chunk_size: int = 1000) -> AsyncIterator[list[dict]]:
+        # A dedicated connection holds one read transaction for the whole
+        # iteration, so WAL mode serves it a consistent snapshot
+        conn = await self._read(self._connect)
+        try:
+            cursor = await self._read(
+                conn.execute, f"SELECT {_SQLITE_COLUMNS} FROM items ORDER BY id"
+            )
+            while rows := await self._read(cursor.fetchmany, chunk_size):
+                yield [_row_to_item(row) for row in rows]
+        finally:
+            await self._read(conn.close)
+
+    def _clear(self) -> None:
+        # Synchronous by contract: wait for the writer thread to run it
+        self._reopen()
+        self._writer.submit(self._commit, [("clear", None)], self._last_id).result()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._writer.submit(self._write_conn.close).result()
+        self._writer.shutdown()
+        self._readers.shutdown()
+        for conn in self._reader_connections:
+            conn.close()
+
+
+ITEM_STORE_ENGINES: dict[str, type[ItemStore]] = {
+    "memory": InMemoryItemStore,
+    "columnar": ColumnarItemStore,
+    "sqlite": SQLiteItemStore,
+}
+
+
+def create_item_store(engine: str = "memory", **options: Any) -> ItemStore:
+    """
+    Create a storage engine by name.
+
+    Args:
+        engine: One of ``ITEM_STORE_ENGINES`` (e.g. "memory", "columnar", "sqlite")
+        **options: Engine constructor arguments (e.g. ``path`` for "sqlite")
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    try:
+        engine_class = ITEM_STORE_ENGINES[engine]
+    except KeyError as e:
+        raise ValueError(
+            f"Unknown storage engine {engine!r}; expected one of {sorted(ITEM_STORE_ENGINES)}"
+        ) from e
+    return engine_class(**options)
@@ -9,30 +9,509 @@ Architecture:
 - Automatic instrumentation for FastAPI, HTTP requests
 - Custom metrics and spans can be added as needed
 - Connection string loaded from environment variable
+- Head sampling: parent-based ratio sampler with per-route overrides; failed
+  requests outside the sample are still exported
+- Optional tail sampling: whole traces are buffered briefly and only slow,
+  failed or baseline traces are exported
+- Custom metric attributes go through a cardinality guard, so user input
+  cannot create unbounded time series
+- Export pipeline sizes come from settings and the pipeline reports its own
+  queue depth, dropped spans and export latency
+- Extra metric readers (e.g. Prometheus, see app/prometheus.py) are attached
+  to the meter provider, with or without Azure Monitor
 """
 import logging
 import os
-from typing import Optional
+import threading
+import time
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any, Optional
 
-from opentelemetry import trace, metrics
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
-from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION, SERVICE_INSTANCE_ID
 from azure.monitor.opentelemetry.exporter import (
-    AzureMonitorTraceExporter,
     AzureMonitorMetricExporter,
+    AzureMonitorTraceExporter,
 )
-
+from opentelemetry import metrics, trace
+from opentelemetry.context import Context
+from opentelemetry.metrics import CallbackOptions, Observation
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import MetricReader, PeriodicExportingMetricReader
+from opentelemetry.sdk.resources import SERVICE_INSTANCE_ID, SERVICE_NAME, SERVICE_VERSION, Resource
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import Link, SpanContext, SpanKind, StatusCode, TraceFlags
+from opentelemetry.trace.span import TraceState
+from opentelemetry.util.types import Attributes
 
 logger = logging.getLogger(__name__)
 
+# Sampling percentage Application Insights uses to extrapolate request counts
+SAMPLE_RATE_ATTRIBUTE = "_MS.sampleRate"
+
+# Attribute value recorded in place of values over the cardinality limit
+OVERFLOW_VALUE = "_other"
+
+
+class RouteRatioSampler(Sampler):
+    """
+    Trace ID ratio sampler for root spans, with per-route ratios.
+
+    Server spans are matched on their ``http.route`` template (e.g.
+    ``/items/{item_id}``). With ``record_unsampled``, server spans outside the
+    sample are still recorded (not exported) so ``ErrorSpanProcessor`` can
+    export the ones that fail.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 1.0,
+        routes: Optional[dict[str, float]] = None,
+        record_unsampled: bool = False,
+    ) -> None:
+        self._default = TraceIdRatioBased(ratio)
+        self._routes = {route: TraceIdRatioBased(rate) for route, rate in (routes or {}).items()}
+        self.record_unsampled = record_unsampled
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[SpanKind] = None,
+        attributes: Attributes = None,
+        links: Optional[Sequence[Link]] = None,
+        trace_state: Optional[TraceState] = None,
+    ) -> SamplingResult:
+        sampler = self._default
+        if self._routes and attributes:
+            route = attributes.get("http.route")
+            if isinstance(route, str):
+                sampler = self._routes.get(route, sampler)
+
+        result = sampler.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+        if result.decision.is_sampled():
+            return SamplingResult(
+                result.decision,
+                {**(attributes or {}), SAMPLE_RATE_ATTRIBUTE: sampler.rate * 100},
+                result.trace_state,
+            )
+        if self.record_unsampled and kind is SpanKind.SERVER:
+            return SamplingResult(Decision.RECORD_ONLY, attributes, result.trace_state)
+        return result
+
+    def get_description(self) -> str:
+        return f"RouteRatioSampler{{{self._default.rate}, routes={len(self._routes)}}}"
+
+
+class ErrorSpanProcessor(SpanProcessor):
+    """
+    Forward sampled spans, plus recorded-but-unsampled spans that failed.
+
+    Wraps the exporting processor (which only exports sampled spans); a
+    failed span outside the sample is forwarded as a sampled copy.
+    """
+
+    def __init__(self, processor: SpanProcessor) -> None:
+        self.processor = processor
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if not span.context.trace_flags.sampled:
+            if span.status.status_code is not StatusCode.ERROR:
+                return
+            span = _as_sampled(span)
+        self.processor.on_end(span)
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Copy an ended span with the sampled flag set."""
+    context = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(
+            context.trace_id,
+            context.span_id,
+            context.is_remote,
+            TraceFlags(context.trace_flags | TraceFlags.SAMPLED),
+            context.trace_state,
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Buffer spans per trace and forward only interesting traces.
+
+    A trace is decided when its local root span (no parent, or a remote
+    parent) ends. It is kept if the root took at least ``latency_threshold_ms``,
+    if any of its spans has error status, or if its trace ID falls in the
+    ``baseline_ratio`` sample; kept spans go to the wrapped (exporting)
+    processor. Memory is bounded: at most ``max_traces`` traces of
+    ``max_spans_per_trace`` spans are buffered, traces whose root has not
+    ended within ``decision_wait`` seconds are dropped, and every drop is
+    counted in the ``app.tracing.tail.*`` metrics.
+    """
+
+    def __init__(
+        self,
+        processor: SpanProcessor,
+        latency_threshold_ms: float = 500.0,
+        baseline_ratio: float = 0.01,
+        decision_wait: float = 10.0,
+        max_traces: int = 10000,
+        max_spans_per_trace: int = 256,
+        meter: Optional[metrics.Meter] = None,
+    ) -> None:
+        self.processor = processor
+        self.latency_threshold_ns = int(latency_threshold_ms * 1e6)
+        self.baseline_bound = round(baseline_ratio * (TraceIdRatioBased.TRACE_ID_LIMIT + 1))
+        self.decision_wait = decision_wait
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._lock = threading.Lock()
+        # trace_id -> [first seen (monotonic), spans, has error], oldest first
+        self._traces: dict[int, list] = {}
+        self._buffered_spans = 0
+        # Recent decisions, for spans that end after their local root
+        self._decided: dict[int, bool] = {}
+        # Traces by outcome (slow/error/baseline/dropped/expired/evicted)
+        self.traces = dict.fromkeys(("slow", "error", "baseline", "dropped", "expired", "evicted"), 0)
+        self.dropped_spans = 0
+        self._instrument(meter or metrics.get_meter(__name__))
+
+    def _instrument(self, meter: metrics.Meter) -> None:
+        meter.create_observable_counter(
+            name="app.tracing.tail.traces",
+            callbacks=[self._observe_traces],
+            description="Traces decided by tail sampling, by decision",
+            unit="1",
+        )
+        meter.create_observable_counter(
+            name="app.tracing.tail.spans.dropped",
+            callbacks=[lambda options: [Observation(self.dropped_spans)]],
+            description="Spans dropped by tail sampling (unkept, expired, evicted or over the per-trace cap)",
+            unit="1",
+        )
+        meter.create_observable_gauge(
+            name="app.tracing.tail.buffered",
+            callbacks=[lambda options: [Observation(self._buffered_spans)]],
+            description="Spans buffered while their trace awaits a decision",
+            unit="1",
+        )
+
+    def _observe_traces(self, options: CallbackOptions) -> Iterable[Observation]:
+        return [Observation(count, {"decision": decision}) for decision, count in self.traces.items()]
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        error = span.status.status_code is StatusCode.ERROR
+        forward: list[ReadableSpan] = []
+        with self._lock:
+            self._expire(time.monotonic())
+            decided = self._decided.get(trace_id)
+            if decided is not None:
+                if decided:
+                    forward.append(span)
+                else:
+                    self.dropped_spans += 1
+            else:
+                entry = self._traces.get(trace_id)
+                if entry is None:
+                    if len(self._traces) >= self.max_traces:
+                        self._drop_oldest("evicted")
+                    entry = self._traces[trace_id] = [time.monotonic(), [], False]
+                if len(entry[1]) < self.max_spans_per_trace:
+                    entry[1].append(span)
+                    self._buffered_spans += 1
+                else:
+                    self.dropped_spans += 1
+                entry[2] = entry[2] or error
+                if span.parent is None or span.parent.is_remote:
+                    forward = self._decide(trace_id, span)
+        for kept in forward:
+            self.processor.on_end(kept)
+
+    def _decide(self, trace_id: int, root: ReadableSpan) -> list[ReadableSpan]:
+        spans: list[ReadableSpan]
+        _, spans, error = self._traces.pop(trace_id)
+        self._buffered_spans -= len(spans)
+        if error:
+            decision = "error"
+        elif (
+            root.start_time is not None
+            and root.end_time is not None
+            and root.end_time - root.start_time >= self.latency_threshold_ns
+        ):
+            decision = "slow"
+        elif trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self.baseline_bound:
+            decision = "baseline"
+        else:
+            decision = "dropped"
+        self.traces[decision] += 1
+
+        keep = decision != "dropped"
+        self._remember(trace_id, keep)
+        if keep:
+            return spans
+        self.dropped_spans += len(spans)
+        return []
+
+    def _expire(self, now: float) -> None:
+        while self._traces:
+            first_seen = next(iter(self._traces.values()))[0]
+            if now - first_seen < self.decision_wait:
+                return
+            self._drop_oldest("expired")
+
+    def _drop_oldest(self, reason: str) -> None:
+        trace_id = next(iter(self._traces))
+        _, spans, _ = self._traces.pop(trace_id)
+        self._buffered_spans -= len(spans)
+        self.dropped_spans += len(spans)
+        self.traces[reason] += 1
+        self._remember(trace_id, False)
+
+    def _remember(self, trace_id: int, keep: bool) -> None:
+        if len(self._decided) >= self.max_traces:
+            del self._decided[next(iter(self._decided))]
+        self._decided[trace_id] = keep
+
+    def shutdown(self) -> None:
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.processor.force_flush(timeout_millis)
+
+
+class MonitoredBatchSpanProcessor(BatchSpanProcessor):
+    """
+    ``BatchSpanProcessor`` that reports on its own queue and exports.
+
+    Ending a span only appends it to an in-memory queue; a background thread
+    exports batches, so a slow exporter fills the queue (and then drops the
+    oldest spans) instead of delaying requests. Metrics:
+    ``app.telemetry.spans.queued`` (queue depth), ``app.telemetry.spans.dropped``,
+    ``app.telemetry.spans.exported`` (by ``result``) and
+    ``app.telemetry.export.duration`` (ms per batch).
+
+    The queue depth comes from SDK internals (``_batch_processor._queue``,
+    as of opentelemetry-sdk 1.39). If a release moves them, the depth is
+    unknown: the queued gauge reports nothing and drops are not counted,
+    but spans are still exported.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        max_queue_size: Optional[int] = None,
+        schedule_delay_millis: Optional[float] = None,
+        max_export_batch_size: Optional[int] = None,
+        export_timeout_millis: Optional[float] = None,
+        meter: Optional[metrics.Meter] = None,
+    ) -> None:
+        meter = meter or metrics.get_meter(__name__)
+        self.dropped_spans = 0
+        self.exported_spans = {"success": 0, "failure": 0}
+        self._export_duration = meter.create_histogram(
+            name="app.telemetry.export.duration",
+            description="Duration of span batch exports",
+            unit="ms",
+        )
+        super().__init__(
+            _TimedSpanExporter(exporter, self),
+            max_queue_size=max_queue_size,
+            schedule_delay_millis=schedule_delay_millis,
+            max_export_batch_size=max_export_batch_size,
+            export_timeout_millis=export_timeout_millis,
+        )
+        batch_processor = getattr(self, "_batch_processor", None)
+        self.max_queue_size: Optional[int] = getattr(
+            batch_processor, "_max_queue_size", max_queue_size
+        )
+        meter.create_observable_gauge(
+            name="app.telemetry.spans.queued",
+            callbacks=[self._observe_queued],
+            description="Spans waiting in the export queue",
+            unit="1",
+        )
+        meter.create_observable_counter(
+            name="app.telemetry.spans.dropped",
+            callbacks=[lambda options: [Observation(self.dropped_spans)]],
+            description="Spans dropped because the export queue was full",
+            unit="1",
+        )
+        meter.create_observable_counter(
+            name="app.telemetry.spans.exported",
+            callbacks=[self._observe_exported],
+            description="Spans handed to the exporter, by result",
+            unit="1",
+        )
+
+    def queue_depth(self) -> Optional[int]:
+        """Number of spans waiting to be exported, or None if the SDK does not expose it."""
+        queue = getattr(getattr(self, "_batch_processor", None), "_queue", None)
+        if queue is None:
+            return None
+        try:
+            return len(queue)
+        except TypeError:
+            return None
+
+    def _observe_queued(self, options: CallbackOptions) -> Iterable[Observation]:
+        depth = self.queue_depth()
+        return [] if depth is None else [Observation(depth)]
+
+    def _observe_exported(self, options: CallbackOptions) -> Iterable[Observation]:
+        return [Observation(count, {"result": result}) for result, count in self.exported_spans.items()]
+
+    def on_end(self, span: ReadableSpan) -> None:
+        # The queue discards its oldest span when a new one arrives while full
+        if span.context.trace_flags.sampled and self.max_queue_size is not None:
+            depth = self.queue_depth()
+            if depth is not None and depth >= self.max_queue_size:
+                self.dropped_spans += 1
+        super().on_end(span)
+
+
+class _TimedSpanExporter(SpanExporter):
+    """Span exporter wrapper feeding ``MonitoredBatchSpanProcessor`` metrics."""
+
+    def __init__(self, exporter: SpanExporter, monitor: MonitoredBatchSpanProcessor) -> None:
+        self.exporter = exporter
+        self.monitor = monitor
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        started = time.perf_counter()
+        result = SpanExportResult.FAILURE
+        try:
+            result = self.exporter.export(spans)
+            return result
+        finally:
+            self.monitor._export_duration.record((time.perf_counter() - started) * 1000)
+            outcome = "success" if result is SpanExportResult.SUCCESS else "failure"
+            self.monitor.exported_spans[outcome] += len(spans)
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter.force_flush(timeout_millis)
+
+
+def build_tracer_provider(
+    exporter: SpanExporter,
+    resource: Optional[Resource] = None,
+    sample_ratio: float = 1.0,
+    sample_routes: Optional[dict[str, float]] = None,
+    sample_errors: bool = True,
+    tail_sampling: bool = False,
+    tail_latency_ms: float = 500.0,
+    tail_baseline_ratio: float = 0.01,
+    tail_decision_wait: float = 10.0,
+    tail_max_traces: int = 10000,
+    max_queue_size: Optional[int] = None,
+    max_export_batch_size: Optional[int] = None,
+    schedule_delay_millis: Optional[float] = None,
+    export_timeout_millis: Optional[float] = None,
+) -> TracerProvider:
+    """
+    Create a tracer provider that samples and batches spans to ``exporter``.
+
+    Child spans follow their parent's decision (including the ``traceparent``
+    of incoming requests); root spans use ``sample_ratio``, or the ratio of
+    their route in ``sample_routes``. With ``tail_sampling``, sampled traces
+    are then filtered by ``TailSamplingSpanProcessor``; keep the head ratio
+    at 1.0 so slow requests are never discarded up front.
+
+    Args:
+        exporter: Span exporter (Azure Monitor in production)
+        resource: Resource attributes describing the service
+        sample_ratio: Fraction of traces to sample (0.0 - 1.0)
+        sample_routes: Per-route sampling ratios, keyed by route template
+        sample_errors: Also export failed requests outside the sample
+        tail_sampling: Export only slow, failed and baseline traces
+        tail_latency_ms: Root span duration that makes a trace slow
+        tail_baseline_ratio: Fraction of other traces still exported
+        tail_decision_wait: Seconds a trace may wait for its root span
+        tail_max_traces: Traces buffered at most while awaiting a decision
+        max_queue_size: Spans queued for export before the oldest are dropped
+        max_export_batch_size: Spans sent per export call
+        schedule_delay_millis: Delay between exports of a partial batch
+        export_timeout_millis: Time allowed for one export
+
+    Unset batching options fall back to the SDK defaults (``OTEL_BSP_*``).
+
+    Returns:
+        TracerProvider: Provider with the sampler and span processor installed
+    """
+    sampler = ParentBased(RouteRatioSampler(sample_ratio, sample_routes, record_unsampled=sample_errors))
+    tracer_provider = TracerProvider(resource=resource, sampler=sampler)
+    span_processor: SpanProcessor = MonitoredBatchSpanProcessor(
+        exporter,
+        max_queue_size=max_queue_size,
+        schedule_delay_millis=schedule_delay_millis,
+        max_export_batch_size=max_export_batch_size,
+        export_timeout_millis=export_timeout_millis,
+    )
+    if sample_errors:
+        span_processor = ErrorSpanProcessor(span_processor)
+    if tail_sampling:
+        span_processor = TailSamplingSpanProcessor(
+            span_processor,
+            latency_threshold_ms=tail_latency_ms,
+            baseline_ratio=tail_baseline_ratio,
+            decision_wait=tail_decision_wait,
+            max_traces=tail_max_traces,
+        )
+    tracer_provider.add_span_processor(span_processor)
+    return tracer_provider
+
 
 def configure_telemetry(
     service_name: str,
     service_version: str,
     service_instance_id: Optional[str] = None,
+    sample_ratio: float = 1.0,
+    sample_routes: Optional[dict[str, float]] = None,
+    sample_errors: bool = True,
+    tail_sampling: bool = False,
+    tail_latency_ms: float = 500.0,
+    tail_baseline_ratio: float = 0.01,
+    span_queue_size: Optional[int] = None,
+    span_batch_size: Optional[int] = None,
+    span_schedule_delay_millis: Optional[float] = None,
+    span_export_timeout_millis: Optional[float] = None,
+    metric_export_interval_millis: float = 60000,
+    metric_export_timeout_millis: float = 30000,
+    metric_readers: Sequence[MetricReader] = (),
 ) -> tuple[trace.Tracer, metrics.Meter]:
     """
     Configure OpenTelemetry with Azure Monitor (Application Insights).
@@ -45,6 +524,19 @@ def configure_telemetry(
         service_name: Name of the service (e.g., "aca-devops-demo")
         service_version: Version of the service (e.g., "1.0.0")
         service_instance_id: Unique instance identifier (e.g., hostname, pod name)
+        sample_ratio: Fraction of traces to sample (0.0 - 1.0)
+        sample_routes: Per-route sampling ratios, keyed by route template
+        sample_errors: Also export failed requests outside the sample
+        tail_sampling: Export only slow, failed and baseline traces
+        tail_latency_ms: Root span duration that makes a trace slow
+        tail_baseline_ratio: Fraction of other traces still exported
+        span_queue_size: Spans queued for export before the oldest are dropped
+        span_batch_size: Spans sent per export call
+        span_schedule_delay_millis: Delay between exports of a partial batch
+        span_export_timeout_millis: Time allowed for one span export
+        metric_export_interval_millis: Interval between metric exports
+        metric_export_timeout_millis: Time allowed for one metric export
+        metric_readers: Extra readers for the meter provider (e.g. Prometheus)
     
     Returns:
         tuple: (tracer, meter) for creating custom spans and metrics
@@ -52,14 +544,6 @@ def configure_telemetry(
     # Get Application Insights connection string from environment
     connection_string = os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")
     
-    if not connection_string:
-        logger.warning(
-            "APPLICATIONINSIGHTS_CONNECTION_STRING not set. "
-            "Telemetry will not be exported to Azure Monitor."
-        )
-        # Return no-op tracer and meter (won't export but won't crash)
-        return trace.get_tracer(__name__), metrics.get_meter(__name__)
-    
     # Configure resource attributes (metadata about the service)
     resource_attributes = {
         SERVICE_NAME: service_name,
@@ -71,25 +555,44 @@ def configure_telemetry(
     
     resource = Resource.create(resource_attributes)
     
+    if not connection_string:
+        logger.warning(
+            "APPLICATIONINSIGHTS_CONNECTION_STRING not set. "
+            "Telemetry will not be exported to Azure Monitor."
+        )
+        # Pull-based readers still need a real meter provider
+        if metric_readers:
+            _set_meter_provider(resource, metric_readers)
+        # Return no-op tracer (and meter, unless readers were attached)
+        return trace.get_tracer(__name__), metrics.get_meter(__name__)
+    
     try:
         # Configure Tracing
         trace_exporter = AzureMonitorTraceExporter(connection_string=connection_string)
-        span_processor = BatchSpanProcessor(trace_exporter)
-        tracer_provider = TracerProvider(resource=resource)
-        tracer_provider.add_span_processor(span_processor)
+        tracer_provider = build_tracer_provider(
+            trace_exporter,
+            resource=resource,
+            sample_ratio=sample_ratio,
+            sample_routes=sample_routes,
+            sample_errors=sample_errors,
+            tail_sampling=tail_sampling,
+            tail_latency_ms=tail_latency_ms,
+            tail_baseline_ratio=tail_baseline_ratio,
+            max_queue_size=span_queue_size,
+            max_export_batch_size=span_batch_size,
+            schedule_delay_millis=span_schedule_delay_millis,
+            export_timeout_millis=span_export_timeout_millis,
+        )
         trace.set_tracer_provider(tracer_provider)
         
         # Configure Metrics
         metric_exporter = AzureMonitorMetricExporter(connection_string=connection_string)
         metric_reader = PeriodicExportingMetricReader(
             metric_exporter,
-            export_interval_millis=60000,  # Export every 60 seconds
-        )
-        meter_provider = MeterProvider(
-            resource=resource,
-            metric_readers=[metric_reader],
+            export_interval_millis=metric_export_interval_millis,
+            export_timeout_millis=metric_export_timeout_millis,
         )
-        metrics.set_meter_provider(meter_provider)
+        _set_meter_provider(resource, [metric_reader, *metric_readers])
         
         logger.info(
             f"✅ OpenTelemetry configured for Azure Monitor: "
@@ -107,17 +610,106 @@ def configure_telemetry(
     return tracer, meter
 
 
-def create_custom_metrics(meter: metrics.Meter) -> dict:
+def _set_meter_provider(resource: Resource, metric_readers: Sequence[MetricReader]) -> None:
+    """Install the global meter provider unless an SDK one is already set."""
+    # The global provider can be set once per process, and a reader can only
+    # ever belong to one provider
+    if isinstance(metrics.get_meter_provider(), MeterProvider):
+        logger.warning("Meter provider already configured; keeping the existing one")
+        return
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=metric_readers))
+
+
+class CardinalityGuard:
+    """
+    Cap the distinct values each attribute takes per instrument.
+
+    The first ``max_values`` values seen for an (instrument, attribute) pair
+    pass through; later ones are recorded as ``OVERFLOW_VALUE`` and counted
+    in ``app.metrics.series.dropped``. Attributes with an entry in
+    ``allowed_values`` accept exactly those values instead.
+    """
+
+    def __init__(
+        self,
+        meter: metrics.Meter,
+        max_values: int = 100,
+        allowed_values: Optional[Mapping[str, Iterable]] = None,
+    ) -> None:
+        self.max_values = max_values
+        self.allowed_values = {key: frozenset(values) for key, values in (allowed_values or {}).items()}
+        self._seen: dict[tuple[str, str], set] = {}
+        self.dropped = meter.create_counter(
+            name="app.metrics.series.dropped",
+            description="Measurements recorded under the overflow value by the cardinality guard",
+            unit="1",
+        )
+
+    def limit(self, instrument: str, attributes: Attributes) -> Attributes:
+        """Return ``attributes`` with values over the limit replaced."""
+        if not attributes:
+            return attributes
+        limited = None
+        for key, value in attributes.items():
+            allowed = self.allowed_values.get(key)
+            if allowed is not None:
+                if value in allowed:
+                    continue
+            else:
+                seen = self._seen.setdefault((instrument, key), set())
+                if value in seen:
+                    continue
+                if len(seen) < self.max_values:
+                    seen.add(value)
+                    continue
+            if limited is None:
+                limited = dict(attributes)
+            limited[key] = OVERFLOW_VALUE
+            self.dropped.add(1, {"instrument": instrument, "attribute": key})
+        return attributes if limited is None else limited
+
+    def wrap(self, name: str, instrument: Any) -> "_GuardedInstrument":
+        """Wrap a synchronous instrument so its attributes are limited."""
+        return _GuardedInstrument(name, instrument, self)
+
+
+class _GuardedInstrument:
+    """Counter, UpDownCounter or Histogram recording through a CardinalityGuard."""
+
+    def __init__(self, name: str, instrument: Any, guard: CardinalityGuard) -> None:
+        self.name = name
+        self.instrument = instrument
+        self.guard = guard
+
+    def add(self, amount: float, attributes: Attributes = None, context: Optional[Context] = None) -> None:
+        self.instrument.add(amount, self.guard.limit(self.name, attributes), context)
+
+    def record(self, amount: float, attributes: Attributes = None, context: Optional[Context] = None) -> None:
+        self.instrument.record(amount, self.guard.limit(self.name, attributes), context)
+
+
+def create_custom_metrics(
+    meter: metrics.Meter,
+    max_attribute_values: int = 100,
+    allowed_attribute_values: Optional[Mapping[str, Iterable]] = None,
+) -> dict:
     """
     Create custom metrics for business/application-specific measurements.
     
+    Every instrument records through a ``CardinalityGuard``, so attributes
+    taken from user input (such as item names) cannot grow the number of
+    time series without bound.
+    
     Args:
         meter: OpenTelemetry meter instance
+        max_attribute_values: Distinct values kept per instrument and attribute
+        allowed_attribute_values: Per-attribute allow-lists of values
     
     Returns:
         dict: Dictionary of metric instruments
     """
-    return {
+    guard = CardinalityGuard(meter, max_attribute_values, allowed_attribute_values)
+    instruments = {
         # Counter: Monotonically increasing value (e.g., total requests, errors)
         "items_created": meter.create_counter(
             name="app.items.created",
@@ -144,3 +736,4 @@ def create_custom_metrics(meter: metrics.Meter) -> dict:
             unit="1",
         ),
     }
+    return {key: guard.wrap(key, instrument) for key, instrument in instruments.items()}
@@ -0,0 +1,45 @@
+"""
+Ingest throughput: looping single POST /items versus POST /items/batch.
+
+Runs in-process through the ASGI stack (TestClient), so HTTP parsing and
+network time are excluded; real deployments gain more from batching.
+
+Usage:
+    python -m benchmarks.bench_batch
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app, items_db
+
+ITEMS = 2_000
+BATCH_SIZE = 500
+
+
+def main() -> None:
+    payload = [
+        {"name": f"Item {i}", "description": "benchmark", "price": 9.99, "quantity": i % 10}
+        for i in range(ITEMS)
+    ]
+
+    with TestClient(app) as client:
+        items_db.clear()
+        start = time.perf_counter()
+        for item in payload:
+            client.post("/items", json=item)
+        single = ITEMS / (time.perf_counter() - start)
+
+        items_db.clear()
+        start = time.perf_counter()
+        for offset in range(0, ITEMS, BATCH_SIZE):
+            client.post("/items/batch", json=payload[offset : offset + BATCH_SIZE])
+        batch = ITEMS / (time.perf_counter() - start)
+
+    print(f"single POST /items       : {single:>10,.0f} items/s")
+    print(f"POST /items/batch ({BATCH_SIZE}) : {batch:>10,.0f} items/s")
+    print(f"speedup                  : {batch / single:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
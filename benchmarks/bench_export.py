@@ -0,0 +1,84 @@
+"""
+Request latency while the span exporter is slow or stalled.
+
+Every request is traced (100% sampling) through ``build_tracer_provider``;
+the exporter is a local stand-in that sleeps per batch, so the numbers show
+whether exporter stalls leak into request latency and what the pipeline
+self-metrics report meanwhile.
+
+Usage:
+    python -m benchmarks.bench_export
+"""
+import asyncio
+import threading
+import time
+
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from app.main import items_db
+from app.telemetry import build_tracer_provider
+from benchmarks.bench_sampling import tracing_middleware
+from benchmarks.bench_serialization import get
+from benchmarks.common import populate
+
+ITEMS = 1_000
+REQUESTS = 3_000
+
+
+class SleepingExporter(SpanExporter):
+    """Exporter stand-in that takes ``delay`` seconds per batch."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.stop = threading.Event()
+
+    def export(self, spans) -> SpanExportResult:
+        self.stop.wait(self.delay)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        self.stop.set()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return sorted(values)[int(len(values) * fraction)]
+
+
+async def run() -> None:
+    await get("/items/1")
+    otel = tracing_middleware()
+
+    print(f"{'Exporter':<22} {'p50':>8} {'p99':>8} {'max':>8} {'queued':>7} {'dropped':>8} {'exported':>9}")
+    for label, delay in [
+        ("instant", 0.0),
+        ("200 ms per batch", 0.2),
+        ("stalled (30 s)", 30.0),
+    ]:
+        exporter = SleepingExporter(delay)
+        provider = build_tracer_provider(exporter, sample_errors=False)
+        processor = provider._active_span_processor._span_processors[0]
+        otel.tracer = provider.get_tracer("bench")
+
+        latencies = []
+        for item_id in range(REQUESTS):
+            started = time.perf_counter()
+            await get(f"/items/{item_id % ITEMS + 1}")
+            latencies.append((time.perf_counter() - started) * 1e6)
+
+        queued = processor.queue_depth()
+        exporter.stop.set()
+        provider.shutdown()
+        print(
+            f"{label:<22} {percentile(latencies, 0.5):>6.0f}µs {percentile(latencies, 0.99):>6.0f}µs "
+            f"{max(latencies):>6.0f}µs {queued:>7,} {processor.dropped_spans:>8,} "
+            f"{processor.exported_spans['success']:>9,}"
+        )
+
+
+def main() -> None:
+    populate(items_db, ITEMS)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Filtered listing: one 100-item page from the secondary indexes, collecting
+every match, and a linear scan.
+
+Usage:
+    python -m benchmarks.bench_filters
+"""
+import asyncio
+
+from app.indexes import ItemFilterIndex
+from app.store import InMemoryItemStore
+from benchmarks.common import best_of, populate
+
+SIZES = [10_000, 100_000, 500_000]
+QUERIES = {
+    "name_prefix='Item 4242'": {"name_prefix": "Item 4242"},
+    "price 50.0-50.5": {"min_price": 50.0, "max_price": 50.5},
+    "min_quantity=1": {"min_quantity": 1},
+    "price 10.0-60.0": {"min_price": 10.0, "max_price": 60.0},
+}
+PAGE = 100
+
+
+async def linear_scan(store: InMemoryItemStore, filters: dict) -> list[int]:
+    ids = []
+    async for chunk in store.iter_snapshot():
+        ids.extend(item["id"] for item in chunk if ItemFilterIndex.matches(item, **filters))
+    return ids
+
+
+def main() -> None:
+    print(
+        f"{'items':>9} | {'query':<24} | {'matches':>7} | {'page (us)':>9} "
+        f"| {'all matches (ms)':>16} | {'scan (ms)':>9}"
+    )
+    print("-" * 91)
+    for size in SIZES:
+        store = InMemoryItemStore()
+        index = ItemFilterIndex()
+        store.add_index(index)
+        populate(store, size)
+        loop = asyncio.new_event_loop()
+
+        for label, filters in QUERIES.items():
+            matches = len(index.query(**filters))
+            page = best_of(
+                lambda index=index, filters=filters: index.query_page(**filters, limit=PAGE + 1),
+                number=20,
+            )
+            collect = best_of(
+                lambda index=index, filters=filters: index.query(**filters), repeat=3, number=2
+            )
+            scan = best_of(
+                lambda loop=loop, store=store, filters=filters: loop.run_until_complete(
+                    linear_scan(store, filters)
+                ),
+                repeat=2,
+                number=1,
+            )
+            print(
+                f"{size:>9} | {label:<24} | {matches:>7} | {page:>9.1f} "
+                f"| {collect / 1000:>16.1f} | {scan / 1000:>9.1f}"
+            )
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
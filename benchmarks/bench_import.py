@@ -0,0 +1,52 @@
+"""
+Streaming NDJSON import rate for POST /items/import.
+
+The upload is generated lazily in 64 KiB chunks so the client never holds
+the whole body either; the rate should stay steady as the upload grows.
+
+Usage:
+    python -m benchmarks.bench_import
+"""
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app, items_db
+
+SIZES = [100_000, 300_000]
+CHUNK_BYTES = 64 * 1024
+
+
+def ndjson_body(count: int):
+    """Yield an NDJSON upload of ``count`` items in roughly fixed-size chunks."""
+    buffer = []
+    size = 0
+    for i in range(count):
+        line = json.dumps({"name": f"Item {i}", "description": "imported", "price": 4.5, "quantity": 3})
+        buffer.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_BYTES:
+            yield ("\n".join(buffer) + "\n").encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode()
+
+
+def main() -> None:
+    with TestClient(app) as client:
+        for count in SIZES:
+            items_db.clear()
+            start = time.perf_counter()
+            response = client.post(
+                "/items/import",
+                content=ndjson_body(count),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            elapsed = time.perf_counter() - start
+            assert response.json()["imported"] == count
+            print(f"{count:>9,} lines: {elapsed:6.2f}s  ({count / elapsed:>9,.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
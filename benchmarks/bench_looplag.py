@@ -0,0 +1,67 @@
+"""
+Overhead of the event loop lag monitor.
+
+Measures ``LoopLagMonitor.record()`` and the time per ``GET /items/{id}``
+with and without a running monitor (100 ms interval, as configured by
+default), then blocks the loop once to show what a stall report holds.
+
+Usage:
+    python -m benchmarks.bench_looplag
+"""
+import asyncio
+import logging
+import time
+
+from opentelemetry import metrics
+
+from app.looplag import LoopLagMonitor
+from app.main import items_db
+from benchmarks.bench_profiling import per_request
+from benchmarks.bench_serialization import get
+from benchmarks.common import best_of, populate
+
+ITEMS = 1_000
+ROUNDS = 5
+
+
+async def run() -> None:
+    await get("/items/1")
+    meter = metrics.get_meter(__name__)
+    idle = LoopLagMonitor(meter)
+    record = best_of(lambda: idle.record(0.0012), number=10_000)
+    print(f"{'record()':<24}: {record:>7.2f} µs")
+
+    best = {"no monitor": float("inf"), "monitor running": float("inf")}
+    for round_ in range(ROUNDS):
+        # Alternate the order so neither configuration always runs first
+        for with_monitor in (False, True) if round_ % 2 else (True, False):
+            running = LoopLagMonitor(meter) if with_monitor else None
+            if running:
+                running.start()
+            label = "monitor running" if running else "no monitor"
+            best[label] = min(best[label], await per_request())
+            if running:
+                await running.stop()
+    for label, value in best.items():
+        print(f"{label:<24}: {value:>7.1f} µs/request")
+
+    running = LoopLagMonitor(meter)
+    running.start()
+    await asyncio.sleep(0.2)
+    time.sleep(0.5)
+    await asyncio.sleep(0.2)
+    await running.stop()
+    stall = running.report()["stalls"][0]
+    print(f"\nStall: blocked {stall['blocked_ms']:.0f} ms at capture, lag {stall['lag_ms']:.0f} ms")
+    print("  " + stall["stack"][-1])
+
+
+def main() -> None:
+    # The stall below is intentional; keep its log line out of the output
+    logging.getLogger("app.looplag").setLevel(logging.ERROR)
+    populate(items_db, ITEMS)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Bytes per item for the "memory" and "columnar" storage engines, and for the
+indexes the app can attach to a store.
+
+Measures traced allocations (tracemalloc) after loading the same items into
+each engine, so string payloads are included for both. Index costs are the
+extra bytes per item of a columnar store with that index attached.
+
+Usage:
+    python -m benchmarks.bench_memory [item_count]
+"""
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from app.indexes import ItemFilterIndex, ItemIndex, ItemSearchIndex, ItemVersionIndex
+from app.store import ItemStore, create_item_store
+from benchmarks.common import make_item
+
+BATCH = 10_000
+# Index and the setting that enables it in the app
+INDEXES = {
+    "ItemVersionIndex": (ItemVersionIndex, "always on"),
+    "ItemFilterIndex": (ItemFilterIndex, "SECONDARY_INDEXES"),
+    "ItemSearchIndex": (ItemSearchIndex, "SEARCH_INDEX"),
+}
+
+
+def measure(engine: str, count: int, index: type[ItemIndex] | None = None) -> float:
+    """Return traced bytes per item after loading ``count`` items."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = create_item_store(engine)
+    if index is not None:
+        store.add_index(index())
+
+    async def _fill(store: ItemStore) -> None:
+        for start in range(1, count + 1, BATCH):
+            await store.put_many([make_item(i) for i in range(start, min(start + BATCH, count + 1))])
+
+    asyncio.run(_fill(store))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del store
+    return used / count
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count:,} items")
+    results = {engine: measure(engine, count) for engine in ("memory", "columnar")}
+    for engine, per_item in results.items():
+        print(f"{engine:>9}: {per_item:7.1f} bytes/item  ({per_item * count / 2**20:7.1f} MiB)")
+    print(f"reduction: {results['memory'] / results['columnar']:.1f}x")
+    print()
+    for name, (index, setting) in INDEXES.items():
+        per_item = measure("columnar", count, index) - results["columnar"]
+        print(f"+ {name:<17}: {per_item:7.1f} bytes/item  ({per_item * count / 2**20:7.1f} MiB, {setting})")
+
+
+if __name__ == "__main__":
+    main()
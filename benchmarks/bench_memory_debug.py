@@ -0,0 +1,70 @@
+"""
+Cost of the /debug/memory tracing and snapshots.
+
+Measures the time per ``GET /items/{id}`` with tracemalloc off and tracing
+1 or 10 frames, then the time to take, summarize and diff snapshots of a
+store holding ``ITEMS`` items.
+
+Usage:
+    python -m benchmarks.bench_memory_debug
+"""
+import asyncio
+import time
+import tracemalloc
+
+from app.main import items_db
+from app.memory import MemoryProfiler
+from benchmarks.bench_profiling import per_request
+from benchmarks.common import populate
+
+ITEMS = 100_000
+ROUNDS = 3
+
+
+def timed(func, *args) -> tuple[float, object]:
+    """Return (milliseconds, result) of one call."""
+    started = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+async def run() -> None:
+    profiler = MemoryProfiler()
+    configurations = [("tracemalloc off", None), ("tracing 1 frame", 1), ("tracing 10 frames", 10)]
+    best = {label: float("inf") for label, _ in configurations}
+    for _ in range(ROUNDS):
+        for label, frames in configurations:
+            if frames:
+                profiler.start(frames)
+            best[label] = min(best[label], await per_request())
+            if frames:
+                profiler.stop()
+    for label, _ in configurations:
+        print(f"{label:<20}: {best[label]:>7.1f} µs/request")
+
+
+def snapshots() -> None:
+    profiler = MemoryProfiler()
+    print(f"\nSnapshots with {ITEMS:,} items traced (1 frame)")
+    profiler.start(1)
+    # Only allocations made while tracing are in the snapshots
+    populate(items_db, ITEMS)
+    elapsed, base = timed(profiler.take_snapshot)
+    print(f"{'take_snapshot()':<20}: {elapsed:>7.1f} ms ({tracemalloc.get_traced_memory()[0] / 1e6:.0f} MB traced)")
+    elapsed, _ = timed(profiler.top, base)
+    print(f"{'top(20)':<20}: {elapsed:>7.1f} ms")
+    populate(items_db, ITEMS // 10)
+    _, later = timed(profiler.take_snapshot)
+    elapsed, sites = timed(profiler.diff, later, base)
+    print(f"{'diff(20)':<20}: {elapsed:>7.1f} ms (top growth {sites[0]['size_diff_bytes'] / 1e6:.1f} MB)")
+    profiler.stop()
+
+
+def main() -> None:
+    populate(items_db, 1_000)
+    asyncio.run(run())
+    snapshots()
+
+
+if __name__ == "__main__":
+    main()
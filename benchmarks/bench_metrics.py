@@ -0,0 +1,100 @@
+"""
+Cost of serving ``GET /metrics`` and its effect on request latency.
+
+Attaches ``PrometheusMetricReader`` through ``configure_telemetry`` (no
+Azure Monitor connection string needed), fills it with HTTP server metrics
+plus ``SERIES`` synthetic histogram series, then measures one exposition
+with and without the cache, and the event loop time per item GET (scrapes
+included) while ``/metrics`` is scraped every ``SCRAPE_EVERY`` requests.
+
+Usage:
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+import time
+
+import app.main
+from app.main import items_db
+from app.prometheus import PrometheusMetricReader
+from app.telemetry import configure_telemetry
+from benchmarks.bench_export import percentile
+from benchmarks.bench_serialization import get
+from benchmarks.common import best_of, populate
+
+ITEMS = 1_000
+SERIES = 200
+REQUESTS = 5_000
+SCRAPE_EVERY = 10
+ROUNDS = 3
+
+
+async def serve(scrape: bool) -> tuple[float, list[float]]:
+    """
+    Serve REQUESTS item GETs, scraping /metrics every SCRAPE_EVERY requests.
+
+    Returns:
+        tuple: (loop time per item GET in µs, scrape latencies in µs)
+    """
+    scrapes = []
+    started = time.perf_counter()
+    for index in range(REQUESTS):
+        if scrape and index % SCRAPE_EVERY == 0:
+            scrape_started = time.perf_counter()
+            await get("/metrics")
+            scrapes.append((time.perf_counter() - scrape_started) * 1e6)
+        await get(f"/items/{index % ITEMS + 1}")
+    return (time.perf_counter() - started) / REQUESTS * 1e6, scrapes or [0.0]
+
+
+async def run(reader: PrometheusMetricReader) -> None:
+    # HTTP server series for a few routes and statuses
+    for index in range(200):
+        await get(f"/items/{index}")
+        await get("/items", "limit=5")
+
+    reader.cache_seconds = 0
+    size = len(reader.exposition())
+    uncached = best_of(reader.exposition, number=20)
+    reader.cache_seconds = 5
+    cached = best_of(reader.exposition, number=10_000)
+    print(f"Exposition: {size:,} bytes, {reader.collections} collections")
+    print(f"{'exposition() uncached':<28}: {uncached / 1000:>8.2f} ms")
+    print(f"{'exposition() cached':<28}: {cached:>8.2f} µs")
+
+    configurations = [
+        ("none", False, 5),
+        (f"every {SCRAPE_EVERY}, cached 5 s", True, 5),
+        (f"every {SCRAPE_EVERY}, uncached", True, 0),
+    ]
+    # Interleaved rounds, keeping the best, to even out machine noise
+    best: dict[str, tuple[float, list[float]]] = {}
+    for _ in range(ROUNDS):
+        for label, scrape, cache_seconds in configurations:
+            reader.cache_seconds = cache_seconds
+            result = await serve(scrape)
+            if label not in best or result[0] < best[label][0]:
+                best[label] = result
+
+    print(f"\n{'Scrapes':<28} {'µs/request':>11} {'scrape p50':>11} {'scrape p99':>11}")
+    for label, _, _ in configurations:
+        per_request, scrapes = best[label]
+        print(
+            f"{label:<28} {per_request:>11.0f} {percentile(scrapes, 0.5) / 1000:>9.2f}ms "
+            f"{percentile(scrapes, 0.99) / 1000:>9.2f}ms"
+        )
+
+
+def main() -> None:
+    populate(items_db, ITEMS)
+    reader = PrometheusMetricReader()
+    _, meter = configure_telemetry("bench", "1.0", metric_readers=[reader])
+    app.main.prometheus_reader = reader
+
+    histogram = meter.create_histogram("bench.latency", unit="ms")
+    for index in range(SERIES):
+        histogram.record(index % 50, {"route": f"/route/{index}", "status": 200})
+    asyncio.run(run(reader))
+
+
+if __name__ == "__main__":
+    main()
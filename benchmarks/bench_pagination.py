@@ -0,0 +1,48 @@
+"""
+Page latency of GET /items as the store grows.
+
+Compares the original ``list(items_db.values())[skip:skip + limit]`` slice
+with the store's keyset seek (``after_id``) and indexed offset (``skip``).
+
+Usage:
+    python -m benchmarks.bench_pagination
+"""
+import asyncio
+
+from app.store import InMemoryItemStore
+from benchmarks.common import best_of, populate
+
+SIZES = [1_000, 10_000, 100_000, 500_000]
+LIMIT = 100
+
+
+def main() -> None:
+    print(f"{'items':>9} | {'dict slice (us)':>15} | {'skip (us)':>10} | {'cursor (us)':>11}")
+    print("-" * 55)
+    for size in SIZES:
+        store = InMemoryItemStore()
+        populate(store, size)
+        middle = size // 2
+        loop = asyncio.new_event_loop()
+
+        legacy = best_of(
+            lambda store=store, middle=middle: list(store._items.values())[middle : middle + LIMIT],
+            number=10,
+        )
+        skip = best_of(
+            lambda loop=loop, store=store, middle=middle: loop.run_until_complete(
+                store.scan(skip=middle, limit=LIMIT)
+            )
+        )
+        cursor = best_of(
+            lambda loop=loop, store=store, middle=middle: loop.run_until_complete(
+                store.scan(after_id=middle, limit=LIMIT)
+            )
+        )
+        loop.close()
+
+        print(f"{size:>9} | {legacy:>15.1f} | {skip:>10.1f} | {cursor:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
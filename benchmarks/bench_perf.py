@@ -0,0 +1,73 @@
+"""
+Per-request overhead of the route latency middleware.
+
+Measures ``RouteLatencyRecorder.record`` on its own and the middleware
+wrapped around a trivial ASGI app (so the difference is only the
+middleware), plus the cost of building the ``/debug/perf`` report.
+
+Usage:
+    python -m benchmarks.bench_perf
+"""
+import asyncio
+import time
+
+from app.perf import RouteLatencyMiddleware, RouteLatencyRecorder
+from benchmarks.common import best_of
+
+REQUESTS = 50_000
+
+
+class Route:
+    path = "/items/{item_id}"
+
+
+async def endpoint(scope, receive, send) -> None:
+    """Trivial ASGI app standing in for the routed stack."""
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def per_request(app) -> float:
+    """Return the best per-request time in microseconds over three runs."""
+    scope = {"type": "http", "method": "GET", "path": "/items/1"}
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        pass
+
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            await app(dict(scope), receive, send)
+        best = min(best, (time.perf_counter() - started) / REQUESTS)
+    return best * 1e6
+
+
+async def run() -> None:
+    recorder = RouteLatencyRecorder()
+    record = best_of(lambda: recorder.record("GET", "/items/{item_id}", 200, 1234), number=REQUESTS)
+    print(f"{'recorder.record()':<28}: {record:>6.2f} µs")
+
+    bare = await per_request(endpoint)
+    wrapped = await per_request(RouteLatencyMiddleware(endpoint, RouteLatencyRecorder()))
+    print(f"{'Trivial ASGI app':<28}: {bare:>6.2f} µs/request")
+    print(f"{'  + RouteLatencyMiddleware':<28}: {wrapped:>6.2f} µs/request (+{wrapped - bare:.2f})")
+
+    # A report over 40 keys (routes x statuses) with full windows
+    for index in range(40):
+        for _ in range(100):
+            recorder.record("GET", f"/route/{index}", 200, 500 + index)
+    report = best_of(recorder.report, number=20)
+    print(f"{'report() with 40 keys':<28}: {report / 1000:>6.2f} ms")
+
+
+def main() -> None:
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Warm-restart cost: snapshot write and startup restore at 1,000,000 items.
+
+Restores into a bare store (no indexes), then into a store carrying the
+indexes the app attaches by default except full-text search, whose build
+cost is reported by bench_search. Also replays a 100,000-record WAL tail.
+
+Usage:
+    python -m benchmarks.bench_persistence
+"""
+import asyncio
+import gc
+import tempfile
+import time
+
+from app.indexes import ItemFilterIndex, ItemStatsIndex, ItemVersionIndex
+from app.persistence import ItemPersistence, read_snapshot
+from app.serialization import ItemJSONCache
+from app.store import create_item_store
+from benchmarks.common import make_item
+
+ITEMS = 1_000_000
+WAL_RECORDS = 100_000
+
+
+async def timed(label: str, coro) -> None:
+    start = time.perf_counter()
+    await coro
+    print(f"{label:<40}: {time.perf_counter() - start:>7.3f} s")
+
+
+async def restore(directory: str, engine: str, indexed: bool) -> None:
+    store = create_item_store(engine)
+    if indexed:
+        for index in (ItemStatsIndex(), ItemVersionIndex(), ItemFilterIndex(), ItemJSONCache()):
+            store.add_index(index)
+    persistence = ItemPersistence(directory)
+    await persistence.restore(store)
+    persistence.close()
+
+
+async def run(directory: str) -> None:
+    store = create_item_store()
+    persistence = ItemPersistence(directory)
+    await persistence.restore(store)
+    await store.put_many([make_item(item_id) for item_id in range(1, ITEMS + 1)])
+
+    await timed(f"snapshot {ITEMS:,} items", persistence.snapshot(store))
+
+    gc.disable()  # as restore() does
+    start = time.perf_counter()
+    read_snapshot(persistence.directory / "snapshot.bin")
+    print(f"{'read snapshot (mmap + decode)':<40}: {time.perf_counter() - start:>7.3f} s")
+    gc.enable()
+
+    for engine in ("memory", "columnar"):
+        await timed(f"restore -> {engine}", restore(directory, engine, indexed=False))
+    await timed("restore -> memory + default indexes", restore(directory, "memory", indexed=True))
+
+    # WAL tail: updates logged after the snapshot
+    store.add_index(persistence)
+    for start_id in range(1, WAL_RECORDS + 1, 1000):
+        await store.put_many([
+            {**make_item(item_id), "quantity": 0}
+            for item_id in range(ITEMS + start_id, ITEMS + start_id + 1000)
+        ])
+    await asyncio.sleep(0)
+    persistence.close()
+    await timed(f"restore -> memory (+{WAL_RECORDS:,} WAL records)", restore(directory, "memory", indexed=False))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+if __name__ == "__main__":
+    main()
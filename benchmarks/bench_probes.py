@@ -0,0 +1,93 @@
+"""
+Per-probe cost of the health and static endpoints, driven through the ASGI app.
+
+Compares the probe fast path with the regular stack (reached with an
+``Origin`` header, as a browser request would be), both untraced and with the
+request span the regular stack used to record for every probe. Spans go to an
+SDK tracer provider without exporters, so the traced row is a lower bound.
+
+Usage:
+    python -m benchmarks.bench_probes
+"""
+import asyncio
+import time
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+
+from app.main import app
+
+REQUESTS = 5_000
+ORIGIN = [(b"origin", b"http://bench")]
+
+
+async def get(path: str, headers: list[tuple[bytes, bytes]]) -> int:
+    """Send one GET through the ASGI app and return its status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    start: dict = {}
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+
+    await app(scope, receive, send)
+    return start["status"]
+
+
+async def cost(path: str, headers: list[tuple[bytes, bytes]]) -> float:
+    """Return the best per-request time in microseconds over three runs."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            await get(path, headers)
+        best = min(best, (time.perf_counter() - started) / REQUESTS)
+    return best * 1e6
+
+
+def tracing_middleware():
+    """Find the OpenTelemetry middleware inside the built stack."""
+    layer = app.middleware_stack
+    while not hasattr(layer, "excluded_urls"):
+        layer = layer.app
+    return layer
+
+
+async def run() -> None:
+    assert await get("/health", []) == 200
+    otel = tracing_middleware()
+    excluded_urls = otel.excluded_urls
+
+    print(f"{'Path':<14} {'fast path':>10} {'stack':>10} {'stack+span':>11}")
+    for path in ["/health", "/health/ready", "/health/live", "/info", "/"]:
+        fast = await cost(path, [])
+        stack = await cost(path, ORIGIN)
+        otel.excluded_urls = None
+        traced = await cost(path, ORIGIN)
+        otel.excluded_urls = excluded_urls
+        print(f"{path:<14} {fast:>8.1f}µs {stack:>8.1f}µs {traced:>9.1f}µs")
+
+
+def main() -> None:
+    trace.set_tracer_provider(TracerProvider())
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
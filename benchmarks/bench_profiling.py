@@ -0,0 +1,67 @@
+"""
+Overhead of the sampling profiler on request latency.
+
+Measures one ``StackSampler.sample()`` call, then the time per
+``GET /items/{id}`` while no profile runs and while a sampler thread samples
+every thread at the ``/debug/profile`` default (10 ms) and the per-request
+default (1 ms). Runs are interleaved and the best of ``ROUNDS`` is kept.
+
+Usage:
+    python -m benchmarks.bench_profiling
+"""
+import asyncio
+import threading
+import time
+
+from app.main import items_db
+from app.profiling import StackSampler
+from benchmarks.bench_serialization import get
+from benchmarks.common import best_of, populate
+
+ITEMS = 1_000
+REQUESTS = 5_000
+ROUNDS = 5
+
+
+async def per_request() -> float:
+    """Return the time per item GET in microseconds."""
+    started = time.perf_counter()
+    for index in range(REQUESTS):
+        await get(f"/items/{index % ITEMS + 1}")
+    return (time.perf_counter() - started) / REQUESTS * 1e6
+
+
+async def run() -> None:
+    await get("/items/1")
+    sampler = StackSampler()
+    sample = best_of(sampler.sample, number=1_000)
+    print(f"{'sample() over ' + str(threading.active_count()) + ' threads':<28}: {sample:>7.1f} µs")
+
+    configurations = [("no profile", None), ("sampling every 10 ms", 0.01), ("sampling every 1 ms", 0.001)]
+    best = {label: float("inf") for label, _ in configurations}
+    samples = {}
+    for _ in range(ROUNDS):
+        for label, interval in configurations:
+            sampler = StackSampler(interval) if interval else None
+            if sampler:
+                sampler.start()
+            try:
+                best[label] = min(best[label], await per_request())
+            finally:
+                if sampler:
+                    sampler.stop()
+                    samples[label] = sampler.samples
+
+    baseline = best["no profile"]
+    for label, _ in configurations:
+        extra = f"({(best[label] / baseline - 1) * 100:+.1f}%, {samples[label]:,} samples)" if label in samples else ""
+        print(f"{label:<28}: {best[label]:>7.1f} µs/request {extra}")
+
+
+def main() -> None:
+    populate(items_db, ITEMS)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
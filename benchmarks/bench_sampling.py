@@ -0,0 +1,82 @@
+"""
+Request overhead of tracing at different head-sampling ratios.
+
+Requests are driven through the ASGI app (as in ``bench_serialization``)
+while the OpenTelemetry middleware uses a tracer provider from
+``build_tracer_provider`` exporting to a local in-memory exporter, so the
+numbers cover span creation, sampling and batching but not network export.
+
+Usage:
+    python -m benchmarks.bench_sampling
+"""
+import asyncio
+import time
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.main import app, items_db
+from app.telemetry import build_tracer_provider
+from benchmarks.bench_serialization import get
+from benchmarks.common import populate
+
+ITEMS = 1_000
+REQUESTS = 1_000
+ROUNDS = 7
+
+
+def tracing_middleware():
+    """Find the OpenTelemetry middleware inside the built stack."""
+    layer = app.middleware_stack
+    while not hasattr(layer, "tracer"):
+        layer = layer.app
+    return layer
+
+
+async def cost() -> float:
+    """Return the per-request time in microseconds for one pass."""
+    started = time.perf_counter()
+    for item_id in range(REQUESTS):
+        await get(f"/items/{item_id % ITEMS + 1}")
+    return (time.perf_counter() - started) / REQUESTS * 1e6
+
+
+async def run() -> None:
+    await get("/items/1")
+    otel = tracing_middleware()
+
+    configs = [("Tracing off (no-op tracer)", None, trace.NoOpTracer())]
+    for label, ratio, errors in [
+        ("0% (errors recorded)", 0.0, True),
+        ("0% (errors off)", 0.0, False),
+        ("10%", 0.1, True),
+        ("100%", 1.0, True),
+    ]:
+        exporter = InMemorySpanExporter()
+        provider = build_tracer_provider(exporter, sample_ratio=ratio, sample_errors=errors)
+        configs.append((label, (provider, exporter), provider.get_tracer("bench")))
+
+    # Interleave configurations so machine noise hits all of them alike
+    best = {label: float("inf") for label, _, _ in configs}
+    for _ in range(ROUNDS):
+        for label, _, tracer in configs:
+            otel.tracer = tracer
+            best[label] = min(best[label], await cost())
+
+    baseline = best[configs[0][0]]
+    for label, pipeline, _ in configs:
+        line = f"{label:<30}: {best[label]:>7.1f} µs/request"
+        if pipeline is not None:
+            provider, exporter = pipeline
+            provider.shutdown()
+            line += f" (+{best[label] - baseline:.1f}), {len(exporter.get_finished_spans()):,} spans exported"
+        print(line)
+
+
+def main() -> None:
+    populate(items_db, ITEMS)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Full-text search latency and index memory at 1M items.
+
+Usage:
+    python -m benchmarks.bench_search [item_count]
+"""
+import sys
+import time
+
+from app.indexes import ItemSearchIndex
+from benchmarks.common import best_of, make_item
+
+WORDS = ["steel", "oak", "linen", "copper", "wool", "glass", "cedar", "brass", "silk", "clay"]
+QUERIES = ["424242", "copper", "copper wool", "oak 4242", "item", "item batch copper wool oak"]
+
+
+def described_item(item_id: int) -> dict:
+    """Benchmark item with a small vocabulary of material words."""
+    item = make_item(item_id)
+    words = (WORDS[item_id % 10], WORDS[item_id // 10 % 10], WORDS[item_id // 100 % 10])
+    item["description"] = f"Handmade from {' and '.join(words)}, batch {item_id // 1000}"
+    return item
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    index = ItemSearchIndex()
+    start = time.perf_counter()
+    for item_id in range(1, count + 1):
+        index.add(described_item(item_id))
+    print(f"indexed {count:,} items in {time.perf_counter() - start:.1f}s")
+
+    usage = index.memory_usage()
+    print(f"terms={usage['terms']:,} postings={usage['postings']:,} "
+          f"approx={usage['approx_bytes'] / 2**20:.0f} MiB")
+    print()
+    print(f"{'query':<28} | {'matches':>9} | {'top-10 (ms)':>11}")
+    print("-" * 54)
+    for query in QUERIES:
+        total, _ = index.search(query, limit=10)
+        latency = best_of(
+            lambda query=query: index.search(query, limit=10), repeat=3, number=3
+        ) / 1000
+        print(f"{query:<28} | {total:>9,} | {latency:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
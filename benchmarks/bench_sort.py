@@ -0,0 +1,78 @@
+"""
+Sorted listing: one page from the sorted secondary indexes versus a full sort,
+unfiltered and with a broad filter (``min_quantity=1``).
+
+Usage:
+    python -m benchmarks.bench_sort
+"""
+import asyncio
+
+from app.indexes import ItemFilterIndex
+from app.store import InMemoryItemStore
+from benchmarks.common import best_of, populate
+
+SIZES = [10_000, 100_000, 500_000]
+PAGE = 100
+FILTERS = {"min_quantity": 1}
+
+
+async def full_sort(store: InMemoryItemStore, field: str, filters: dict) -> list[int]:
+    keyed = []
+    async for chunk in store.iter_snapshot():
+        keyed.extend(
+            (ItemFilterIndex.sort_key(item, field), item["id"])
+            for item in chunk
+            if ItemFilterIndex.matches(item, **filters)
+        )
+    keyed.sort(reverse=True)
+    return [item_id for _, item_id in keyed[:PAGE]]
+
+
+def main() -> None:
+    print(
+        f"{'items':>9} | {'sort':<13} | {'filter':<14} | {'first (us)':>10} "
+        f"| {'deep (us)':>9} | {'full sort (ms)':>14}"
+    )
+    print("-" * 85)
+    for size in SIZES:
+        store = InMemoryItemStore()
+        index = ItemFilterIndex()
+        store.add_index(index)
+        populate(store, size)
+        loop = asyncio.new_event_loop()
+
+        for field in ("price", "total_value"):
+            for filters in ({}, FILTERS):
+                label = ",".join(f"{key}={value}" for key, value in filters.items()) or "-"
+                first = best_of(
+                    lambda index=index, field=field, filters=filters: index.sorted_page(
+                        field, True, limit=PAGE, **filters
+                    ),
+                    number=50,
+                )
+                # Seek to a cursor half-way through the ordering
+                middle = index.sorted_page(field, True, skip=size // 2, limit=1, **filters)[0]
+                item = loop.run_until_complete(store.get(middle))
+                after = (ItemFilterIndex.sort_key(item, field), middle)
+                deep = best_of(
+                    lambda index=index, field=field, after=after, filters=filters: index.sorted_page(
+                        field, True, after, limit=PAGE, **filters
+                    ),
+                    number=50,
+                )
+                scan = best_of(
+                    lambda loop=loop, store=store, field=field, filters=filters: loop.run_until_complete(
+                        full_sort(store, field, filters)
+                    ),
+                    repeat=2,
+                    number=1,
+                )
+                print(
+                    f"{size:>9} | -{field:<12} | {label:<14} | {first:>10.1f} "
+                    f"| {deep:>9.1f} | {scan / 1000:>14.1f}"
+                )
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+SQLite engine write throughput: sequential writes versus concurrent writes
+sharing group commits, plus read latency from the reader pool.
+
+Usage:
+    python -m benchmarks.bench_sqlite
+"""
+import asyncio
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.store import SQLiteItemStore
+from benchmarks.common import make_item
+
+WRITES = 2_000
+CONCURRENCY = [1, 10, 100]
+
+
+async def run(directory: str) -> None:
+    store = SQLiteItemStore(str(Path(directory) / "items.db"))
+
+    for concurrency in CONCURRENCY:
+        ids = await store.reserve_ids(WRITES)
+        pending = iter(ids)
+
+        async def writer(pending: Iterator[int] = pending) -> None:
+            for item_id in pending:
+                await store.put(make_item(item_id))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(writer() for _ in range(concurrency)))
+        rate = WRITES / (time.perf_counter() - start)
+        print(f"put, {concurrency:>3} concurrent writers : {rate:>8,.0f} items/s")
+
+    start = time.perf_counter()
+    for item_id in range(1, 1001):
+        await store.get(item_id)
+    print(f"get (sequential)               : {(time.perf_counter() - start) * 1000:>8.3f} ms/1000")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(store.scan(after_id=item_id, limit=100) for item_id in range(0, 5000, 50)))
+    print(f"100 concurrent scans (100 rows): {(time.perf_counter() - start) * 1000:>8.1f} ms")
+    store.close()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+
+
+if __name__ == "__main__":
+    main()
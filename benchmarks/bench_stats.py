@@ -0,0 +1,35 @@
+"""
+GET /items/stats cost: incremental aggregates versus a full recompute.
+
+Usage:
+    python -m benchmarks.bench_stats
+"""
+import asyncio
+import time
+
+from app.indexes import ItemStatsIndex
+from app.store import InMemoryItemStore
+from benchmarks.common import best_of, populate
+
+SIZES = [10_000, 100_000, 500_000]
+
+
+def main() -> None:
+    print(f"{'items':>9} | {'incremental (us)':>16} | {'recompute (ms)':>14}")
+    print("-" * 46)
+    for size in SIZES:
+        store = InMemoryItemStore()
+        stats = ItemStatsIndex()
+        store.add_index(stats)
+        populate(store, size)
+
+        incremental = best_of(stats.summary, number=1000)
+        start = time.perf_counter()
+        asyncio.run(ItemStatsIndex.recompute(store.iter_snapshot()))
+        recompute = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>9} | {incremental:>16.2f} | {recompute:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import asyncio
+import time
+from collections.abc import Callable
+
+from app.store import ItemStore
+
+
+def make_item(item_id: int) -> dict:
+    """Build a deterministic item dict for benchmarking."""
+    return {
+        "id": item_id,
+        "name": f"Item {item_id}",
+        "description": f"Benchmark item number {item_id}",
+        "price": 1.0 + (item_id % 1000) / 10,
+        "quantity": item_id % 50,
+    }
+
+
+def populate(store: ItemStore, count: int) -> None:
+    """Fill a store with ``count`` items through its public API."""
+
+    async def _fill() -> None:
+        for _ in range(count):
+            item_id = await store.next_id()
+            await store.put(make_item(item_id))
+
+    asyncio.run(_fill())
+
+
+def best_of(func: Callable[[], object], repeat: int = 5, number: int = 100) -> float:
+    """Return the best per-call time in microseconds over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
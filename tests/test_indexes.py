@@ -0,0 +1,316 @@
+"""
+Unit Tests for the secondary indexes maintained alongside item stores.
+"""
+import pytest
+
+from app import indexes
+from app.indexes import (
+    MAX_QUERY_TERMS,
+    ItemFilterIndex,
+    ItemSearchIndex,
+    ItemStatsIndex,
+    ItemVersionIndex,
+    tokenize,
+)
+from app.store import create_item_store
+from tests.test_store import make_item
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite"])
+def store(request, tmp_path):
+    """Provide a fresh store for each test, once per engine."""
+    options = {"path": str(tmp_path / "items.db")} if request.param == "sqlite" else {}
+    store = create_item_store(request.param, **options)
+    yield store
+    store.close()
+
+
+@pytest.mark.unit
+class TestItemStatsIndex:
+    """Tests for the incrementally maintained aggregates."""
+
+    async def test_stats_follow_writes(self, store):
+        """Test that puts, replacements and deletes update the aggregates."""
+        stats = ItemStatsIndex()
+        store.add_index(stats)
+
+        await store.put_many([
+            make_item(1, price=10.0, quantity=2),
+            make_item(2, price=5.0, quantity=0),
+            make_item(3, price=20.0, quantity=150),
+        ])
+        await store.put(make_item(2, price=7.5, quantity=1))
+        await store.delete(3)
+
+        summary = stats.summary()
+        assert summary["count"] == 2
+        assert summary["total_value"] == 27.5
+        assert summary["total_quantity"] == 3
+        assert summary["min_price"] == 7.5
+        assert summary["max_price"] == 10.0
+        assert summary["avg_price"] == 8.75
+        assert [bucket["count"] for bucket in summary["quantity_histogram"]] == [0, 1, 1, 0, 0, 0]
+
+    async def test_recompute_matches_incremental(self, store):
+        """Test that the full recompute agrees with the running aggregates."""
+        stats = ItemStatsIndex()
+        store.add_index(stats)
+        await store.put_many([
+            make_item(item_id, price=0.1 * item_id, quantity=item_id % 7) for item_id in range(1, 501)
+        ])
+        await store.delete_many(list(range(1, 501, 3)))
+
+        recomputed = await ItemStatsIndex.recompute(store.iter_snapshot(chunk_size=64))
+        incremental = stats.summary()
+        assert recomputed["count"] == incremental["count"]
+        assert recomputed["total_value"] == pytest.approx(incremental["total_value"])
+        assert recomputed["quantity_histogram"] == incremental["quantity_histogram"]
+        assert recomputed["min_price"] == incremental["min_price"]
+
+    async def test_empty_and_clear(self, store):
+        """Test that clearing the store resets the aggregates."""
+        stats = ItemStatsIndex()
+        store.add_index(stats)
+        await store.put(make_item(1))
+        store.clear()
+
+        summary = stats.summary()
+        assert summary["count"] == 0
+        assert summary["min_price"] is None
+        assert summary["avg_price"] is None
+
+    async def test_rebuild_indexes(self, store):
+        """Test attaching an index to a populated store and rebuilding it."""
+        await store.put_many([make_item(item_id) for item_id in range(1, 4)])
+        stats = ItemStatsIndex()
+        store.add_index(stats)
+        await store.rebuild_indexes()
+        assert stats.summary()["count"] == 3
+
+
+@pytest.mark.unit
+class TestItemFilterIndex:
+    """Tests for the sorted secondary indexes."""
+
+    @pytest.fixture
+    async def indexed(self, store):
+        """Store with a filter index and a spread of names, prices and quantities."""
+        index = ItemFilterIndex()
+        store.add_index(index)
+        names = ["Apple", "apricot", "Banana", "Blueberry", "cherry"]
+        await store.put_many([
+            make_item(item_id, names[item_id % 5], price=float(item_id), quantity=item_id % 4)
+            for item_id in range(1, 41)
+        ])
+        await store.delete_many([5, 10, 11])
+        return store, index
+
+    @pytest.mark.parametrize("filters", [
+        {"name_prefix": "ap"},
+        {"name_prefix": "B", "min_quantity": 2},
+        {"min_price": 7.5, "max_price": 20.0},
+        {"name_prefix": "cherry", "max_price": 30.0},
+        {"min_quantity": 3},
+        {"name_prefix": "zzz"},
+        {},
+    ])
+    async def test_query_matches_linear_scan(self, indexed, filters):
+        """Test that indexed queries return exactly what a linear scan would."""
+        store, index = indexed
+        expected = [
+            item["id"] for item in await store.scan() if ItemFilterIndex.matches(item, **filters)
+        ]
+        assert index.query(**filters) == expected
+
+    @pytest.mark.parametrize("filters", [
+        {"name_prefix": "ap"},
+        {"min_price": 7.5, "max_price": 20.0},
+        {"min_quantity": 1},
+        {"name_prefix": "b", "min_price": 0.0},
+        {},
+    ])
+    @pytest.mark.parametrize("walk_share", [1, 8])
+    async def test_query_page_walks_in_id_order(self, indexed, monkeypatch, filters, walk_share):
+        """Test that ID-ordered pages, walked or cached, follow the full query."""
+        _, index = indexed
+        monkeypatch.setattr(indexes, "_WALK_SHARE", walk_share)
+        expected = index.query(**filters)
+        seen, after_id = [], None
+        while page := index.query_page(**filters, after_id=after_id, limit=4):
+            seen.extend(page)
+            after_id = page[-1]
+        assert seen == expected
+        assert index.query_page(**filters, skip=2, limit=3) == expected[2:5]
+
+    async def test_query_page_sees_writes(self, indexed, monkeypatch):
+        """Test that cached selective matches are dropped on the next write."""
+        store, index = indexed
+        monkeypatch.setattr(indexes, "_WALK_SHARE", 1)
+        assert index.query_page(name_prefix="cherry") == [4, 9, 14, 19, 24, 29, 34, 39]
+        await store.put(make_item(41, "Cherry tomato"))
+        await store.delete(4)
+        assert index.query_page(name_prefix="cherry", after_id=30) == [34, 39, 41]
+
+    async def test_replace_updates_index(self, indexed):
+        """Test that replacing an item moves it between index ranges."""
+        store, index = indexed
+        await store.put(make_item(1, "Zucchini", price=1000.0))
+        assert index.query(name_prefix="zu") == [1]
+        assert 1 not in index.query(max_price=10.0)
+
+    @pytest.mark.parametrize("field", ItemFilterIndex.SORT_FIELDS)
+    @pytest.mark.parametrize("descending", [False, True])
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"name_prefix": "b"},
+        {"min_price": 12.0},
+        {"name_prefix": "c", "max_price": 30.0},
+        {"min_quantity": 1, "max_price": 25.0},
+    ])
+    @pytest.mark.parametrize("walk_share", [1, 8])
+    async def test_sorted_page_matches_full_sort(
+        self, indexed, monkeypatch, field, descending, filters, walk_share
+    ):
+        """Test that keyset-walking sorted pages, walked or sorted, yield a full sort, ties by ID."""
+        store, index = indexed
+        monkeypatch.setattr(indexes, "_WALK_SHARE", walk_share)
+        items = [item for item in await store.scan() if ItemFilterIndex.matches(item, **filters)]
+        expected = [
+            item["id"] for item in sorted(
+                items,
+                key=lambda item: (ItemFilterIndex.sort_key(item, field), item["id"]),
+                reverse=descending,
+            )
+        ]
+        seen, after = [], None
+        while page := index.sorted_page(field, descending, after, limit=4, **filters):
+            seen.extend(page)
+            last = await store.get(page[-1])
+            after = (ItemFilterIndex.sort_key(last, field), last["id"])
+        assert seen == expected
+
+        assert index.sorted_page(field, descending, skip=2, limit=3, **filters) == expected[2:5]
+
+
+@pytest.mark.unit
+class TestItemSearchIndex:
+    """Tests for the full-text inverted index."""
+
+    @pytest.fixture
+    async def indexed(self, store):
+        """Store with a search index over a few described items."""
+        index = ItemSearchIndex()
+        store.add_index(index)
+        await store.put_many([
+            {**make_item(1, "Red Apple"), "description": "Fresh fruit from the orchard"},
+            {**make_item(2, "Green Apple"), "description": "Sour apple, great for pie"},
+            {**make_item(3, "Banana"), "description": "Yellow fruit"},
+            {**make_item(4, "Apple Pie"), "description": None},
+        ])
+        return store, index
+
+    def test_tokenize(self):
+        """Test case folding and punctuation splitting."""
+        assert tokenize("Sour APPLE, great-for pies!") == ["sour", "apple", "great", "for", "pies"]
+        assert tokenize(None) == []
+
+    async def test_search_ranks_and_intersects(self, indexed):
+        """Test AND semantics and that extra occurrences rank higher."""
+        _, index = indexed
+        total, hits = index.search("apple")
+        assert total == 3
+        assert hits[0][0] == 2  # name and description both mention apple
+
+        total, hits = index.search("APPLE pie")
+        assert total == 2
+        assert {item_id for item_id, _ in hits} == {2, 4}
+
+        total, hits = index.search("fruit orchard")
+        assert (total, [item_id for item_id, _ in hits]) == (1, [1])
+        assert index.search("missing") == (0, [])
+        assert index.search("!!!") == (0, [])
+
+    async def test_search_pagination(self, indexed):
+        """Test skip/limit over ranked results, ties by ID."""
+        _, index = indexed
+        _, all_hits = index.search("apple", limit=10)
+        assert [item_id for item_id, _ in all_hits] == [2, 1, 4]
+        _, page = index.search("apple", limit=1, skip=1)
+        assert page == all_hits[1:2]
+
+    @pytest.mark.parametrize("query", ["apple", "apple fruit", "fruit pie apple"])
+    async def test_tier_walk_matches_scoring(self, store, monkeypatch, query):
+        """Test that ranking by tier combinations agrees with scoring each match."""
+        index = ItemSearchIndex()
+        store.add_index(index)
+        words = ["apple", "fruit", "pie"]
+        await store.put_many([
+            {
+                **make_item(item_id, words[item_id % 3].title()),
+                "description": " ".join(words[: item_id % 4] * (item_id % 5)),
+            }
+            for item_id in range(1, 301)
+        ])
+        scored = index.search(query, limit=20, skip=5)
+        monkeypatch.setattr(indexes, "_SCORED_MATCHES", 0)
+        walked = index.search(query, limit=20, skip=5)
+        assert walked[0] == scored[0]
+        assert [score for _, score in walked[1]] == pytest.approx([score for _, score in scored[1]])
+        monkeypatch.setattr(indexes, "_WALKED_COMBINATIONS", 1)
+        fallback = index.search(query, limit=20, skip=5)
+        assert [score for _, score in fallback[1]] == pytest.approx([score for _, score in scored[1]])
+        assert fallback[1] == sorted(fallback[1], key=lambda hit: (-hit[1], hit[0]))
+
+    async def test_search_many_terms(self, store):
+        """Test that long queries stay cheap and are capped."""
+        index = ItemSearchIndex()
+        store.add_index(index)
+        words = [f"word{n}" for n in range(MAX_QUERY_TERMS)]
+        await store.put_many([
+            {**make_item(item_id, "Widget"), "description": " ".join(words[: item_id % 4 + 13])}
+            for item_id in range(1, 2001)
+        ])
+        total, hits = index.search(" ".join(words), limit=3)
+        assert total == 500
+        assert [item_id for item_id, _ in hits] == [3, 7, 11]
+        with pytest.raises(ValueError):
+            index.search(" ".join(words + ["widget"]))
+
+    async def test_delete_and_memory_usage(self, indexed):
+        """Test that deletes drop postings and empty terms."""
+        store, index = indexed
+        await store.delete(3)
+        assert index.search("banana") == (0, [])
+        usage = index.memory_usage()
+        assert usage["documents"] == 3
+        assert usage["approx_bytes"] > 0
+        assert "banana" not in index._postings
+
+
+@pytest.mark.unit
+class TestItemVersionIndex:
+    """Tests for the ETag version counters."""
+
+    async def test_versions_follow_writes(self, store):
+        """Test that item ETags change only when that item is written."""
+        versions = ItemVersionIndex()
+        store.add_index(versions)
+        await store.put_many([make_item(1), make_item(2)])
+
+        first, other = versions.item_etag(1), versions.item_etag(2)
+        listing = versions.store_etag("limit=10")
+        assert first != other
+        assert versions.store_etag("limit=10") == listing
+        assert versions.store_etag("limit=20") != listing
+
+        await store.put(make_item(1, "Changed"))
+        assert versions.item_etag(1) != first
+        assert versions.item_etag(2) == other
+        assert versions.store_etag("limit=10") != listing
+
+        await store.delete(1)
+        assert versions.item_etag(1) is None
+
+    def test_epoch_distinguishes_processes(self):
+        """Test that fresh indexes at the same version issue different ETags."""
+        assert ItemVersionIndex().store_etag() != ItemVersionIndex().store_etag()
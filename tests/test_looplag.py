@@ -0,0 +1,79 @@
+"""
+Unit Tests for the event loop lag monitor.
+"""
+import asyncio
+import time
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from app.looplag import LoopLagMonitor
+
+
+def block_loop(seconds: float) -> None:
+    """Blocking call the monitor should find."""
+    time.sleep(seconds)
+
+
+def make_monitor(**options) -> tuple[LoopLagMonitor, InMemoryMetricReader]:
+    """Build a monitor recording to an in-memory metric reader."""
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter(__name__)
+    return LoopLagMonitor(meter, **options), reader
+
+
+def metric_points(reader: InMemoryMetricReader) -> dict:
+    """Return {metric name: first data point}."""
+    points = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points[metric.name] = metric.data.data_points[0]
+    return points
+
+
+@pytest.mark.unit
+class TestLoopLagMonitor:
+    """Tests for lag measurement and stall capture."""
+
+    async def test_measures_lag(self):
+        """Test that an idle loop records small lag and no stalls."""
+        monitor, reader = make_monitor(interval=0.01, threshold=0.2)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        report = monitor.report()
+        assert report["lag"]["count"] >= 3
+        assert report["lag"]["p50_ms"] < 50
+        assert report["stalls"] == []
+        points = metric_points(reader)
+        assert points["app.eventloop.lag"].count == report["lag"]["count"]
+        assert "app.eventloop.stalls" not in points
+
+    async def test_captures_blocking_call(self):
+        """Test that a blocking call is caught with its stack and resolved lag."""
+        monitor, reader = make_monitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        block_loop(0.3)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+        report = monitor.report()
+        assert len(report["stalls"]) == 1
+        stall = report["stalls"][0]
+        assert stall["stack"][-1].endswith("in block_loop")
+        assert any(line.endswith("in test_captures_blocking_call") for line in stall["stack"])
+        assert 50 <= stall["blocked_ms"] <= stall["lag_ms"]
+        assert stall["lag_ms"] >= 200
+        assert report["lag"]["max_ms"] >= 200
+        assert metric_points(reader)["app.eventloop.stalls"].value == 1
+
+    async def test_stalls_are_bounded(self):
+        """Test that only the latest stalls are kept, newest first."""
+        monitor, _ = make_monitor(keep=2)
+        for blocked in (0.1, 0.2, 0.3):
+            monitor.capture(blocked)
+        assert [stall["blocked_ms"] for stall in monitor.report()["stalls"]] == [300, 200]
@@ -36,6 +36,43 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "alive"
 
+    def test_readiness_check_shutting_down(self, client, monkeypatch):
+        """Test that the readiness probe fails once shutdown has started."""
+        monkeypatch.setattr("app.main.shutdown_event", True)
+        for headers in ({}, {"Origin": "http://example.com"}):
+            response = client.get("/health/ready", headers=headers)
+            assert response.status_code == 503
+            assert response.json() == {"detail": "Application is shutting down"}
+
+    @pytest.mark.parametrize("path", ["/health", "/health/ready", "/health/live", "/info", "/"])
+    def test_probe_fast_path_matches_routes(self, client, path):
+        """Test that fast path payloads equal the documented route responses."""
+        fast = client.get(path)
+        # Requests with an Origin header go through CORS and the regular route
+        routed = client.get(path, headers={"Origin": "http://example.com"})
+        assert "access-control-allow-origin" not in fast.headers
+        assert "access-control-allow-origin" in routed.headers
+        assert fast.status_code == routed.status_code == 200
+        assert fast.headers["content-type"] == routed.headers["content-type"]
+        fast_data, routed_data = fast.json(), routed.json()
+        assert fast_data.keys() == routed_data.keys()
+        # Health timestamps differ between the two requests
+        fast_data.pop("timestamp", None)
+        routed_data.pop("timestamp", None)
+        assert fast_data == routed_data
+
+    def test_probes_are_not_traced(self):
+        """Test that probe URLs are excluded from tracing and other URLs are not."""
+        from opentelemetry.util.http import ExcludeList, parse_excluded_urls
+        from app.main import PROBE_PATHS
+        from app.probes import probe_excluded_urls
+
+        excluded: ExcludeList = parse_excluded_urls(probe_excluded_urls(PROBE_PATHS))
+        for path in PROBE_PATHS:
+            assert excluded.url_disabled(f"http://testserver{path}")
+        for path in ["/items", "/items/1", "/healthz", "/items/search/health", "/info/x"]:
+            assert not excluded.url_disabled(f"http://testserver{path}")
+
 
 @pytest.mark.unit
 class TestInfoEndpoint:
@@ -113,6 +150,57 @@ class TestItemsEndpoints:
         response = client.post("/items", json=item_data)
         assert response.status_code == 422
     
+    def test_create_items_batch(self, client, sample_items):
+        """Test bulk creation from a JSON array."""
+        response = client.post("/items/batch", json=sample_items)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == len(sample_items)
+        assert data["failed"] == 0
+        ids = [result["item"]["id"] for result in data["results"]]
+        assert ids == sorted(ids) and len(set(ids)) == len(ids)
+        assert len(client.get("/items").json()) == len(sample_items)
+    
+    def test_create_items_batch_partial_failure(self, client):
+        """Test that invalid entries are reported without failing the batch."""
+        payload = [
+            {"name": "Good", "price": 1.0},
+            {"name": "", "price": -1},
+            {"name": "Also Good", "price": 2.0},
+        ]
+        response = client.post("/items/batch", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 1
+        assert [r["status"] for r in data["results"]] == ["created", "error", "created"]
+        assert "name" in data["results"][1]["error"]
+    
+    def test_create_items_batch_ndjson(self, client):
+        """Test bulk creation from NDJSON, including a malformed line."""
+        body = '{"name": "A", "price": 1.0}\nnot json\n\n{"name": "B", "price": 2.0}\n'
+        response = client.post(
+            "/items/batch",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["results"][1]["status"] == "error"
+    
+    def test_create_items_batch_invalid_body(self, client):
+        """Test that a non-array body is rejected."""
+        response = client.post("/items/batch", json={"name": "A", "price": 1.0})
+        assert response.status_code == 400
+    
+    def test_create_items_batch_too_large(self, client, monkeypatch):
+        """Test that batches over max_batch_size are rejected."""
+        from app.main import settings
+        monkeypatch.setattr(settings, "max_batch_size", 2)
+        response = client.post("/items/batch", json=[{"name": "A", "price": 1.0}] * 3)
+        assert response.status_code == 413
+    
     def test_list_items_empty(self, client):
         """Test listing items when database is empty."""
         response = client.get("/items")
@@ -146,11 +234,329 @@ class TestItemsEndpoints:
         assert response.status_code == 200
         assert len(response.json()) == 2
     
+    def test_list_items_cursor_pagination(self, client):
+        """Test walking all pages with the opaque X-Next-Cursor header."""
+        for i in range(5):
+            client.post("/items", json={"name": f"Item {i}", "price": 10.0})
+        
+        seen = []
+        response = client.get("/items?limit=2")
+        while True:
+            assert response.status_code == 200
+            seen.extend(item["id"] for item in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            response = client.get(f"/items?limit=2&cursor={cursor}")
+        
+        assert len(seen) == 5
+        assert seen == sorted(seen)
+    
+    def test_list_items_after_id(self, client):
+        """Test seeking past a known ID with after_id."""
+        ids = [
+            client.post("/items", json={"name": f"Item {i}", "price": 10.0}).json()["id"]
+            for i in range(4)
+        ]
+        
+        response = client.get(f"/items?after_id={ids[1]}")
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()] == ids[2:]
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_list_items_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected."""
+        response = client.get("/items?cursor=not-a-cursor")
+        assert response.status_code == 400
+    
+    def test_list_items_by_ids(self, client, created_items):
+        """Test bulk fetch with ids=..., reporting unknown IDs in a header."""
+        ids = [item["id"] for item in created_items]
+        response = client.get(f"/items?ids={ids[2]},{ids[0]},99999")
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()] == [ids[2], ids[0]]
+        assert response.headers["X-Missing-Ids"] == "99999"
+    
+    def test_list_items_invalid_ids(self, client):
+        """Test that a malformed ids list is rejected."""
+        response = client.get("/items?ids=1,abc")
+        assert response.status_code == 400
+    
+    def test_lookup_items(self, client, created_items):
+        """Test bulk fetch through the POST body variant."""
+        ids = [item["id"] for item in created_items]
+        response = client.post("/items/lookup", json={"ids": [*ids, 99999, ids[0]]})
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["id"] for item in data["items"]] == ids
+        assert data["missing"] == [99999]
+    
+    def test_delete_items(self, client, created_items):
+        """Test bulk delete, reporting unknown IDs."""
+        ids = [item["id"] for item in created_items]
+        response = client.request("DELETE", "/items", json={"ids": [ids[0], ids[1], 99999]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["deleted"] == ids[:2]
+        assert data["missing"] == [99999]
+        assert [item["id"] for item in client.get("/items").json()] == ids[2:]
+    
+    def test_delete_items_empty_list(self, client):
+        """Test that an empty ID list is a validation error."""
+        response = client.request("DELETE", "/items", json={"ids": []})
+        assert response.status_code == 422
+    
+    def test_export_items_ndjson(self, client, created_items):
+        """Test streaming export as NDJSON matches the ItemResponse shape."""
+        import json
+        response = client.get("/items/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        assert exported == created_items
+    
+    def test_export_items_csv(self, client, created_items):
+        """Test streaming export as CSV."""
+        response = client.get("/items/export?format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.splitlines()
+        assert lines[0] == "id,name,description,price,quantity,total_value"
+        assert len(lines) == len(created_items) + 1
+    
+    def test_export_items_empty(self, client):
+        """Test exporting an empty store."""
+        response = client.get("/items/export")
+        assert response.status_code == 200
+        assert response.text == ""
+    
+    def test_import_items_roundtrip(self, client, created_items):
+        """Test that an export can be re-imported as-is, keeping IDs."""
+        from app.main import items_db
+        dump = client.get("/items/export").content
+        items_db.clear()
+        
+        response = client.post(
+            "/items/import",
+            content=dump,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        summary = response.json()
+        assert summary["imported"] == len(created_items)
+        assert summary["failed"] == 0
+        assert client.get("/items").json() == created_items
+    
+    def test_import_items_repeated_ids(self, client):
+        """Test that an ID repeated within a batch is stored and counted once."""
+        body = b"\n".join([
+            b'{"name": "First", "price": 1.0, "id": 7}',
+            b'{"name": "Other", "price": 1.0}',
+            b'{"name": "Last", "price": 2.0, "id": 7}',
+        ])
+        
+        response = client.post("/items/import", content=body)
+        assert response.status_code == 200
+        assert response.json()["imported"] == 2
+        assert client.get("/items/7").json()["name"] == "Last"
+        assert client.get("/items/stats").json()["count"] == 2
+    
+    def test_import_items_mixed_keyed_and_unkeyed(self, client):
+        """Test that unkeyed lines never take the ID of a keyed line in the same batch."""
+        body = b"\n".join([
+            b'{"name": "Keyed", "price": 1.0, "id": 1}',
+            b'{"name": "Unkeyed", "price": 2.0}',
+        ])
+        
+        response = client.post("/items/import", content=body)
+        assert response.status_code == 200
+        assert response.json()["imported"] == 2
+        assert client.get("/items/1").json()["name"] == "Keyed"
+        assert client.get("/items/stats").json()["count"] == 2
+        assert [item["name"] for item in client.get("/items").json()] == ["Keyed", "Unkeyed"]
+    
+    def test_import_items_streamed_with_errors(self, client, monkeypatch):
+        """Test a chunked upload with bad lines, split lines and small batches."""
+        from app.main import settings
+        monkeypatch.setattr(settings, "import_batch_size", 2)
+        monkeypatch.setattr(settings, "import_max_line_bytes", 64)
+        
+        def body():
+            yield b'{"name": "A", "pr'
+            yield b'ice": 1.0}\n{"name": "", "price": 1.0}\nnot json\n'
+            yield b'{"name": "' + b"x" * 100
+            yield b'", "price": 1.0}\n\n{"name": "B", "price": 2.0, "id": 500}\n'
+            yield b'{"name": "C", "price": 3.0}'
+        
+        response = client.post("/items/import", content=body())
+        assert response.status_code == 200
+        summary = response.json()
+        assert summary["lines"] == 6
+        assert summary["imported"] == 3
+        assert summary["failed"] == 3
+        assert sorted(error["line"] for error in summary["errors"]) == [2, 3, 4]
+        assert client.get("/items/500").json()["name"] == "B"
+    
+    def test_item_stats(self, client, created_items):
+        """Test aggregate stats, incremental and recomputed."""
+        response = client.get("/items/stats")
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["count"] == len(created_items)
+        assert stats["total_value"] == sum(item["total_value"] for item in created_items)
+        assert stats["min_price"] == 10.0
+        assert stats["max_price"] == 30.0
+        assert stats["source"] == "incremental"
+        
+        recomputed = client.get("/items/stats?recompute=true").json()
+        assert recomputed["source"] == "recomputed"
+        assert recomputed["total_value"] == stats["total_value"]
+    
+    def test_list_items_filtered(self, client):
+        """Test name prefix, price range and quantity filters."""
+        for name, price, quantity in [
+            ("Widget", 5.0, 1), ("widget XL", 15.0, 0), ("Gadget", 10.0, 5), ("Wrench", 12.0, 7),
+        ]:
+            client.post("/items", json={"name": name, "price": price, "quantity": quantity})
+        
+        def names(url):
+            return [item["name"] for item in client.get(url).json()]
+        
+        assert names("/items?name_prefix=wid") == ["Widget", "widget XL"]
+        assert names("/items?min_price=10&max_price=12") == ["Gadget", "Wrench"]
+        assert names("/items?name_prefix=w&min_quantity=1") == ["Widget", "Wrench"]
+        assert names("/items?name_prefix=nothing") == []
+    
+    def test_list_items_filtered_pagination(self, client, monkeypatch):
+        """Test cursor paging over a filtered listing, with and without indexes."""
+        for i in range(10):
+            client.post("/items", json={"name": f"Item {i}", "price": float(i + 1)})
+        
+        def walk():
+            seen, url = [], "/items?min_price=3&limit=3"
+            while url:
+                response = client.get(url)
+                seen.extend(item["price"] for item in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                url = cursor and f"/items?min_price=3&limit=3&cursor={cursor}"
+            return seen
+        
+        assert walk() == [float(p) for p in range(3, 11)]
+        monkeypatch.setattr("app.main.item_filters", None)
+        assert walk() == [float(p) for p in range(3, 11)]
+    
+    def test_list_items_sorted(self, client, monkeypatch):
+        """Test sorted listing and cursor paging, with and without indexes."""
+        for name, price, quantity in [
+            ("banana", 3.0, 10), ("Apple", 5.0, 1), ("cherry", 1.0, 2), ("apricot", 5.0, 4),
+        ]:
+            client.post("/items", json={"name": name, "price": price, "quantity": quantity})
+        
+        def walk(query):
+            seen, url = [], f"/items?{query}&limit=1"
+            while url:
+                response = client.get(url)
+                assert response.status_code == 200
+                seen.extend(item["name"] for item in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                url = cursor and f"/items?{query}&limit=1&cursor={cursor}"
+            return seen
+        
+        for _ in range(2):
+            assert walk("sort=name") == ["Apple", "apricot", "banana", "cherry"]
+            assert walk("sort=-price") == ["apricot", "Apple", "banana", "cherry"]
+            assert walk("sort=-total_value&min_price=2") == ["banana", "apricot", "Apple"]
+            monkeypatch.setattr("app.main.item_filters", None)
+        
+        assert client.get("/items?sort=quantity").status_code == 422
+    
+    def test_list_items_sorted_cursor_mismatch(self, client):
+        """Test that a cursor only works with the ordering that issued it."""
+        for i in range(3):
+            client.post("/items", json={"name": f"Item {i}", "price": 1.0})
+        
+        cursor = client.get("/items?sort=price&limit=1").headers["X-Next-Cursor"]
+        assert client.get(f"/items?sort=price&cursor={cursor}").status_code == 200
+        assert client.get(f"/items?sort=name&cursor={cursor}").status_code == 400
+        assert client.get(f"/items?cursor={cursor}").status_code == 400
+        
+        id_cursor = client.get("/items?limit=1").headers["X-Next-Cursor"]
+        assert client.get(f"/items?sort=price&cursor={id_cursor}").status_code == 400
+        # after_id is an ID-order position; sorted pages only resume from a cursor
+        response = client.get("/items?sort=price&after_id=1")
+        assert response.status_code == 400
+        assert "cursor" in response.json()["detail"]
+    
+    def test_get_item_conditional(self, client):
+        """Test ETag and If-None-Match on a single item."""
+        item_id = client.post("/items", json={"name": "Widget", "price": 1.0}).json()["id"]
+        
+        response = client.get(f"/items/{item_id}")
+        etag = response.headers["ETag"]
+        assert etag.startswith('"')
+        
+        response = client.get(f"/items/{item_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        
+        assert client.get(f"/items/{item_id}", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+        assert client.get(f"/items/{item_id}", headers={"If-None-Match": '"other"'}).status_code == 200
+        
+        # Other writes leave the item's ETag valid; deleting it does not
+        client.post("/items", json={"name": "Gadget", "price": 2.0})
+        assert client.get(f"/items/{item_id}", headers={"If-None-Match": etag}).status_code == 304
+        client.delete(f"/items/{item_id}")
+        assert client.get(f"/items/{item_id}", headers={"If-None-Match": etag}).status_code == 404
+    
+    def test_list_items_conditional(self, client):
+        """Test that list ETags depend on the query and change on any write."""
+        client.post("/items", json={"name": "Widget", "price": 1.0})
+        
+        etag = client.get("/items?limit=5&skip=0").headers["ETag"]
+        assert client.get("/items?skip=0&limit=5", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/items?limit=6", headers={"If-None-Match": etag}).status_code == 200
+        
+        client.post("/items", json={"name": "Gadget", "price": 2.0})
+        response = client.get("/items?limit=5&skip=0", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        assert response.headers["ETag"] != etag
+    
+    def test_search_items(self, client):
+        """Test full-text search over names and descriptions."""
+        client.post("/items", json={"name": "Blue Mug", "description": "Ceramic coffee mug", "price": 8.0})
+        client.post("/items", json={"name": "Coffee Beans", "description": "Dark roast", "price": 12.0})
+        client.post("/items", json={"name": "Teapot", "price": 20.0})
+        
+        response = client.get("/items/search?q=coffee")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 2
+        assert data["results"][0]["item"]["name"] == "Coffee Beans"
+        assert data["results"][0]["score"] > data["results"][1]["score"]
+        
+        assert client.get("/items/search?q=coffee mug").json()["total"] == 1
+        assert client.get("/items/search?q=").status_code == 422
+        terms = " ".join(f"term{n}" for n in range(17))
+        assert client.get(f"/items/search?q={terms}").status_code == 400
+    
+    def test_search_index_stats(self, client, created_item):
+        """Test search index size reporting."""
+        response = client.get("/items/search/stats")
+        assert response.status_code == 200
+        assert response.json()["documents"] == 1
+    
+    def test_search_disabled(self, client, monkeypatch):
+        """Test that search reports 503 when the index is disabled."""
+        monkeypatch.setattr("app.main.item_search", None)
+        assert client.get("/items/search?q=anything").status_code == 503
+    
     def test_get_item(self, client):
         """Test getting a specific item."""
         # Create an item first
         create_response = client.post(
-            "/items", 
+            "/items",
             json={"name": "Test Item", "price": 15.0}
         )
         item_id = create_response.json()["id"]
@@ -203,6 +609,21 @@ class TestOpenAPI:
         assert "info" in schema
         assert "paths" in schema
     
+    def test_item_response_schema_documented(self, client):
+        """Test that pre-encoded item endpoints still document their response models."""
+        paths = client.get("/openapi.json").json()["paths"]
+        
+        def schema(path, method):
+            return paths[path][method]["responses"]
+        
+        assert schema("/items/{item_id}", "get")["200"]["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/ItemResponse"
+        }
+        assert schema("/items", "get")["200"]["content"]["application/json"]["schema"]["items"] == {
+            "$ref": "#/components/schemas/ItemResponse"
+        }
+        assert "201" in schema("/items", "post")
+    
     def test_docs_available(self, client):
         """Test that Swagger UI is accessible."""
         response = client.get("/docs")
@@ -212,3 +633,214 @@ class TestOpenAPI:
         """Test that ReDoc is accessible."""
         response = client.get("/redoc")
         assert response.status_code == 200
+
+
+@pytest.mark.unit
+class TestMetricsEndpoint:
+    """Tests for the Prometheus scrape endpoint."""
+
+    def test_metrics_disabled(self, client):
+        """Test that the endpoint is off by default."""
+        response = client.get("/metrics")
+        assert response.status_code == 503
+        assert "PROMETHEUS_METRICS" in response.json()["detail"]
+
+    def test_metrics_exposition(self, client, monkeypatch):
+        """Test that the reader's exposition is served as Prometheus text."""
+        from opentelemetry.sdk.metrics import MeterProvider
+        from app.prometheus import PrometheusMetricReader
+
+        reader = PrometheusMetricReader()
+        provider = MeterProvider(metric_readers=[reader])
+        provider.get_meter("test").create_counter("app.items.created").add(3)
+        monkeypatch.setattr("app.main.prometheus_reader", reader)
+        response = client.get("/metrics")
+        provider.shutdown()
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+        assert "app_items_created_total 3" in response.text
+
+
+@pytest.mark.unit
+class TestPerfEndpoint:
+    """Tests for the in-process latency endpoint."""
+
+    def test_perf_reports_route_templates(self, client, created_item):
+        """Test that requests are grouped by route template and status."""
+        client.get(f"/items/{created_item['id']}")
+        client.get("/items/999999")
+        client.get("/no/such/path/12345")
+        client.request("FROBNICATE", f"/items/{created_item['id']}")
+        client.request("XYZZY", f"/items/{created_item['id']}")
+        response = client.get("/debug/perf")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["uptime_s"] >= 0
+
+        routes = {(entry["method"], entry["route"], entry["status"]): entry for entry in data["routes"]}
+        assert ("GET", "/items/{item_id}", 200) in routes
+        assert ("GET", "/items/{item_id}", 404) in routes
+        assert ("GET", "(unmatched)", 404) in routes
+        assert not any("12345" in route for _, route, _ in routes)
+        assert ("OTHER", "/items/{item_id}", 405) in routes
+        assert not any(method in ("FROBNICATE", "XYZZY") for method, _, _ in routes)
+        window = routes["POST", "/items", 201]["windows"]["60s"]
+        assert window["count"] >= 1
+        assert 0 < window["p50_ms"] <= window["p99_ms"] <= window["max_ms"]
+
+    def test_perf_disabled(self, client, monkeypatch):
+        """Test the endpoint when latency histograms are disabled."""
+        monkeypatch.setattr("app.main.route_latency", None)
+        assert client.get("/debug/perf").status_code == 503
+
+
+@pytest.mark.unit
+class TestLoopEndpoint:
+    """Tests for the event loop lag endpoint."""
+
+    def test_loop_lag(self, client):
+        """Test that the monitor runs by default and reports its settings."""
+        response = client.get("/debug/loop")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["interval_ms"] == 100
+        assert data["threshold_ms"] == 100
+        assert data["lag"]["count"] >= 0
+        assert isinstance(data["stalls"], list)
+
+    def test_loop_lag_disabled(self, client, monkeypatch):
+        """Test the endpoint when the monitor is disabled."""
+        monkeypatch.setattr("app.main.loop_monitor", None)
+        assert client.get("/debug/loop").status_code == 503
+
+
+@pytest.mark.unit
+class TestProfileEndpoint:
+    """Tests for the sampling profiler endpoints."""
+
+    @pytest.fixture
+    def profiler(self, monkeypatch):
+        """Enable profiling for one test."""
+        from app.profiling import Profiler
+
+        profiler = Profiler(interval=0.005)
+        monkeypatch.setattr("app.main.profiler", profiler)
+        return profiler
+
+    def test_profile_disabled(self, client):
+        """Test that profiling is off by default."""
+        assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 503
+        assert client.get("/debug/profile/requests/abc").status_code == 503
+
+    def test_profile(self, client, profiler):
+        """Test that a profile returns collapsed stacks."""
+        response = client.get("/debug/profile", params={"seconds": 0.2, "idle": True})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["x-profile-samples"]) > 0
+        for line in response.text.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert ";" in stack and int(count) > 0
+        assert not profiler.active
+
+    def test_profile_limits(self, client, profiler):
+        """Test the duration limit and the one-profile-at-a-time guard."""
+        from app.main import settings
+
+        response = client.get("/debug/profile", params={"seconds": settings.profiling_max_seconds + 1})
+        assert response.status_code == 422
+        sampler = profiler.begin()
+        try:
+            assert client.get("/debug/profile", params={"seconds": 0.1}).status_code == 409
+        finally:
+            profiler.end(sampler)
+
+    def test_request_profile(self, client, profiler):
+        """Test fetching a stored per-request profile."""
+        from app.profiling import StackSampler
+
+        sampler = StackSampler(idle=True)
+        sampler.sample()
+        profile_id = profiler.keep_request_profile(sampler)
+        response = client.get(f"/debug/profile/requests/{profile_id}")
+        assert response.status_code == 200
+        assert response.text == sampler.collapsed()
+        assert client.get("/debug/profile/requests/unknown").status_code == 404
+
+    def test_debug_token(self, client, profiler, monkeypatch):
+        """Test that a DEBUG_TOKEN guards the debug endpoints."""
+        from app.main import settings
+        monkeypatch.setattr(settings, "debug_token", "s3cret")
+
+        for path in ("/debug/perf", "/debug/profile/requests/abc", "/debug/memory"):
+            assert client.get(path).status_code == 401
+            assert client.get(path, headers={"X-Debug-Token": "wrong"}).status_code == 401
+        assert client.get("/debug/perf", headers={"X-Debug-Token": "s3cret"}).status_code == 200
+        assert client.get("/debug/profile/requests/abc", headers={"X-Debug-Token": "s3cret"}).status_code == 404
+
+
+@pytest.mark.unit
+class TestMemoryEndpoints:
+    """Tests for the tracemalloc endpoints."""
+
+    @pytest.fixture
+    def memory_profiler(self, monkeypatch):
+        """Enable memory debugging for one test, stopping tracemalloc afterwards."""
+        import tracemalloc
+        from app.memory import MemoryProfiler
+
+        profiler = MemoryProfiler()
+        monkeypatch.setattr("app.main.memory_profiler", profiler)
+        yield profiler
+        if tracemalloc.is_tracing():
+            profiler.stop()
+
+    def test_memory_disabled(self, client):
+        """Test that the memory endpoints are off by default."""
+        assert client.get("/debug/memory").status_code == 503
+        assert client.post("/debug/memory/tracemalloc").status_code == 503
+        assert client.post("/debug/memory/snapshots").status_code == 503
+
+    def test_memory_status(self, client, memory_profiler):
+        """Test the memory overview without tracing."""
+        response = client.get("/debug/memory")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tracing"] is False
+        assert len(data["gc"]) == 3
+        assert data["snapshots"] == []
+
+    def test_snapshot_requires_tracing(self, client, memory_profiler):
+        """Test that a snapshot before starting tracemalloc is a conflict."""
+        assert client.post("/debug/memory/snapshots").status_code == 409
+
+    def test_snapshots_and_diff(self, client, memory_profiler):
+        """Test the start, snapshot, diff and stop workflow."""
+        response = client.post("/debug/memory/tracemalloc", params={"frames": 4})
+        assert response.status_code == 200
+        assert response.json()["tracing"] is True
+        assert response.json()["traceback_frames"] == 4
+
+        base = client.post("/debug/memory/snapshots").json()["snapshot_id"]
+        for index in range(50):
+            client.post("/items", json={"name": f"Item {index}", "price": 1.0})
+        response = client.post("/debug/memory/snapshots", params={"limit": 5, "group_by": "filename"})
+        assert response.status_code == 201
+        later = response.json()
+        assert later["group_by"] == "filename"
+        assert 0 < len(later["sites"]) <= 5
+
+        response = client.get(f"/debug/memory/snapshots/{later['snapshot_id']}/diff", params={"base": base})
+        assert response.status_code == 200
+        diff = response.json()
+        assert diff["base_id"] == base
+        assert all(site["size_diff_bytes"] is not None for site in diff["sites"])
+
+        response = client.get(f"/debug/memory/snapshots/{base}", params={"group_by": "traceback"})
+        assert response.status_code == 200
+        assert client.get("/debug/memory/snapshots/999").status_code == 404
+        assert client.get(f"/debug/memory/snapshots/{base}/diff", params={"base": 999}).status_code == 404
+
+        response = client.delete("/debug/memory/tracemalloc")
+        assert response.json()["tracing"] is False
+        assert response.json()["snapshots"] == []
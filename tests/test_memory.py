@@ -0,0 +1,115 @@
+"""
+Unit Tests for the memory diagnostics.
+"""
+import tracemalloc
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from app.memory import MemoryProfiler, gc_generations, register_memory_metrics, rss_bytes
+
+retained: list = []
+
+
+def leak(blocks: int) -> None:
+    """Allocate blocks that stay alive until the test cleans up."""
+    retained.extend(bytearray(1024) for _ in range(blocks))
+
+
+# Where leak() allocates, as reported by tracemalloc
+LEAK_SITE = f"test_memory.py:{leak.__code__.co_firstlineno + 2}"
+
+
+@pytest.fixture
+def profiler():
+    """A memory profiler that is always stopped afterwards."""
+    profiler = MemoryProfiler(keep=2)
+    yield profiler
+    if tracemalloc.is_tracing():
+        profiler.stop()
+    retained.clear()
+
+
+@pytest.mark.unit
+class TestMemoryProfiler:
+    """Tests for tracemalloc control, snapshots and diffs."""
+
+    def test_start_and_stop(self, profiler):
+        """Test that start is idempotent and stop drops snapshots."""
+        profiler.start(frames=3)
+        profiler.start(frames=10)
+        assert profiler.status()["traceback_frames"] == 3
+        profiler.take_snapshot()
+        profiler.stop()
+        status = profiler.status()
+        assert not status["tracing"]
+        assert status["snapshots"] == []
+
+    def test_snapshot_requires_tracing(self, profiler):
+        """Test that snapshots fail while not tracing."""
+        with pytest.raises(RuntimeError):
+            profiler.take_snapshot()
+
+    def test_top_sites(self, profiler):
+        """Test that the largest site is the allocating line."""
+        profiler.start()
+        leak(500)
+        snapshot_id = profiler.take_snapshot()
+        top = profiler.top(snapshot_id, limit=1)[0]
+        assert top["traceback"][0].endswith(LEAK_SITE)
+        assert top["size_bytes"] >= 500 * 1024
+        assert top["count"] >= 500
+        by_file = profiler.top(snapshot_id, group_by="filename", limit=1)[0]
+        assert by_file["traceback"][0].endswith("test_memory.py")
+
+    def test_diff_finds_growth(self, profiler):
+        """Test that a diff reports what was allocated between snapshots."""
+        profiler.start(frames=2)
+        base = profiler.take_snapshot()
+        leak(300)
+        later = profiler.take_snapshot()
+        growth = profiler.diff(later, base, group_by="traceback", limit=1)[0]
+        assert growth["traceback"][-1].endswith(LEAK_SITE)
+        assert len(growth["traceback"]) == 2
+        assert growth["size_diff_bytes"] >= 300 * 1024
+        assert growth["count_diff"] >= 300
+        status = profiler.status()
+        assert [snapshot["id"] for snapshot in status["snapshots"]] == [base, later]
+        assert status["snapshots"][1]["traced_bytes"] > status["snapshots"][0]["traced_bytes"]
+
+    def test_old_snapshots_are_discarded(self, profiler):
+        """Test that only the latest snapshots are kept."""
+        profiler.start()
+        first = profiler.take_snapshot()
+        profiler.take_snapshot()
+        latest = profiler.take_snapshot()
+        with pytest.raises(KeyError):
+            profiler.diff(latest, first)
+
+
+@pytest.mark.unit
+class TestMemoryMetrics:
+    """Tests for the process memory gauges."""
+
+    def test_process_gauges(self):
+        """Test that RSS and GC metrics are observed at collection."""
+        reader = InMemoryMetricReader()
+        register_memory_metrics(MeterProvider(metric_readers=[reader]).get_meter(__name__))
+        points = {
+            metric.name: metric.data.data_points
+            for resource_metrics in reader.get_metrics_data().resource_metrics
+            for scope_metrics in resource_metrics.scope_metrics
+            for metric in scope_metrics.metrics
+        }
+        assert points["app.process.memory.rss"][0].value == pytest.approx(rss_bytes(), rel=0.5)
+        assert {dict(point.attributes)["generation"] for point in points["app.process.gc.collections"]} == {0, 1, 2}
+        assert "app.process.gc.collected" in points
+        # Only reported while tracing
+        assert "app.process.memory.traced" not in points
+
+    def test_gc_generations(self):
+        """Test the per-generation collector statistics."""
+        generations = gc_generations()
+        assert [generation["generation"] for generation in generations] == [0, 1, 2]
+        assert all(generation["collections"] >= 0 for generation in generations)
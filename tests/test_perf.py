@@ -0,0 +1,92 @@
+"""
+Unit Tests for the in-process latency histograms.
+"""
+import pytest
+
+from app.perf import (
+    BUCKETS,
+    LatencyHistogram,
+    RouteLatencyRecorder,
+    bucket_index,
+    bucket_upper_bound,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+class TestLatencyHistogram:
+    """Tests for the log-linear bucket layout and percentiles."""
+
+    def test_buckets_cover_values(self):
+        """Test that every value lands in the first bucket whose bound covers it."""
+        for micros in [*range(0, 100), 1000, 4095, 4096, 123_456, 10_000_000]:
+            index = bucket_index(micros)
+            assert bucket_upper_bound(index) >= micros
+            assert index == 0 or bucket_upper_bound(index - 1) < micros
+            # Relative bucket width stays within 1/8
+            assert bucket_upper_bound(index) - micros <= micros / 8 + 1
+
+    def test_huge_values_are_clamped(self):
+        """Test that values past the last bucket are counted in it."""
+        assert bucket_index(10**12) == BUCKETS - 1
+
+    def test_percentiles(self):
+        """Test percentiles against a known distribution."""
+        histogram = LatencyHistogram()
+        for micros in range(1, 1001):
+            histogram.record(micros)
+        assert histogram.count == 1000
+        assert histogram.max_us == 1000
+        assert 500 <= histogram.percentile(0.5) <= 500 * 1.125
+        assert 990 <= histogram.percentile(0.99) <= 1000
+        assert LatencyHistogram().percentile(0.5) == 0
+
+
+@pytest.mark.unit
+class TestRouteLatencyRecorder:
+    """Tests for per-route recording over sliding windows."""
+
+    def test_windows_slide(self):
+        """Test that old slots leave the short window but stay in the lifetime totals."""
+        clock = FakeClock()
+        recorder = RouteLatencyRecorder(windows=(60, 300), slot_seconds=10, clock=clock)
+        for _ in range(10):
+            recorder.record("GET", "/items", 200, 2000)
+        clock.now += 120
+        recorder.record("GET", "/items", 200, 1000)
+
+        [entry] = recorder.report()
+        assert (entry["method"], entry["route"], entry["status"]) == ("GET", "/items", 200)
+        assert entry["windows"]["60s"]["count"] == 1
+        assert entry["windows"]["60s"]["max_ms"] == 1.0
+        assert entry["windows"]["300s"]["count"] == 11
+        assert entry["windows"]["lifetime"]["count"] == 11
+        assert entry["windows"]["lifetime"]["max_ms"] == 2.0
+        assert entry["windows"]["60s"]["rate_per_s"] == round(1 / 60, 3)
+
+    def test_slots_are_bounded(self):
+        """Test that slots older than the longest window are discarded."""
+        clock = FakeClock()
+        recorder = RouteLatencyRecorder(windows=(60,), slot_seconds=10, clock=clock)
+        for _ in range(100):
+            recorder.record("GET", "/items", 200, 100)
+            clock.now += 10
+        assert len(recorder._slots) <= 6
+
+    def test_keys_are_separate(self):
+        """Test that methods, routes and statuses are reported separately, slowest first."""
+        recorder = RouteLatencyRecorder(clock=FakeClock())
+        recorder.record("GET", "/items", 200, 100)
+        recorder.record("GET", "/items", 304, 50)
+        recorder.record("POST", "/items", 201, 5000)
+        keys = [(entry["method"], entry["status"]) for entry in recorder.report()]
+        assert keys == [("POST", 201), ("GET", 200), ("GET", 304)]
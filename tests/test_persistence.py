@@ -0,0 +1,159 @@
+"""
+Unit Tests for snapshot + write-ahead log persistence.
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.persistence import SNAPSHOT_FILE, ItemPersistence
+from app.store import create_item_store
+from tests.test_store import make_item
+
+
+@pytest.fixture(params=["memory", "columnar"])
+def engine(request):
+    """Run each test once per storage engine."""
+    return request.param
+
+
+async def open_store(directory, engine: str):
+    """Restore a fresh store from ``directory`` and start logging its writes."""
+    store = create_item_store(engine)
+    persistence = ItemPersistence(directory)
+    await persistence.restore(store)
+    store.add_index(persistence)
+    return store, persistence
+
+
+async def reopen(store, persistence, directory, engine: str):
+    """Simulate a restart: flush the log, drop the store, restore a new one."""
+    await asyncio.sleep(0)  # let the scheduled group commit run
+    persistence.close()
+    return await open_store(directory, engine)
+
+
+@pytest.mark.unit
+class TestItemPersistence:
+    """Tests for restoring stores from snapshots and WAL segments."""
+
+    async def test_wal_only_restore(self, tmp_path, engine):
+        """Test that writes survive a restart with no snapshot at all."""
+        store, persistence = await open_store(tmp_path, engine)
+        await store.put_many([make_item(item_id, f"Item {item_id}") for item_id in range(1, 6)])
+        await store.put(make_item(2, "Replaced"))
+        await store.delete_many([3, 5])
+
+        store, persistence = await reopen(store, persistence, tmp_path, engine)
+        assert [item["id"] for item in await store.scan()] == [1, 2, 4]
+        assert (await store.get(2))["name"] == "Replaced"
+        # ID 5 was deleted but must never be handed out again
+        assert await store.next_id() == 6
+        persistence.close()
+
+    async def test_snapshot_plus_wal_tail(self, tmp_path, engine):
+        """Test restoring a snapshot and replaying writes made after it."""
+        store, persistence = await open_store(tmp_path, engine)
+        await store.put_many([
+            {**make_item(item_id, f"Naïve {item_id}"), "description": "desc" if item_id % 2 else None}
+            for item_id in range(1, 101)
+        ])
+        assert await persistence.snapshot(store) == 100
+        await store.delete(1)
+        await store.put(make_item(200, "After"))
+        await store.reserve_ids(5)
+        await persistence.snapshot(store)
+        await store.put(make_item(150, "Tail"))
+
+        expected = await store.scan()
+        store, persistence = await reopen(store, persistence, tmp_path, engine)
+        assert await store.scan() == expected
+        # IDs reserved before the snapshot stay allocated
+        assert await store.next_id() == 206
+        # Segments covered by the snapshot were removed
+        assert len(list(tmp_path.glob("wal-*.log"))) <= 2
+        persistence.close()
+
+    async def test_torn_tail_is_ignored(self, tmp_path, engine):
+        """Test that a partially written last record is skipped on replay."""
+        store, persistence = await open_store(tmp_path, engine)
+        await store.put_many([make_item(1), make_item(2)])
+        await asyncio.sleep(0)
+        persistence.close()
+
+        segment = sorted(tmp_path.glob("wal-*.log"))[-1]
+        segment.write_bytes(segment.read_bytes()[:-3])
+
+        store, persistence = await open_store(tmp_path, engine)
+        assert [item["id"] for item in await store.scan()] == [1]
+        persistence.close()
+
+    async def test_wal_is_written_off_the_event_loop(self, tmp_path, monkeypatch):
+        """Test that WAL writes and fsyncs run on the writer thread, not the loop."""
+        synced_on = []
+        monkeypatch.setattr(
+            "app.persistence.os.fsync", lambda fd: synced_on.append(threading.current_thread())
+        )
+        store = create_item_store("memory")
+        persistence = ItemPersistence(tmp_path, fsync=True)
+        await persistence.restore(store)
+        store.add_index(persistence)
+        await store.put_many([make_item(1), make_item(2)])
+        await store.delete(1)
+
+        store, persistence = await reopen(store, persistence, tmp_path, "memory")
+        assert [item["id"] for item in await store.scan()] == [2]
+        assert synced_on
+        assert threading.current_thread() not in synced_on
+        persistence.close()
+
+    async def test_strings_containing_nul(self, tmp_path):
+        """Test the length-based snapshot layout used when text contains NUL."""
+        store, persistence = await open_store(tmp_path, "memory")
+        await store.put_many([make_item(1, "a\0b"), {**make_item(2, ""), "description": "\0"}])
+        await persistence.snapshot(store)
+
+        expected = await store.scan()
+        store, persistence = await reopen(store, persistence, tmp_path, "memory")
+        assert await store.scan() == expected
+        assert (tmp_path / SNAPSHOT_FILE).exists()
+        persistence.close()
+
+    async def test_gc_freeze_only_once_on_request(self, tmp_path, monkeypatch):
+        """Test that only the first restore asking for it freezes the GC."""
+        frozen = []
+        monkeypatch.setattr("app.persistence.gc.freeze", lambda: frozen.append(True))
+        monkeypatch.setattr("app.persistence._gc_frozen", False)
+        store, persistence = await open_store(tmp_path, "memory")
+        await store.put(make_item(1))
+        await persistence.snapshot(store)
+        persistence.close()
+
+        for freeze in (False, True, True):
+            persistence = ItemPersistence(tmp_path)
+            assert await persistence.restore(create_item_store(), freeze=freeze) == 1
+            persistence.close()
+        assert frozen == [True]
+
+
+@pytest.mark.integration
+def test_lifespan_restores_items(app, tmp_path, monkeypatch):
+    """Test that items and IDs survive an application restart."""
+    from app.main import items_db
+
+    if items_db.persistent:
+        pytest.skip("the configured storage engine is durable on its own")
+    monkeypatch.setattr(get_settings(), "persistence_dir", str(tmp_path))
+    # Keep the test session's objects out of the startup gc.freeze()
+    monkeypatch.setattr("app.persistence._gc_frozen", True)
+
+    with TestClient(app) as client:
+        first = client.post("/items", json={"name": "Kept", "price": 1.0}).json()
+        client.delete(f"/items/{client.post('/items', json={'name': 'Gone', 'price': 1.0}).json()['id']}")
+
+    items_db.clear()
+    with TestClient(app) as client:
+        assert client.get("/items").json() == [first]
+        assert client.post("/items", json={"name": "New", "price": 1.0}).json()["id"] == first["id"] + 2
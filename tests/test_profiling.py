@@ -0,0 +1,160 @@
+"""
+Unit Tests for the sampling profiler.
+"""
+import threading
+import time
+
+import pytest
+
+from app.profiling import Profiler, RequestProfileMiddleware, StackSampler
+
+
+def spin(seconds: float) -> None:
+    """Burn CPU in a recognizable frame."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def frames(collapsed: str) -> list[list[str]]:
+    """Split collapsed output into one frame list per line."""
+    lines = []
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+        lines.append(stack.split(";"))
+    return lines
+
+
+@pytest.mark.unit
+class TestStackSampler:
+    """Tests for sampling and collapsing thread stacks."""
+
+    def test_samples_busy_thread(self):
+        """Test that a busy thread shows up with its thread name and function."""
+        worker = threading.Thread(target=spin, args=(0.3,), name="busy-worker")
+        sampler = StackSampler(interval=0.005)
+        sampler.start()
+        worker.start()
+        worker.join()
+        sampler.stop()
+
+        assert sampler.samples > 10
+        stacks = frames(sampler.collapsed())
+        busy = [stack for stack in stacks if stack[0] == "busy-worker"]
+        assert busy
+        assert busy[0][-1] == "spin (tests/test_profiling.py)"
+        assert not any(stack[0] == "stack-sampler" for stack in stacks)
+
+    def test_thread_filter(self):
+        """Test that only the requested threads are sampled."""
+        sampler = StackSampler(thread_ids={threading.get_ident()})
+        worker = threading.Thread(target=spin, args=(0.2,), name="other")
+        worker.start()
+        sampler.sample()
+        worker.join()
+        stacks = frames(sampler.collapsed())
+        assert [stack[0] for stack in stacks] == [threading.current_thread().name]
+        assert stacks[0][-2:] == [
+            "TestStackSampler.test_thread_filter (tests/test_profiling.py)",
+            "StackSampler.sample (app/profiling.py)",
+        ]
+
+    def test_idle_threads_are_skipped(self):
+        """Test that threads waiting on an event only appear with idle=True."""
+        event = threading.Event()
+        waiter = threading.Thread(target=event.wait, name="waiter")
+        waiter.start()
+        try:
+            time.sleep(0.05)
+            busy_only = StackSampler(thread_ids={waiter.ident})
+            busy_only.sample()
+            with_idle = StackSampler(thread_ids={waiter.ident}, idle=True)
+            with_idle.sample()
+        finally:
+            event.set()
+            waiter.join()
+        assert busy_only.collapsed() == ""
+        assert with_idle.collapsed().startswith("waiter;")
+
+
+@pytest.mark.unit
+class TestProfiler:
+    """Tests for the one-at-a-time guard and request profiles."""
+
+    def test_one_profile_at_a_time(self):
+        """Test that a second profile is refused while one runs."""
+        profiler = Profiler()
+        sampler = profiler.begin()
+        assert sampler is not None
+        assert profiler.begin() is None
+        profiler.end(sampler)
+        again = profiler.begin()
+        assert again is not None
+        profiler.end(again)
+
+    def test_request_profiles_are_bounded(self):
+        """Test that only the latest request profiles are kept."""
+        profiler = Profiler(keep=2)
+        ids = [profiler.keep_request_profile(StackSampler()) for _ in range(3)]
+        assert list(profiler.request_profiles) == ids[1:]
+
+
+async def slow_endpoint(scope, receive, send) -> None:
+    """ASGI app that blocks the loop thread before responding."""
+    spin(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def call(app, headers: list) -> dict:
+    """Send one GET and return the response start message."""
+    messages = []
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    await app({"type": "http", "method": "GET", "path": "/", "headers": headers}, receive, send)
+    return messages[0]
+
+
+@pytest.mark.unit
+class TestRequestProfileMiddleware:
+    """Tests for per-request profiling."""
+
+    async def test_profiled_request(self):
+        """Test that a request with X-Profile returns an ID for its stacks."""
+        profiler = Profiler(request_interval=0.001)
+        start = await call(RequestProfileMiddleware(slow_endpoint, profiler), [(b"x-profile", b"1")])
+        headers = dict(start["headers"])
+        profile = profiler.request_profiles[headers[b"x-profile-id"].decode()]
+        assert any(stack[-2:] == ["slow_endpoint (tests/test_profiling.py)", "spin (tests/test_profiling.py)"]
+                   for stack in frames(profile))
+        assert not profiler.active
+
+    async def test_unprofiled_requests(self):
+        """Test that requests without the header, or during a profile, are passed through."""
+        profiler = Profiler()
+        middleware = RequestProfileMiddleware(slow_endpoint, profiler)
+        assert (await call(middleware, []))["headers"] == []
+
+        sampler = profiler.begin()
+        try:
+            assert (await call(middleware, [(b"x-profile", b"1")]))["headers"] == []
+        finally:
+            profiler.end(sampler)
+        assert profiler.request_profiles == {}
+
+    async def test_debug_token(self):
+        """Test that with a token, only requests carrying it are profiled."""
+        profiler = Profiler(request_interval=0.001)
+        middleware = RequestProfileMiddleware(slow_endpoint, profiler, token="s3cret")
+        assert (await call(middleware, [(b"x-profile", b"1")]))["headers"] == []
+        assert (await call(middleware, [(b"x-profile", b"1"), (b"x-debug-token", b"wrong")]))["headers"] == []
+        assert profiler.request_profiles == {}
+
+        start = await call(middleware, [(b"x-profile", b"1"), (b"x-debug-token", b"s3cret")])
+        assert b"x-profile-id" in dict(start["headers"])
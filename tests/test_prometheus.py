@@ -0,0 +1,101 @@
+"""
+Unit Tests for the Prometheus metric reader.
+"""
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+
+from app.prometheus import PrometheusMetricReader, metric_name
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_reader(cache_seconds: float = 5.0):
+    """Build a reader attached to its own meter provider."""
+    clock = FakeClock()
+    reader = PrometheusMetricReader(cache_seconds=cache_seconds, clock=clock)
+    provider = MeterProvider(metric_readers=[reader])
+    return reader, provider.get_meter(__name__), clock
+
+
+@pytest.mark.unit
+class TestMetricName:
+    """Tests for OpenTelemetry to Prometheus name conversion."""
+
+    @pytest.mark.parametrize(
+        "name, unit, monotonic, expected",
+        [
+            ("app.items.created", "1", True, "app_items_created_total"),
+            ("http.server.duration", "ms", False, "http_server_duration_milliseconds"),
+            ("app.requests_total", "1", True, "app_requests_total"),
+            ("queue-depth", "{spans}", False, "queue_depth"),
+            ("size_bytes", "By", False, "size_bytes"),
+        ],
+    )
+    def test_metric_name(self, name, unit, monotonic, expected):
+        """Test sanitizing, unit suffixes and the counter suffix."""
+        assert metric_name(name, unit, monotonic) == expected
+
+
+@pytest.mark.unit
+class TestPrometheusMetricReader:
+    """Tests for rendering and caching the exposition."""
+
+    def test_counter_and_gauge(self):
+        """Test counters, up-down counters and label escaping."""
+        reader, meter, _ = make_reader()
+        meter.create_counter("app.items.created", unit="1", description="Items created").add(
+            2, {"item_name": 'say "hi"\\'}
+        )
+        meter.create_up_down_counter("app.items.count").add(-1)
+        text = reader.exposition().decode()
+        assert "# HELP app_items_created_total Items created\n" in text
+        assert "# TYPE app_items_created_total counter\n" in text
+        assert 'app_items_created_total{item_name="say \\"hi\\"\\\\"} 2\n' in text
+        assert "# TYPE app_items_count gauge\napp_items_count -1\n" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, +Inf, sum and count."""
+        reader, meter, _ = make_reader()
+        histogram = meter.create_histogram("latency", unit="ms")
+        for value in (3, 7, 20000):
+            histogram.record(value, {"route": "/items"})
+        lines = reader.exposition().decode().splitlines()
+        assert "# TYPE latency_milliseconds histogram" in lines
+        assert 'latency_milliseconds_bucket{route="/items",le="0.0"} 0' in lines
+        assert 'latency_milliseconds_bucket{route="/items",le="5.0"} 1' in lines
+        assert 'latency_milliseconds_bucket{route="/items",le="10.0"} 2' in lines
+        assert 'latency_milliseconds_bucket{route="/items",le="10000.0"} 2' in lines
+        assert 'latency_milliseconds_bucket{route="/items",le="+Inf"} 3' in lines
+        assert 'latency_milliseconds_sum{route="/items"} 20010' in lines
+        assert 'latency_milliseconds_count{route="/items"} 3' in lines
+
+    def test_exposition_is_cached(self):
+        """Test that scrapes within the cache interval do not collect again."""
+        reader, meter, clock = make_reader(cache_seconds=5)
+        calls = []
+        meter.create_observable_gauge("observed", callbacks=[lambda options: calls.append(1) or []])
+        counter = meter.create_counter("hits")
+        counter.add(1)
+        first = reader.exposition()
+        counter.add(1)
+        clock.now += 4.9
+        assert reader.exposition() is first
+        assert reader.collections == 1
+        assert len(calls) == 1
+
+        clock.now += 0.1
+        assert b"hits_total 2" in reader.exposition()
+        assert reader.collections == 2
+        assert len(calls) == 2
+
+    def test_unregistered_reader_is_empty(self):
+        """Test that a reader without a meter provider serves nothing."""
+        assert PrometheusMetricReader().exposition() == b""
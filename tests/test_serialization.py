@@ -0,0 +1,58 @@
+"""
+Unit Tests for the pre-encoded item JSON cache.
+"""
+import json
+
+import pytest
+
+from app.models import ItemResponse
+from app.serialization import ItemJSONCache, encode_item
+from app.store import create_item_store
+from tests.test_store import make_item
+
+
+@pytest.mark.unit
+class TestItemJSONCache:
+    """Tests for encoding and invalidation of cached item JSON."""
+
+    def test_encoding_matches_response_model(self):
+        """Test that fast-path bytes decode to the same document as ItemResponse."""
+        item = {**make_item(7, "Widget", price=2.5, quantity=3), "description": "Blue"}
+        expected = ItemResponse(**item, total_value=7.5).model_dump()
+        assert json.loads(encode_item(item)) == expected
+        assert list(json.loads(encode_item(item))) == list(ItemResponse.model_fields)
+
+    @pytest.mark.parametrize("engine", ["memory", "columnar"])
+    async def test_store_writes_invalidate(self, engine):
+        """Test that replacing or deleting an item drops its cached encoding."""
+        store = create_item_store(engine)
+        cache = ItemJSONCache()
+        store.add_index(cache)
+        await store.put(make_item(1, "Old"))
+
+        first = cache.encode(await store.get(1))
+        assert cache.encode(await store.get(1)) is first
+
+        await store.put(make_item(1, "New"))
+        assert len(cache) == 0
+        assert json.loads(cache.encode(await store.get(1)))["name"] == "New"
+
+        await store.delete(1)
+        assert len(cache) == 0
+
+    def test_stale_item_is_not_served(self):
+        """Test that an entry is only reused for an identical item."""
+        cache = ItemJSONCache()
+        cache.encode(make_item(1, "New"))
+        assert json.loads(cache.encode(make_item(1, "Old")))["name"] == "Old"
+
+    def test_bounded(self):
+        """Test that the oldest entries are evicted and size 0 disables caching."""
+        cache = ItemJSONCache(max_items=2)
+        for item_id in (1, 2, 3):
+            cache.encode(make_item(item_id))
+        assert len(cache) == 2
+
+        disabled = ItemJSONCache(max_items=0)
+        assert disabled.encode_list([make_item(1), make_item(2)]).startswith(b'[{"id":1,')
+        assert len(disabled) == 0
@@ -0,0 +1,237 @@
+"""
+Unit Tests for the item storage engines.
+
+These tests exercise the ItemStore implementations directly,
+without going through the HTTP layer.
+"""
+import asyncio
+
+import pytest
+
+from app.store import ColumnarItemStore, InMemoryItemStore, SQLiteItemStore, create_item_store
+
+
+def make_item(item_id: int, name: str = "Item", price: float = 10.0, quantity: int = 1) -> dict:
+    """Build an item dict in the shape stored by the engines."""
+    return {
+        "id": item_id,
+        "name": name,
+        "description": None,
+        "price": price,
+        "quantity": quantity,
+    }
+
+
+@pytest.fixture(params=["memory", "columnar", "sqlite"])
+def store(request, tmp_path):
+    """Provide a fresh store for each test, once per engine."""
+    options = {"path": str(tmp_path / "items.db")} if request.param == "sqlite" else {}
+    store = create_item_store(request.param, **options)
+    yield store
+    store.close()
+
+
+@pytest.mark.unit
+class TestItemStoreEngines:
+    """Contract tests run against every storage engine."""
+
+    async def test_next_id_is_monotonic(self, store):
+        """Test that allocated IDs increase and survive clear()."""
+        first = await store.next_id()
+        second = await store.next_id()
+        assert second == first + 1
+
+        store.clear()
+        assert await store.next_id() == second + 1
+
+    async def test_put_get_delete(self, store):
+        """Test the basic item lifecycle."""
+        await store.put(make_item(1, "Widget"))
+        assert (await store.get(1))["name"] == "Widget"
+        assert await store.count() == 1
+
+        deleted = await store.delete(1)
+        assert deleted["name"] == "Widget"
+        assert await store.get(1) is None
+        assert await store.delete(1) is None
+        assert await store.count() == 0
+
+    async def test_put_replaces_existing(self, store):
+        """Test that putting an existing ID replaces it without duplicating the index."""
+        await store.put(make_item(1, "Old"))
+        await store.put(make_item(1, "New"))
+        assert await store.count() == 1
+        assert [item["name"] for item in await store.scan()] == ["New"]
+
+    async def test_scan_is_ordered_and_paged(self, store):
+        """Test that scan returns items in ID order and honours skip/limit."""
+        for item_id in (5, 1, 3, 2, 4):
+            await store.put(make_item(item_id))
+        await store.delete(3)
+
+        assert [item["id"] for item in await store.scan()] == [1, 2, 4, 5]
+        assert [item["id"] for item in await store.scan(skip=1, limit=2)] == [2, 4]
+        assert await store.scan(skip=10, limit=2) == []
+
+    async def test_scan_after_id(self, store):
+        """Test keyset seeking with after_id, including IDs that were deleted."""
+        for item_id in range(1, 7):
+            await store.put(make_item(item_id))
+        await store.delete(3)
+
+        assert [item["id"] for item in await store.scan(after_id=3, limit=2)] == [4, 5]
+        assert [item["id"] for item in await store.scan(after_id=2, skip=1)] == [5, 6]
+        assert await store.scan(after_id=6) == []
+
+    async def test_reserve_ids_and_put_many(self, store):
+        """Test bulk ID allocation and bulk insert."""
+        ids = await store.reserve_ids(3)
+        assert list(ids) == [1, 2, 3]
+        assert await store.next_id() == 4
+
+        await store.put_many([make_item(item_id) for item_id in ids])
+        await store.put_many([make_item(2, "Replaced")])
+        assert await store.count() == 3
+        assert (await store.get(2))["name"] == "Replaced"
+
+    async def test_get_many_and_delete_many(self, store):
+        """Test bulk reads and deletes skip unknown IDs."""
+        await store.put_many([make_item(item_id) for item_id in (1, 2, 3)])
+
+        assert set(await store.get_many([1, 3, 9])) == {1, 3}
+
+        deleted = await store.delete_many([3, 9, 1])
+        assert [item["id"] for item in deleted] == [3, 1]
+        assert [item["id"] for item in await store.scan()] == [2]
+
+    async def test_iter_snapshot_is_isolated(self, store):
+        """Test that writes during iteration do not affect the snapshot."""
+        await store.put_many([make_item(item_id) for item_id in range(1, 6)])
+
+        seen = []
+        async for chunk in store.iter_snapshot(chunk_size=2):
+            assert len(chunk) <= 2
+            seen.extend(item["id"] for item in chunk)
+            await store.delete(5)
+            await store.put(make_item(10))
+
+        assert seen == [1, 2, 3, 4, 5]
+
+    async def test_put_advances_id_counter(self, store):
+        """Test that explicit IDs are never handed out again."""
+        await store.put(make_item(42))
+        assert await store.next_id() == 43
+
+
+@pytest.mark.unit
+class TestColumnarItemStore:
+    """Tests specific to the compact columnar engine."""
+
+    async def test_compaction_keeps_order_and_data(self, monkeypatch):
+        """Test that tombstones are compacted without losing live rows."""
+        monkeypatch.setattr(ColumnarItemStore, "COMPACT_MIN_TOMBSTONES", 4)
+        store = ColumnarItemStore()
+        await store.put_many([make_item(item_id, f"Item {item_id}") for item_id in range(1, 21)])
+
+        await store.delete_many(list(range(2, 20, 2)))
+        assert store._tombstones == 0
+        assert [item["id"] for item in await store.scan()] == [1, 3, 5, 7, 9, 11, 13, 15, 17, 19, 20]
+        assert (await store.get(15))["name"] == "Item 15"
+
+    async def test_skip_over_tombstones(self):
+        """Test offset paging when deleted rows have not been compacted yet."""
+        store = ColumnarItemStore()
+        await store.put_many([make_item(item_id) for item_id in range(1, 11)])
+        await store.delete_many([2, 3, 5])
+
+        assert [item["id"] for item in await store.scan(skip=2, limit=3)] == [6, 7, 8]
+        assert [item["id"] for item in await store.scan(after_id=1, skip=1, limit=2)] == [6, 7]
+
+    async def test_out_of_order_insert_and_revive(self):
+        """Test inserting below the highest ID and re-putting a deleted ID."""
+        store = ColumnarItemStore()
+        await store.put_many([make_item(item_id) for item_id in (1, 5, 3)])
+        await store.delete(3)
+        await store.put({**make_item(3, "Back"), "description": "restored"})
+
+        assert [item["id"] for item in await store.scan()] == [1, 3, 5]
+        assert await store.get(3) == {**make_item(3, "Back"), "description": "restored"}
+        assert await store.count() == 3
+
+    async def test_shared_strings_are_interned(self):
+        """Test that repeated strings are stored once in the arena."""
+        store = ColumnarItemStore()
+        await store.put_many([{**make_item(item_id), "description": "same"} for item_id in range(1, 101)])
+        assert len(store._cols.arena._offsets) == 3  # "Item" and "same"
+
+    async def test_replaced_strings_are_reclaimed(self, monkeypatch):
+        """Test that updates and deletes do not grow the arena without bound."""
+        monkeypatch.setattr(ColumnarItemStore, "COMPACT_MIN_GARBAGE", 64)
+        store = ColumnarItemStore()
+        await store.put_many([make_item(item_id, f"Item {item_id}") for item_id in range(1, 11)])
+        for version in range(100):
+            await store.put_many([make_item(item_id, f"Item {item_id} v{version}") for item_id in (1, 2)])
+        await store.delete(3)
+
+        arena = store._cols.arena
+        assert len(arena) < 200
+        assert arena.garbage < max(64, len(arena) // 4)
+        assert (await store.get(1))["name"] == "Item 1 v99"
+        assert (await store.get(4))["name"] == "Item 4"
+        assert await store.get(3) is None
+
+
+@pytest.mark.unit
+class TestSQLiteItemStore:
+    """Tests specific to the durable SQLite engine."""
+
+    async def test_reopen_keeps_items_and_ids(self, tmp_path):
+        """Test that items and the ID counter survive reopening the database."""
+        path = str(tmp_path / "items.db")
+        store = SQLiteItemStore(path)
+        ids = await store.reserve_ids(3)
+        await store.put_many([make_item(item_id, f"Item {item_id}") for item_id in ids])
+        await store.delete(3)
+        store.close()
+
+        store = SQLiteItemStore(path)
+        assert [item["name"] for item in await store.scan()] == ["Item 1", "Item 2"]
+        assert await store.next_id() == 4
+        store.close()
+
+    async def test_concurrent_writes_are_grouped(self, tmp_path):
+        """Test that concurrent writers all commit and see consistent results."""
+        store = SQLiteItemStore(str(tmp_path / "items.db"))
+        await asyncio.gather(*(store.put(make_item(item_id)) for item_id in range(1, 51)))
+        await asyncio.gather(
+            store.put(make_item(1, "Replaced")),
+            store.delete_many([2, 3]),
+            store.put(make_item(2, "Back")),
+        )
+
+        assert await store.count() == 49
+        assert (await store.get(1))["name"] == "Replaced"
+        assert (await store.get(2))["name"] == "Back"
+        assert await store.get(3) is None
+        store.close()
+
+    async def test_use_after_close_reopens(self, tmp_path):
+        """Test that closing is idempotent and the next call reopens the database."""
+        store = SQLiteItemStore(str(tmp_path / "items.db"))
+        await store.put(make_item(1))
+        store.close()
+        store.close()
+
+        assert (await store.get(1))["name"] == "Item"
+        await store.put(make_item(2))
+        store.clear()
+        assert await store.count() == 0
+        store.close()
+
+
+@pytest.mark.unit
+def test_create_item_store_unknown_engine():
+    """Test that an unknown engine name is rejected."""
+    assert isinstance(create_item_store(), InMemoryItemStore)
+    with pytest.raises(ValueError):
+        create_item_store("nope")
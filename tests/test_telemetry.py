@@ -0,0 +1,412 @@
+"""
+Unit Tests for the OpenTelemetry configuration helpers.
+"""
+import threading
+
+import pytest
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import NonRecordingSpan, SpanContext, SpanKind, StatusCode, TraceFlags
+
+from app.telemetry import (
+    OVERFLOW_VALUE,
+    SAMPLE_RATE_ATTRIBUTE,
+    MonitoredBatchSpanProcessor,
+    TailSamplingSpanProcessor,
+    build_tracer_provider,
+    configure_telemetry,
+    create_custom_metrics,
+)
+
+
+def make_tracer(**options) -> tuple[trace.Tracer, InMemorySpanExporter, object]:
+    """Build a tracer exporting to memory with the given sampling options."""
+    exporter = InMemorySpanExporter()
+    provider = build_tracer_provider(exporter, **options)
+    return provider.get_tracer(__name__), exporter, provider
+
+
+def request(tracer: trace.Tracer, route: str, error: bool = False, context=None) -> None:
+    """Record a server span for one request, with a child span."""
+    with tracer.start_as_current_span(
+        f"GET {route}", context=context, kind=SpanKind.SERVER, attributes={"http.route": route}
+    ) as span:
+        with tracer.start_as_current_span("child"):
+            pass
+        if error:
+            span.set_status(StatusCode.ERROR)
+
+
+def exported(exporter: InMemorySpanExporter, provider) -> list[str]:
+    """Flush the pipeline and return the names of exported spans."""
+    provider.force_flush()
+    return [span.name for span in exporter.get_finished_spans()]
+
+
+@pytest.mark.unit
+class TestTraceSampling:
+    """Tests for head sampling in build_tracer_provider."""
+
+    def test_sample_everything(self):
+        """Test that the default ratio exports every span with its sample rate."""
+        tracer, exporter, provider = make_tracer()
+        request(tracer, "/items")
+        provider.force_flush()
+        spans = exporter.get_finished_spans()
+        assert [span.name for span in spans] == ["child", "GET /items"]
+        assert spans[1].attributes[SAMPLE_RATE_ATTRIBUTE] == 100
+
+    def test_sample_nothing(self):
+        """Test that a zero ratio drops successful requests entirely."""
+        tracer, exporter, provider = make_tracer(sample_ratio=0.0)
+        for _ in range(20):
+            request(tracer, "/items")
+        assert exported(exporter, provider) == []
+
+    def test_ratio_is_applied(self):
+        """Test that roughly the configured fraction of traces is sampled."""
+        tracer, exporter, provider = make_tracer(sample_ratio=0.1)
+        for _ in range(2000):
+            request(tracer, "/items")
+        assert 100 <= exported(exporter, provider).count("GET /items") <= 300
+
+    def test_route_overrides(self):
+        """Test that per-route ratios take precedence over the default."""
+        tracer, exporter, provider = make_tracer(sample_ratio=0.0, sample_routes={"/items/{item_id}": 1.0})
+        request(tracer, "/items")
+        request(tracer, "/items/{item_id}")
+        assert exported(exporter, provider) == ["child", "GET /items/{item_id}"]
+
+    def test_errors_always_sampled(self):
+        """Test that failed requests outside the sample export their server span."""
+        tracer, exporter, provider = make_tracer(sample_ratio=0.0)
+        request(tracer, "/items")
+        request(tracer, "/items", error=True)
+        assert exported(exporter, provider) == ["GET /items"]
+
+    def test_errors_not_recorded_when_disabled(self):
+        """Test that unsampled spans are not even recorded without error sampling."""
+        tracer, exporter, provider = make_tracer(sample_ratio=0.0, sample_errors=False)
+        with tracer.start_as_current_span("GET /items", kind=SpanKind.SERVER) as span:
+            assert not span.is_recording()
+        request(tracer, "/items", error=True)
+        assert exported(exporter, provider) == []
+
+    def test_parent_decision_is_followed(self):
+        """Test that requests continuing a sampled trace are always sampled."""
+        tracer, exporter, provider = make_tracer(sample_ratio=0.0)
+        parent = SpanContext(
+            trace_id=0x1234, span_id=0x5678, is_remote=True, trace_flags=TraceFlags(TraceFlags.SAMPLED)
+        )
+        request(tracer, "/items", context=trace.set_span_in_context(NonRecordingSpan(parent)))
+        assert exported(exporter, provider) == ["child", "GET /items"]
+
+
+def collect(reader: InMemoryMetricReader) -> dict[str, list]:
+    """Collect metric data points as {metric name: [(attributes, value)]}."""
+    points: dict[str, list] = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points[metric.name] = [
+                    (dict(point.attributes), getattr(point, "value", None)) for point in metric.data.data_points
+                ]
+    return points
+
+
+class TailSampling:
+    """A tracer whose spans go through tail sampling to an in-memory exporter."""
+
+    def __init__(self, **options) -> None:
+        self.exporter = InMemorySpanExporter()
+        self.reader = InMemoryMetricReader()
+        options.setdefault("baseline_ratio", 0.0)
+        self.processor = TailSamplingSpanProcessor(
+            SimpleSpanProcessor(self.exporter),
+            meter=MeterProvider(metric_readers=[self.reader]).get_meter(__name__),
+            **options,
+        )
+        provider = TracerProvider()
+        provider.add_span_processor(self.processor)
+        self.tracer = provider.get_tracer(__name__)
+
+    def request(self, name: str, duration_ms: float = 1, error: bool = False, end_root: bool = True) -> None:
+        """Record a root span lasting ``duration_ms`` with one child span."""
+        root = self.tracer.start_span(name, start_time=0)
+        child = self.tracer.start_span(f"{name} child", context=trace.set_span_in_context(root), start_time=0)
+        if error:
+            child.set_status(StatusCode.ERROR)
+        child.end(end_time=1000)
+        if end_root:
+            root.end(end_time=int(duration_ms * 1e6))
+
+    def exported(self) -> list[str]:
+        return [span.name for span in self.exporter.get_finished_spans()]
+
+    def metrics(self) -> dict:
+        """Collect the tail sampling metrics as {(name, decision): value}."""
+        return {
+            (name, attributes.get("decision")): value
+            for name, points in collect(self.reader).items()
+            for attributes, value in points
+        }
+
+
+@pytest.mark.unit
+class TestTailSampling:
+    """Tests for TailSamplingSpanProcessor."""
+
+    def test_keeps_slow_and_failed_traces(self):
+        """Test that only slow or failed traces reach the exporter, whole."""
+        tail = TailSampling(latency_threshold_ms=100)
+        tail.request("fast", duration_ms=5)
+        tail.request("slow", duration_ms=150)
+        tail.request("failed", duration_ms=5, error=True)
+        assert tail.exported() == ["slow child", "slow", "failed child", "failed"]
+
+        metrics = tail.metrics()
+        assert metrics["app.tracing.tail.traces", "dropped"] == 1
+        assert metrics["app.tracing.tail.traces", "slow"] == 1
+        assert metrics["app.tracing.tail.traces", "error"] == 1
+        assert metrics["app.tracing.tail.spans.dropped", None] == 2
+        assert metrics["app.tracing.tail.buffered", None] == 0
+
+    def test_baseline(self):
+        """Test that the baseline ratio keeps ordinary traces."""
+        tail = TailSampling(latency_threshold_ms=100, baseline_ratio=1.0)
+        tail.request("fast", duration_ms=5)
+        assert tail.exported() == ["fast child", "fast"]
+        assert tail.metrics()["app.tracing.tail.traces", "baseline"] == 1
+
+    def test_late_spans_follow_the_decision(self):
+        """Test that spans ending after their root use the recorded decision."""
+        tail = TailSampling(latency_threshold_ms=100)
+        for name, duration_ms in [("slow", 150), ("fast", 5)]:
+            root = tail.tracer.start_span(name, start_time=0)
+            child = tail.tracer.start_span(f"{name} late", context=trace.set_span_in_context(root))
+            root.end(end_time=int(duration_ms * 1e6))
+            child.end()
+        assert tail.exported() == ["slow", "slow late"]
+
+    def test_max_traces_evicts_oldest(self):
+        """Test that the buffer never holds more than max_traces traces."""
+        tail = TailSampling(latency_threshold_ms=100, max_traces=2)
+        for name in ["a", "b", "c"]:
+            tail.request(name, end_root=False)
+        assert len(tail.processor._traces) == 2
+        metrics = tail.metrics()
+        assert metrics["app.tracing.tail.traces", "evicted"] == 1
+        assert metrics["app.tracing.tail.buffered", None] == 2
+
+    def test_max_spans_per_trace(self):
+        """Test that spans beyond the per-trace cap are dropped and counted."""
+        tail = TailSampling(latency_threshold_ms=0, max_spans_per_trace=3)
+        root = tail.tracer.start_span("root")
+        for _ in range(5):
+            tail.tracer.start_span("child", context=trace.set_span_in_context(root)).end()
+        root.end()
+        assert tail.exported() == ["child", "child", "child"]
+        assert tail.processor.dropped_spans == 3
+
+    def test_undecided_traces_expire(self, monkeypatch):
+        """Test that traces whose root never ends are dropped after decision_wait."""
+        now = [0.0]
+        monkeypatch.setattr("app.telemetry.time.monotonic", lambda: now[0])
+        tail = TailSampling(latency_threshold_ms=0, decision_wait=10)
+        tail.request("orphan", end_root=False)
+        now[0] = 11.0
+        tail.request("complete")
+        assert tail.exported() == ["complete child", "complete"]
+        assert tail.metrics()["app.tracing.tail.traces", "expired"] == 1
+
+    def test_build_tracer_provider(self):
+        """Test that tail sampling is wired into the provider pipeline."""
+        tracer, exporter, provider = make_tracer(tail_sampling=True, tail_latency_ms=10_000, tail_baseline_ratio=0.0)
+        request(tracer, "/items")
+        request(tracer, "/items", error=True)
+        assert exported(exporter, provider) == ["child", "GET /items"]
+
+
+@pytest.mark.unit
+class TestCardinalityGuard:
+    """Tests for the cardinality guard around the custom metrics."""
+
+    @staticmethod
+    def make_metrics(**options) -> tuple[dict, InMemoryMetricReader]:
+        reader = InMemoryMetricReader()
+        meter = MeterProvider(metric_readers=[reader]).get_meter(__name__)
+        return create_custom_metrics(meter, **options), reader
+
+    def test_overflow_bucket(self):
+        """Test that values past the limit share one overflow series."""
+        custom_metrics, reader = self.make_metrics(max_attribute_values=2)
+        for name in ["a", "b", "c", "d", "a"]:
+            custom_metrics["items_created"].add(1, {"item_name": name})
+        points = collect(reader)
+
+        created = {attributes["item_name"]: value for attributes, value in points["app.items.created"]}
+        assert created == {"a": 2, "b": 1, OVERFLOW_VALUE: 2}
+        assert points["app.metrics.series.dropped"] == [
+            ({"instrument": "items_created", "attribute": "item_name"}, 2)
+        ]
+
+    def test_limits_are_per_instrument(self):
+        """Test that each instrument has its own budget of values."""
+        custom_metrics, reader = self.make_metrics(max_attribute_values=1)
+        custom_metrics["items_created"].add(1, {"item_name": "a"})
+        custom_metrics["items_deleted"].add(1, {"item_name": "b"})
+        points = collect(reader)
+        assert points["app.items.created"] == [({"item_name": "a"}, 1)]
+        assert points["app.items.deleted"] == [({"item_name": "b"}, 1)]
+        assert "app.metrics.series.dropped" not in points
+
+    def test_allow_list(self):
+        """Test that allow-listed attributes only accept the listed values."""
+        custom_metrics, reader = self.make_metrics(allowed_attribute_values={"operation": ["batch"]})
+        custom_metrics["items_created"].add(3, {"operation": "batch"})
+        custom_metrics["items_created"].add(1, {"operation": "unexpected"})
+        custom_metrics["items_created"].add(1)
+        created = collect(reader)["app.items.created"]
+        assert sorted(created, key=repr) == sorted(
+            [({}, 1), ({"operation": "batch"}, 3), ({"operation": OVERFLOW_VALUE}, 1)], key=repr
+        )
+
+
+class StalledExporter(SpanExporter):
+    """Exporter stand-in that blocks until released, then succeeds or fails."""
+
+    def __init__(self, result: SpanExportResult = SpanExportResult.SUCCESS) -> None:
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.result = result
+        self.exported = 0
+
+    def export(self, spans) -> SpanExportResult:
+        self.entered.set()
+        self.release.wait(5)
+        self.exported += len(spans)
+        return self.result
+
+
+class OpaqueBatchProcessor:
+    """SDK batch processor stand-in hiding its private attributes (another SDK release)."""
+
+    def __init__(self, inner) -> None:
+        self.inner = inner
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+
+@pytest.mark.unit
+class TestMonitoredBatchSpanProcessor:
+    """Tests for the export pipeline self-metrics."""
+
+    @staticmethod
+    def make_pipeline(exporter: SpanExporter, **options):
+        reader = InMemoryMetricReader()
+        processor = MonitoredBatchSpanProcessor(
+            exporter, meter=MeterProvider(metric_readers=[reader]).get_meter(__name__), **options
+        )
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        return provider.get_tracer(__name__), processor, reader
+
+    def test_stalled_exporter_drops_instead_of_blocking(self):
+        """Test that a stalled exporter fills the queue and drops the overflow."""
+        exporter = StalledExporter()
+        tracer, processor, reader = self.make_pipeline(
+            exporter, max_queue_size=10, max_export_batch_size=5, schedule_delay_millis=60000
+        )
+        for _ in range(5):
+            tracer.start_span("request").end()
+        assert exporter.entered.wait(5)
+        # The export thread is stuck on the first batch; the queue fills behind it
+        for _ in range(25):
+            tracer.start_span("request").end()
+        assert processor.queue_depth() == 10
+        assert processor.dropped_spans == 15
+
+        points = collect(reader)
+        assert points["app.telemetry.spans.queued"] == [({}, 10)]
+        assert points["app.telemetry.spans.dropped"][0][1] == processor.dropped_spans
+
+        exporter.release.set()
+        processor.force_flush()
+        assert processor.queue_depth() == 0
+        assert processor.exported_spans == {"success": exporter.exported, "failure": 0}
+        assert exporter.exported + processor.dropped_spans == 30
+        processor.shutdown()
+
+    def test_unknown_queue_depth(self, monkeypatch):
+        """Test that missing SDK internals leave the queue metrics unknown instead of failing."""
+        exporter = StalledExporter()
+        exporter.release.set()
+        tracer, processor, reader = self.make_pipeline(exporter)
+        monkeypatch.setattr(processor, "_batch_processor", OpaqueBatchProcessor(processor._batch_processor))
+        assert processor.queue_depth() is None
+
+        tracer.start_span("request").end()
+        processor.force_flush()
+        assert exporter.exported == 1
+        assert processor.dropped_spans == 0
+        assert "app.telemetry.spans.queued" not in collect(reader)
+        processor.shutdown()
+
+    def test_export_results_and_latency(self):
+        """Test that export outcomes and durations are recorded."""
+        exporter = StalledExporter(SpanExportResult.FAILURE)
+        exporter.release.set()
+        tracer, processor, reader = self.make_pipeline(exporter)
+        for _ in range(3):
+            tracer.start_span("request").end()
+        processor.force_flush()
+
+        points = collect(reader)
+        assert {attributes["result"]: value for attributes, value in points["app.telemetry.spans.exported"]} == {
+            "success": 0,
+            "failure": 3,
+        }
+        assert points["app.telemetry.export.duration"]
+        processor.shutdown()
+
+
+@pytest.mark.unit
+class TestConfigureTelemetry:
+    """Tests for attaching extra metric readers."""
+
+    @pytest.fixture
+    def installed(self, monkeypatch):
+        """Capture meter providers instead of setting the global one."""
+        providers = []
+        monkeypatch.delenv("APPLICATIONINSIGHTS_CONNECTION_STRING", raising=False)
+        monkeypatch.setattr(metrics, "get_meter_provider", lambda: providers[-1] if providers else None)
+        monkeypatch.setattr(metrics, "set_meter_provider", providers.append)
+        yield providers
+        for provider in providers:
+            provider.shutdown()
+
+    def test_readers_without_connection_string(self, installed):
+        """Test that pull-based readers get a meter provider without Azure Monitor."""
+        reader = InMemoryMetricReader()
+        configure_telemetry("svc", "1.0", metric_readers=[reader])
+        assert len(installed) == 1
+        installed[0].get_meter("test").create_counter("hits").add(1)
+        assert collect(reader) == {"hits": [({}, 1)]}
+
+    def test_no_readers_keeps_noop_provider(self, installed):
+        """Test that nothing is installed without readers or a connection string."""
+        configure_telemetry("svc", "1.0")
+        assert installed == []
+
+    def test_existing_provider_is_kept(self, installed):
+        """Test that a second configuration does not replace the provider."""
+        configure_telemetry("svc", "1.0", metric_readers=[InMemoryMetricReader()])
+        configure_telemetry("svc", "1.0", metric_readers=[InMemoryMetricReader()])
+        assert len(installed) == 1